@@ -0,0 +1,123 @@
+"""
+Async views for the ASGI server.
+
+REST framework views are synchronous. Under ASGI Django would run each of them in a
+thread, along with every sync middleware around them. ``async_view`` wraps a view so
+that the requests its class answers from memory run right in the event loop, and
+only the others go to the thread of their request. There, database queries and
+calls to Elasticsearch wait without holding the event loop or a worker.
+
+Django 4.0's ASGI handler iterates streaming responses in the event loop, where
+their queries can't run. ``ASGIHandler`` pulls their chunks one at a time from the
+thread of their request instead, so they're still never held in memory as a whole.
+
+Views opt in with an ``answers_from_memory(request, action)`` class method. It must
+only return True for requests that do no I/O, as the event loop runs them to
+completion.
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+from django.urls import URLPattern, URLResolver
+
+
+def get_action(view_func, method):
+    """
+    The viewset action, or the lowercase HTTP method of a plain view, handling
+    ``method``.
+    """
+    method = method.lower()
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        return actions.get("get" if method == "head" else method)
+    return method
+
+
+def async_view(view_func):
+    """
+    Wraps the sync ``view_func`` into an async view rendering its response. Async
+    views are returned as they are.
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        return view_func
+
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    answers_from_memory = getattr(view_class, "answers_from_memory", None)
+
+    def respond(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            response.render()
+        return response
+
+    @functools.wraps(view_func)
+    async def view(request, *args, **kwargs):
+        if answers_from_memory is not None and answers_from_memory(
+            request, get_action(view_func, request.method)
+        ):
+            return respond(request, *args, **kwargs)
+        return await sync_to_async(respond)(request, *args, **kwargs)
+
+    return view
+
+
+def async_urlpatterns(urlpatterns):
+    """
+    The ``urlpatterns`` with every view wrapped by ``async_view``.
+    """
+    patterns = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                async_urlpatterns(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif isinstance(pattern, URLPattern):
+            pattern = URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        patterns.append(pattern)
+    return patterns
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    The ASGI handler of Django reading the chunks of streaming responses in the
+    thread of their request, one at a time, as they're sent.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        # Django sends the headers, then the now empty body, and closes the
+        # response, which closes the original iterator too. The chunks are sent in
+        # between.
+        parts = iter(response)
+        response.streaming_content = ()
+        read = sync_to_async(next, thread_sensitive=True)
+
+        async def send_streaming(message):
+            await send(message)
+            if message["type"] != "http.response.start":
+                return
+
+            part = await read(parts, None)
+            while part is not None:
+                for chunk, _ in self.chunk_bytes(part):
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+                part = await read(parts, None)
+
+        return await super().send_response(response, send_streaming)
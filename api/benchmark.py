@@ -0,0 +1,167 @@
+"""
+Helpers to benchmark the API in-process.
+
+Apps declare their scenarios in a ``benchmarks`` module with the ``register``
+decorator, they're run with ``python manage.py benchmark <scenario>``.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from asgiref.sync import ThreadSensitiveContext
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+scenarios = {}
+
+
+def register(name):
+    """
+    Registers a benchmark scenario. It's called with the number of requests to
+    measure and returns a list of ``Result``.
+    """
+
+    def decorator(func):
+        scenarios[name] = func
+        return func
+
+    return decorator
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of ``samples``.
+    """
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class Result:
+    label: str
+    requests: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    queries: float
+
+    @classmethod
+    def from_samples(cls, label, samples, queries):
+        samples_ms = [sample * 1000 for sample in samples]
+        return cls(
+            label=label,
+            requests=len(samples),
+            mean_ms=sum(samples_ms) / len(samples_ms),
+            p50_ms=percentile(samples_ms, 50),
+            p99_ms=percentile(samples_ms, 99),
+            queries=queries / len(samples),
+        )
+
+
+def sample(func, requests):
+    """
+    Calls ``func`` ``requests`` times, returning its latencies and the number of
+    database queries it ran.
+    """
+    samples = []
+    queries = 0
+
+    def count_queries(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count_queries):
+        for _ in range(requests):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+
+    return samples, queries
+
+
+def measure(label, func, requests):
+    """
+    Calls ``func`` ``requests`` times, recording its latency and the number of
+    database queries it ran.
+    """
+    return Result.from_samples(label, *sample(func, requests))
+
+
+def measure_concurrently(label, func, requests, threads):
+    """
+    Calls ``func`` ``requests`` times from each of ``threads`` threads at once,
+    recording every call's latency and the database queries they ran.
+    """
+    barrier = threading.Barrier(threads)
+
+    def run(_):
+        # Each thread has a connection of its own, closed once it's done.
+        barrier.wait()
+        try:
+            return sample(func, requests)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(run, range(threads)))
+
+    samples = [latency for latencies, _ in results for latency in latencies]
+    return Result.from_samples(label, samples, sum(queries for _, queries in results))
+
+
+def measure_async(label, func, requests, concurrency):
+    """
+    Awaits ``func`` ``requests`` times with at most ``concurrency`` calls in flight,
+    each in a context of its own like an ASGI server runs requests, recording every
+    call's latency and the database queries they ran from any thread.
+    """
+    lock = threading.Lock()
+    queries = 0
+
+    def count_queries(execute, *args):
+        nonlocal queries
+        with lock:
+            queries += 1
+        return execute(*args)
+
+    # Sync code runs in the thread of its context, which opens a connection of its own.
+    def wrap_connection(sender, connection, **kwargs):
+        connection.execute_wrappers.append(count_queries)
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore, ThreadSensitiveContext():
+                start = time.perf_counter()
+                await func()
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(call() for _ in range(requests)))
+
+    connection_created.connect(wrap_connection)
+    try:
+        samples = asyncio.run(run())
+    finally:
+        connection_created.disconnect(wrap_connection)
+
+    return Result.from_samples(label, samples, queries)
+
+
+def measure_urls(label, urls, requests, client=None, **extra):
+    """
+    Requests every URL in ``urls`` in turn and measures the whole cycle.
+    """
+    client = client or Client()
+
+    def fetch():
+        for url in urls:
+            response = client.get(url, **extra)
+            assert response.status_code < 400, (url, response.status_code)
+
+    return measure(label, fetch, requests)
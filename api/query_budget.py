@@ -0,0 +1,106 @@
+"""
+Per-view query budgets.
+
+Views declare the maximum number of database queries each of their actions may run
+in a ``query_budgets`` mapping, keyed by the viewset action name or, for plain
+views, by the lowercase HTTP method::
+
+    class SoraViewSet(viewsets.GenericViewSet):
+        query_budgets = {"list": 1, "retrieve": 1}
+
+``QueryBudgetMiddleware`` counts the queries of every request and reports the ones
+going over their view's budget, ``QueryBudgetTestMixin`` asserts on it in tests.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.utils.deprecation import MiddlewareMixin
+
+from api.async_views import get_action
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def unbudgeted():
+    """
+    Queries run inside this block don't count against the request's budget, e.g.
+    one-off loads of process-wide caches.
+    """
+    _local.depth = getattr(_local, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+
+
+class QueryCounter:
+    """
+    A database execute wrapper counting the budgeted queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not getattr(_local, "depth", 0):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_query_budget(view_func, method):
+    """
+    Returns the query budget the view behind ``view_func`` declares for ``method``,
+    or None when it declares none.
+    """
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    budgets = getattr(view_class, "query_budgets", None)
+    if budgets is None:
+        return None
+
+    return budgets.get(get_action(view_func, method))
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """
+    Counts the queries of every request and logs the ones exceeding the budget of
+    their view. With ``QUERY_BUDGET_RAISE`` on, ``QueryBudgetExceeded`` is raised
+    instead.
+
+    Under ASGI the hooks and the sync views of a request all run in the thread of
+    the request, so the counter sees the queries of its connection.
+    """
+
+    def process_request(self, request):
+        request.query_counter = QueryCounter()
+        connection.execute_wrappers.append(request.query_counter)
+
+    def process_response(self, request, response):
+        counter = request.query_counter
+        connection.execute_wrappers.remove(counter)
+
+        budget = getattr(request, "query_budget", None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f"{request.method} {request.path} ran {counter.count} queries, "
+                f"over its budget of {budget}."
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
@@ -0,0 +1,80 @@
+"""
+Faster renderers for the API.
+
+``JSONRenderer`` encodes with orjson, the same bytes as the renderer of REST
+framework but for floats, and ``MessagePackRenderer`` answers
+``Accept: application/msgpack``.
+Both libraries are optional: without orjson JSON is encoded by REST framework, and
+without msgpack the MessagePack renderer is left out of the settings.
+"""
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+# What REST framework escapes in its JSON output, as they end a line in JavaScript.
+LINE_SEPARATORS = (("\u2028".encode(), b"\\u2028"), ("\u2029".encode(), b"\\u2029"))
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    Renders JSON with orjson when it's installed, unless the output is asked to be
+    indented, spaced or ASCII only.
+
+    Values orjson doesn't know, and datetimes, which REST framework encodes its own
+    way, go through the encoder of REST framework. Data orjson can't encode, such as
+    integers wider than 64 bits, is rendered by REST framework.
+
+    Floats differ from REST framework: exponents are written without a sign or
+    padding, 1e20 rather than 1e+20, and NaN and infinities render as null where REST
+    framework raises a ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or data is None
+            or indent
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separator, escaped in LINE_SEPARATORS:
+            content = content.replace(separator, escaped)
+        return content
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renders MessagePack, with the values it doesn't know encoded like they are in
+    JSON, e.g. datetimes as ISO 8601 strings.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder_class = JSONRenderer.encoder_class
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self.encoder_class().default)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import importlib.util
 import os
 from pathlib import Path
 
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.query_budget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,6 +60,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "quran.middleware.ConditionalGetMiddleware",
+    "quran.middleware.ResponseCacheMiddleware",
 ]
 
 ROOT_URLCONF = "api.urls"
@@ -164,20 +168,105 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.CursorPagination",
     "COERCE_DECIMAL_TO_STRING": False,
     "PAGE_SIZE": 100,
+    # JSON is encoded by orjson, and MessagePack is rendered for
+    # Accept: application/msgpack when msgpack is installed, see api.renderers.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.JSONRenderer",
+        *(
+            ["api.renderers.MessagePackRenderer"]
+            if importlib.util.find_spec("msgpack")
+            else []
+        ),
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
+    ],
 }
 
-if not DEBUG:
-    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
-        "rest_framework.renderers.JSONRenderer",
-    ]
+
+# Query budgets
+# Views declare how many queries each of their actions may run, see
+# api.query_budget. Requests going over budget are logged, or fail when this is on,
+# with QUERY_BUDGET_RAISE=1, as it is in the tests, see api.testing.
+QUERY_BUDGET_RAISE = os.environ.get("QUERY_BUDGET_RAISE", "0") == "1"
+
+
+# Async views
+# Served over ASGI, the quran and search views are wrapped into async views: the ones
+# answered from the corpus run in the event loop, the others in the thread of their
+# request, see api.async_views. Turn it on with ASYNC_VIEWS=1 along with an ASGI
+# server. Under WSGI it only adds a thread hop to every request.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "0") == "1"
+
+
+# Quran corpus
+# The Juz, Sora and Aya tables never change at runtime. When enabled, each worker
+# loads them once into memory and serves the read endpoints from there instead of
+# querying the database on every request.
+QURAN_CORPUS_ENABLED = True
+
+# A corpus artifact built by the compile_corpus command. Workers map it instead of
+# querying the database for the corpus, which makes their cold start much cheaper.
+QURAN_CORPUS_ARTIFACT = os.environ.get("QURAN_CORPUS_ARTIFACT")
+
+# The responses of these quran views are rendered once per corpus version and then
+# served from an in-process cache, see quran.cache. Cached responses don't run the
+# view, so the views counting hits (aya-detail, sora-detail and sora-ayas-detail)
+# must stay out of it.
+QURAN_RESPONSE_CACHE_ENABLED = True
+QURAN_RESPONSE_CACHE_URL_NAMES = [
+    "sora-ayas",
+    "juz-list",
+    "sora-list",
+    "page-detail",
+    "verses",
+    "metadata",
+]
+QURAN_RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Views of ayas and soras are counted in memory and written to the database in bulk
+# every QURAN_HIT_FLUSH_INTERVAL seconds, see quran.hits.
+QURAN_HIT_COUNTING_ENABLED = True
+QURAN_HIT_FLUSH_INTERVAL = 10
+QURAN_HIT_BATCH_SIZE = 500
+
+TEST_RUNNER = "api.testing.TestRunner"
+
+# Cache-Control of the quran read endpoints by URL name, as keyword arguments of
+# django.utils.cache.patch_cache_control. They all send an ETag and Last-Modified
+# derived from the corpus and answer conditional requests with a 304, except the ones
+# mapped to None.
+QURAN_CACHE_CONTROL = {
+    "default": {"public": True, "max_age": 60 * 60},
+    "sora-ayas": {"public": True, "max_age": 24 * 60 * 60},
+    "cache-stats": None,
+    "aya-most-viewed": None,
+    "sora-most-viewed": None,
+}
 
 
 # Elastic search
+# The search endpoints are answered by Elasticsearch, by the in-process index of
+# search.index when this is "local", or by PostgreSQL full-text search when this is
+# "postgres", see search.postgres.
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "elasticsearch")
+
+# Search results are kept in an in-process cache for SEARCH_CACHE_TTL seconds, see
+# search.cache, whichever backend answers them. Concurrent requests for the same
+# results share a single search.
+SEARCH_CACHE_ENABLED = True
+SEARCH_CACHE_TTL = 5 * 60
+SEARCH_CACHE_MAX_ENTRIES = 1000
+
 ELASTICSEARCH_HOST = os.environ.get("ELASTICSEARCH_HOST", "localhost:9200")
 ELASTICSEARCH_DSL = {
     "default": {"hosts": ELASTICSEARCH_HOST},
 }
 
+# Changes are sent to Elasticsearch in one bulk request per transaction, once it
+# commits, see quran.indexing. The corpus never changes at runtime, turn syncing
+# off with ELASTICSEARCH_DSL_AUTOSYNC=0 and reindex with reindex_ayas instead.
+ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = "quran.indexing.BatchedSignalProcessor"
+ELASTICSEARCH_DSL_AUTOSYNC = os.environ.get("ELASTICSEARCH_DSL_AUTOSYNC", "1") == "1"
+
 
 # Logging
 if not DEBUG:
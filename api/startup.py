@@ -0,0 +1,213 @@
+"""
+Startup of the server workers, see gunicorn.conf.py.
+
+The master process preloads the application, builds the in-memory structures and
+warms up the endpoints once, then freezes the garbage collector before forking the
+workers. They start with everything built, sharing its pages copy-on-write, and as
+``gc.freeze`` moves the objects of the master out of the generations the collector
+scans, collections in the workers don't write to those pages.
+"""
+import gc
+import io
+import logging
+import resource
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import reverse
+
+from quran.cache import response_cache
+from quran.corpus import get_corpus
+from quran.hits import hit_buffer
+from search.autocomplete import get_autocomplete
+from search.index import get_search_index
+
+logger = logging.getLogger(__name__)
+
+# The endpoints requested by the warmup pass, by URL name and keyword arguments.
+WARMUP_URLS = (
+    ("quran:juz-list", {}),
+    ("quran:juz-detail", {"number": 30}),
+    ("quran:sora-list", {}),
+    ("quran:sora-detail", {"number": 2}),
+    ("quran:sora-ayas", {"number": 2}),
+    ("quran:sora-ayas-detail", {"number": 2, "aya_number": 255}),
+    ("quran:aya-list", {}),
+    ("quran:aya-detail", {"pk": "2:255"}),
+    ("quran:page-detail", {"number": 1}),
+    ("quran:word-list", {}),
+    ("quran:verses", {}),
+    ("quran:metadata", {}),
+)
+WARMUP_QUERIES = {
+    "quran:verses": {"keys": "1:1-7"},
+    "search:autocomplete": {"prefix": "يا"},
+    "search:aya-search-list": {"search": "الرحمن"},
+}
+
+
+def build():
+    """
+    Builds the structures the workers answer from: the corpus, its concordance, the
+    completions and, when it answers the searches, the local search index.
+    """
+    corpus = get_corpus()
+    corpus.concordance
+    get_autocomplete()
+    if settings.SEARCH_BACKEND == "local":
+        get_search_index()
+
+
+def warmup_host():
+    """
+    A host the requests of the warmup pass are allowed to be sent to.
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*":
+            return host.lstrip(".")
+    return "localhost"
+
+
+def warmup_urls():
+    urls = [(name, reverse(name, kwargs=kwargs)) for name, kwargs in WARMUP_URLS]
+    urls.append(("search:autocomplete", reverse("search:autocomplete")))
+    # Elasticsearch connections aren't to be shared with the workers.
+    if settings.SEARCH_BACKEND == "local":
+        urls.append(("search:aya-search-list", reverse("search:aya-search-list")))
+
+    return [
+        f"{url}?{urlencode(WARMUP_QUERIES[name])}" if name in WARMUP_QUERIES else url
+        for name, url in urls
+    ]
+
+
+def warmup_request(application, url, host):
+    """
+    Sends a GET of ``url`` through the WSGI ``application``, like the server does,
+    and returns the status code of the response.
+    """
+    parts = urlsplit(url)
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": "",
+        "PATH_INFO": parts.path,
+        "QUERY_STRING": parts.query,
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": host,
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split()[0]))
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+        # Dropped before the request finishes, which may flush them.
+        hit_buffer.clear()
+    finally:
+        response.close()
+    return statuses[0]
+
+
+def warmup():
+    """
+    Requests each of the warmup URLs once, so the modules, URL resolvers, serializers
+    and renderers they use are loaded before the workers fork. Returns the number of
+    requests that failed, which are logged.
+
+    The requests go through a WSGI handler of their own rather than the test client,
+    which would connect the signals of the test framework, e.g. to record the
+    templates rendered. The warmup isn't traffic: the hits and cached responses it
+    leaves are dropped.
+    """
+    application = get_wsgi_application()
+    host = warmup_host()
+
+    failed = 0
+    for url in warmup_urls():
+        try:
+            status_code = warmup_request(application, url, host)
+        except Exception:
+            logger.exception("Warmup request to %s failed.", url)
+            failed += 1
+            continue
+
+        if status_code != 200:
+            logger.warning("Warmup request to %s got %d.", url, status_code)
+            failed += 1
+
+    response_cache.clear()
+    return failed
+
+
+def prepare():
+    """
+    Builds and warms up the application in the master process, and freezes the
+    objects it allocated. Returns the time each step took in milliseconds, or None
+    when it failed, which is logged: the workers then build what's missing on first
+    use.
+    """
+    timings = {}
+    try:
+        start = time.perf_counter()
+        build()
+        timings["build_ms"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        timings["warmup_failures"] = warmup()
+        timings["warmup_ms"] = (time.perf_counter() - start) * 1000
+    except Exception:
+        logger.exception("Couldn't prepare the application before the fork.")
+        timings = None
+    finally:
+        # Forked workers would share the sockets of the connections.
+        connections.close_all()
+        gc.freeze()
+    return timings
+
+
+def memory_usage():
+    """
+    The memory of this process in bytes: its resident set, the part of it shared
+    with other processes, such as the pages of the master, and its private part.
+    Only the peak resident set is known outside of Linux.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            sizes = {}
+            for line in smaps:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    sizes[name] = int(value.split()[0]) * 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {"rss": peak, "shared": None, "private": None}
+
+    return {
+        "rss": sizes["Rss"],
+        "shared": sizes["Shared_Clean"] + sizes["Shared_Dirty"],
+        "private": sizes["Private_Clean"] + sizes["Private_Dirty"],
+    }
+
+
+def format_memory(usage):
+    return ", ".join(
+        f"{name} {size / 2**20:.1f} MiB"
+        for name, size in usage.items()
+        if size is not None
+    )
@@ -0,0 +1,46 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from api.query_budget import QueryCounter, get_query_budget
+
+
+class QueryBudgetTestMixin:
+    """
+    Asserts requests stay within the query budget declared by their view.
+    """
+
+    def assertWithinQueryBudget(self, url, method="get", **kwargs):
+        match = resolve(urlsplit(url).path)
+        budget = get_query_budget(match.func, method)
+        self.assertIsNotNone(budget, msg=f"{match.view_name} declares no budget.")
+
+        counter = QueryCounter()
+        with CaptureQueriesContext(connection) as context:
+            with connection.execute_wrapper(counter):
+                response = getattr(self.client, method)(url, **kwargs)
+
+        self.assertLessEqual(
+            counter.count,
+            budget,
+            msg=f"{method.upper()} {url} ran {counter.count} queries:\n"
+            + "\n".join(query["sql"] for query in context.captured_queries),
+        )
+        return response
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Turns hit counting off, so no request of the tests flushes the hit buffer
+    within their query counts. Its own tests turn it back on. Requests going over
+    their query budget fail the tests.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QURAN_HIT_COUNTING_ENABLED = False
+        settings.QUERY_BUDGET_RAISE = True
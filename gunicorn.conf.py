@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration of the API, see api.startup.
+
+The application is preloaded, built and warmed up in the master process before it
+forks the workers, which log how long they took to be ready and their memory.
+"""
+import gc
+import multiprocessing
+import os
+import time
+
+# The configuration is loaded before the application, so this is when the master
+# started.
+started = time.monotonic()
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+preload_app = True
+
+# The async views are served over ASGI by uvicorn workers, see api.async_views.
+if os.environ.get("ASYNC_VIEWS", "0") == "1":
+    wsgi_app = "api.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "api.wsgi:application"
+
+# Collections in the master would leave holes in the pages the workers share, so
+# the collector stays off until api.startup.prepare freezes the objects.
+gc.disable()
+
+
+def when_ready(server):
+    from api.startup import format_memory, memory_usage, prepare
+
+    try:
+        timings = prepare()
+    finally:
+        gc.enable()
+
+    if timings is None:
+        server.log.warning(
+            "Application not prepared, the workers build it on first use: %s.",
+            format_memory(memory_usage()),
+        )
+        return
+
+    server.log.info(
+        "Application ready in %.1f ms, built in %.1f ms, warmed up in %.1f ms "
+        "with %d failures: %s.",
+        (time.monotonic() - started) * 1000,
+        timings["build_ms"],
+        timings["warmup_ms"],
+        timings["warmup_failures"],
+        format_memory(memory_usage()),
+    )
+
+
+def post_fork(server, worker):
+    worker.forked = time.monotonic()
+
+
+def post_worker_init(worker):
+    from api.startup import format_memory, memory_usage
+
+    worker.log.info(
+        "Worker %d ready in %.1f ms: %s.",
+        worker.pid,
+        (time.monotonic() - worker.forked) * 1000,
+        format_memory(memory_usage()),
+    )
+
+
+def worker_exit(server, worker):
+    from api.startup import format_memory, memory_usage
+
+    worker.log.info("Worker %d exiting: %s.", worker.pid, format_memory(memory_usage()))
@@ -1,6 +1,16 @@
+import atexit
+
 from django.apps import AppConfig
+from django.core.signals import request_finished
 
 
 class QuranConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "quran"
+
+    def ready(self):
+        from quran.hits import hit_buffer
+
+        # Buffered hits are written once a request is done, and when the worker exits
+        request_finished.connect(hit_buffer.flush_if_due, dispatch_uid="quran.hits")
+        atexit.register(hit_buffer.flush)
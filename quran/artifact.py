@@ -0,0 +1,173 @@
+"""
+A compact binary image of the corpus that workers map instead of querying for it.
+
+The file starts with a fixed header and a directory of the corpus columns, followed
+by the columns themselves::
+
+    header     magic, format version, column count, corpus version, last modified
+    directory  per column: name, kind, typecode, row count, offset, size
+    columns    numeric: the raw little-endian values
+               text:    (rows + 1) uint32 offsets, a null mask, the UTF-8 blob
+
+The file is mapped read-only, numeric columns are memoryviews over the mapping and
+text is decoded row by row on access, so loading only reads what gets used and the
+pages are shared by every process mapping the same file.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+MAGIC = b"QRNC"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHH32sq")
+DIRECTORY_ENTRY = struct.Struct("<24sccQQQ")
+
+NUMERIC = b"n"
+TEXT = b"t"
+
+
+class ArtifactError(Exception):
+    pass
+
+
+class TextColumn:
+    """
+    A read-only sequence of the strings of a text column, decoded on access.
+    """
+
+    def __init__(self, offsets, nulls, blob):
+        self._offsets = offsets
+        self._nulls = nulls
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._nulls)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+        if self._nulls[row]:
+            return None
+        start, stop = self._offsets[row], self._offsets[row + 1]
+        return str(self._blob[start:stop], "utf-8")
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode_text(values):
+    offsets = array("I", [0])
+    nulls = bytearray()
+    blob = bytearray()
+    for value in values:
+        nulls.append(value is None)
+        if value is not None:
+            blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return _little_endian(offsets) + bytes(nulls) + bytes(blob)
+
+
+def write_artifact(path, columns, version, last_modified):
+    """
+    Writes the ``columns`` mapping of names to arrays or lists of strings, with the
+    version and last modification of the corpus they hold, to ``path``.
+    """
+    sections = []
+    for name, column in columns.items():
+        if isinstance(column, array):
+            entry = (NUMERIC, column.typecode.encode(), _little_endian(column))
+        else:
+            entry = (TEXT, b"I", _encode_text(column))
+        sections.append((name, len(column), *entry))
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(sections),
+        bytes.fromhex(version),
+        -1
+        if last_modified is None
+        else (last_modified - EPOCH) // timedelta.resolution,
+    )
+
+    offset = HEADER.size + DIRECTORY_ENTRY.size * len(sections)
+    directory = []
+    for name, rows, kind, typecode, data in sections:
+        directory.append(
+            DIRECTORY_ENTRY.pack(name.encode(), kind, typecode, rows, offset, len(data))
+        )
+        offset += len(data)
+
+    # Replaced in one go, workers still mapping the previous file keep reading it.
+    partial = f"{path}.partial"
+    with open(partial, "wb") as artifact:
+        artifact.write(header)
+        artifact.writelines(directory)
+        artifact.writelines(data for *_, data in sections)
+    os.replace(partial, path)
+
+
+def read_artifact(path):
+    """
+    Maps the artifact at ``path``.
+
+    Returns the columns by name, the corpus version and last modification, and the
+    mapping itself, which must be kept alive for as long as the columns are used.
+    """
+    with open(path, "rb") as artifact:
+        buffer = mmap.mmap(artifact.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < HEADER.size:
+        raise ArtifactError(f"{path} is not a corpus artifact.")
+    magic, format_version, count, version, last_modified = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ArtifactError(f"{path} is not a corpus artifact.")
+    if format_version != FORMAT_VERSION:
+        raise ArtifactError(
+            f"{path} has format version {format_version}, expected {FORMAT_VERSION}."
+        )
+
+    view = memoryview(buffer)
+    columns = {}
+    for index in range(count):
+        name, kind, typecode, rows, offset, size = DIRECTORY_ENTRY.unpack_from(
+            buffer, HEADER.size + DIRECTORY_ENTRY.size * index
+        )
+        end = offset + size
+        data = view[offset:end]
+        if kind == NUMERIC:
+            column = data.cast(typecode.decode())
+            if sys.byteorder == "big":
+                column = array(typecode.decode(), column)
+                column.byteswap()
+        else:
+            nulls_start = (rows + 1) * 4
+            blob_start = nulls_start + rows
+            offsets = data[:nulls_start].cast("I")
+            if sys.byteorder == "big":
+                offsets = array("I", offsets)
+                offsets.byteswap()
+            column = TextColumn(
+                offsets, data[nulls_start:blob_start], data[blob_start:]
+            )
+        columns[name.rstrip(b"\0").decode()] = column
+
+    if last_modified >= 0:
+        last_modified = EPOCH + last_modified * timedelta.resolution
+    else:
+        last_modified = None
+
+    return columns, version.hex(), last_modified, buffer
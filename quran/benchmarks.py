@@ -0,0 +1,218 @@
+import json
+import os
+import tempfile
+
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework import renderers
+
+from api.benchmark import measure, measure_urls, register
+from api.renderers import JSONRenderer, MessagePackRenderer, msgpack
+from quran.concordance import Concordance
+from quran.corpus import Corpus, get_corpus
+from quran.loader import preflight_path
+from quran.models import Aya
+from quran.serializers import AyaSerializer
+from quran.verse_keys import parse_verse_keys
+from quran.views import ayas_queryset
+
+
+def read_urls():
+    return {
+        "juz list": reverse("quran:juz-list"),
+        "juz detail": reverse("quran:juz-detail", kwargs={"number": 13}),
+        "sora list": reverse("quran:sora-list") + "?page_size=200",
+        "sora detail": reverse("quran:sora-detail", kwargs={"number": 2}),
+        "sora ayas (al-baqarah)": reverse("quran:sora-ayas", kwargs={"number": 2}),
+        "sora aya detail": reverse(
+            "quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255}
+        ),
+        "aya list (200)": reverse("quran:aya-list") + "?page_size=200",
+        "metadata": reverse("quran:metadata"),
+    }
+
+
+@register("corpus")
+def corpus(requests):
+    """
+    The read endpoints served by the ORM against the in-process corpus.
+    """
+    get_corpus()
+
+    results = []
+    for label, url in read_urls().items():
+        for enabled, source in ((False, "orm"), (True, "corpus")):
+            with override_settings(
+                QURAN_CORPUS_ENABLED=enabled, QURAN_RESPONSE_CACHE_ENABLED=False
+            ):
+                results.append(measure_urls(f"{label} [{source}]", [url], requests))
+    return results
+
+
+@register("response_cache")
+def response_cache(requests):
+    """
+    The cached endpoints rendered on every request against served pre-rendered.
+    """
+    get_corpus()
+    urls = read_urls()
+
+    results = []
+    for label in ("juz list", "sora list", "sora ayas (al-baqarah)", "metadata"):
+        for enabled, source in ((False, "rendered"), (True, "cached")):
+            with override_settings(QURAN_RESPONSE_CACHE_ENABLED=enabled):
+                results.append(
+                    measure_urls(f"{label} [{source}]", [urls[label]], requests)
+                )
+    return results
+
+
+@register("verses")
+def verses(requests):
+    """
+    Fetching a set of ayas in one verse keys request against one request per aya.
+    """
+    get_corpus()
+    keys = "1:1-7,2:255-257,18:1-10,36:1-12,112:1-4"
+    urls = [
+        reverse("quran:sora-ayas-detail", kwargs={"number": sora, "aya_number": aya})
+        for sora, first, last in parse_verse_keys(keys)
+        for aya in range(first, last + 1)
+    ]
+    bulk = [reverse("quran:verses") + f"?keys={keys}"]
+
+    results = []
+    for enabled, source in ((False, "orm"), (True, "corpus")):
+        with override_settings(
+            QURAN_CORPUS_ENABLED=enabled, QURAN_RESPONSE_CACHE_ENABLED=False
+        ):
+            results.append(
+                measure_urls(f"{len(urls)} aya requests [{source}]", urls, requests)
+            )
+            results.append(measure_urls(f"1 verses request [{source}]", bulk, requests))
+    return results
+
+
+@register("cold_start")
+def cold_start(requests):
+    """
+    Getting a worker's corpus from the preflight JSON, the database and the artifact.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.bin")
+        Corpus.load().write_artifact(path)
+
+        def parse_preflight():
+            with open(preflight_path("hafsData_v18.json"), encoding="utf-8") as data:
+                json.load(data)
+
+        def map_artifact():
+            Corpus.from_artifact(path).sora_ayas(2)
+
+        return [
+            measure("json.load preflight", parse_preflight, requests),
+            measure("load from the database", Corpus.load, requests),
+            measure("map the artifact + render a sora", map_artifact, requests),
+        ]
+
+
+@register("concordance")
+def concordance(requests):
+    """
+    Building the concordance, and the occurrences of a word from it against
+    scanning the clean text of the ayas for them.
+    """
+    corpus = get_corpus()
+    corpus.concordance
+    word = "الله"
+
+    def scan():
+        ayas = Aya.objects.filter(clean_text__contains=word).order_by(
+            "sora__number", "number"
+        )
+        return [
+            (sora, number, position)
+            for sora, number, text in ayas.values_list(
+                "sora__number", "number", "clean_text"
+            )
+            for position, found in enumerate(text.split(), 1)
+            if found == word
+        ]
+
+    return [
+        measure("build", lambda: Concordance(corpus), requests),
+        measure("occurrences [scan]", scan, requests),
+        measure(
+            "occurrences [concordance]",
+            lambda: corpus.concordance.occurrences(word),
+            requests,
+        ),
+        measure_urls(
+            "occurrences endpoint",
+            [reverse("quran:word-detail", kwargs={"word": word})],
+            requests,
+        ),
+        measure_urls("top 100 endpoint", [reverse("quran:word-list")], requests),
+    ]
+
+
+@register("aya_pages")
+def aya_pages(requests):
+    """
+    The first, a middle and the last page of the aya list, which cost the same with
+    keyset pagination on the ordinal.
+    """
+    get_corpus()
+    client = Client()
+
+    pages = []
+    url = reverse("quran:aya-list") + "?page_size=100"
+    while url:
+        pages.append(url)
+        url = client.get(url).json()["next"]
+
+    results = []
+    for number in (1, len(pages) // 2, len(pages)):
+        for enabled, source in ((False, "orm"), (True, "corpus")):
+            with override_settings(QURAN_CORPUS_ENABLED=enabled):
+                results.append(
+                    measure_urls(
+                        f"page {number} [{source}]", [pages[number - 1]], requests
+                    )
+                )
+    return results
+
+
+@register("serialization")
+def serialization(requests):
+    """
+    Al-Baqarah's ayas serialized by the REST framework fields against built from
+    values() rows, then rendered by the stdlib json, orjson and msgpack.
+    """
+    ayas = ayas_queryset.filter(sora__number=2).order_by("number")
+    data = AyaSerializer(ayas, many=True).data
+
+    assert AyaSerializer.values_data(ayas) == data
+    assert renderers.JSONRenderer().render(data) == JSONRenderer().render(data)
+
+    results = [
+        measure(
+            "serializer", lambda: AyaSerializer(ayas.all(), many=True).data, requests
+        ),
+        measure("values", lambda: AyaSerializer.values_data(ayas), requests),
+        measure(
+            "json [stdlib]", lambda: renderers.JSONRenderer().render(data), requests
+        ),
+        measure("json [orjson]", lambda: JSONRenderer().render(data), requests),
+    ]
+    if msgpack is not None:
+        results.append(
+            measure("msgpack", lambda: MessagePackRenderer().render(data), requests)
+        )
+
+    url = reverse("quran:sora-ayas", kwargs={"number": 2})
+    with override_settings(
+        QURAN_CORPUS_ENABLED=False, QURAN_RESPONSE_CACHE_ENABLED=False
+    ):
+        results.append(measure_urls("sora ayas endpoint [orm]", [url], requests))
+    return results
@@ -0,0 +1,169 @@
+"""
+A process-wide cache of pre-rendered responses.
+
+The Quran endpoints render content that only changes when the corpus does, so their
+rendered bytes are kept, along with a gzipped copy, in a least recently used cache
+capped by its size in bytes. Entries are namespaced by the corpus version: once the
+corpus is reloaded with different content every older entry is dropped at once.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlencode
+from django.utils.regex_helper import _lazy_re_compile
+
+re_accepts_gzip = _lazy_re_compile(r"\bgzip\b")
+
+
+def cache_key(request):
+    """
+    Everything a rendered response depends on: the URL, including the host as the
+    pagination links are absolute, the sorted query parameters and the negotiated
+    media type.
+    """
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    accept = request.headers.get("Accept", "").replace(" ", "").lower()
+
+    return f"{request.scheme}://{request.get_host()}{request.path}?{query}|{accept}"
+
+
+def make_etag(version, key):
+    digest = hashlib.sha256(f"{version}|{key}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    content_type: str
+    etag: str
+    headers: dict = field(default_factory=dict)
+    gzipped: bytes = None
+
+    @classmethod
+    def from_response(cls, response, etag):
+        content = response.content
+        gzipped = gzip.compress(content, mtime=0)
+
+        return cls(
+            content=content,
+            content_type=response["Content-Type"],
+            etag=etag,
+            headers={
+                header: response[header]
+                for header in ("Allow", "Vary")
+                if response.has_header(header)
+            },
+            # Not worth it when compression doesn't save anything
+            gzipped=gzipped if len(gzipped) < len(content) else None,
+        )
+
+    @property
+    def size(self):
+        return len(self.content) + len(self.gzipped or b"")
+
+    def to_response(self, request):
+        use_gzip = self.gzipped is not None and re_accepts_gzip.search(
+            request.headers.get("Accept-Encoding", "")
+        )
+
+        if use_gzip:
+            response = HttpResponse(self.gzipped, content_type=self.content_type)
+            response["Content-Encoding"] = "gzip"
+            # Different encodings of the same resource can't share a strong ETag
+            response["ETag"] = f'{self.etag[:-1]}-gzip"'
+        else:
+            response = HttpResponse(self.content, content_type=self.content_type)
+            response["ETag"] = self.etag
+
+        for header, value in self.headers.items():
+            response[header] = value
+
+        if self.gzipped is not None:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class ResponseCache:
+    """
+    A least recently used mapping of cache keys to ``CachedResponse`` of a single
+    corpus version, holding at most ``QURAN_RESPONSE_CACHE_MAX_BYTES``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _switch_version(self, version):
+        if version != self._version:
+            self._entries = OrderedDict()
+            self._version = version
+            self._size = 0
+
+    def get(self, version, key):
+        with self._lock:
+            self._switch_version(version)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, version, key, entry):
+        max_bytes = settings.QURAN_RESPONSE_CACHE_MAX_BYTES
+        if entry.size > max_bytes:
+            return
+
+        with self._lock:
+            self._switch_version(version)
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+
+            self._entries[key] = entry
+            self._size += entry.size
+
+            while self._size > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": settings.QURAN_RESPONSE_CACHE_MAX_BYTES,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = ResponseCache()
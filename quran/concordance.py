@@ -0,0 +1,126 @@
+"""
+A concordance of the words of the ayas, built from the corpus.
+
+Every word of the clean text maps to its occurrences, the aya rows and the positions
+of the word in them, and to the number of its occurrences in each sora and juz. All
+of it lives in flat arrays grouped by word, so a lookup only slices them::
+
+    words                 the distinct words, sorted
+    starts[n]             where the occurrences of the n-th word start
+    rows, positions       the occurrences, by word and then in mushaf order
+    sora_starts[n]        where the per sora counts of the n-th word start
+    soras, sora_counts    the sora numbers and counts, by word and then by sora
+
+and likewise for the juzs.
+"""
+from array import array
+from itertools import groupby
+
+
+class Concordance:
+    """
+    The occurrences and frequencies of every word of the clean text of the ayas.
+
+    Words are split on whitespace and their positions in an aya start at 1.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+
+        found_rows, found_positions = {}, {}
+        for row, text in enumerate(corpus.aya_clean_texts):
+            for position, word in enumerate(text.split(), 1):
+                if word in found_rows:
+                    found_rows[word].append(row)
+                    found_positions[word].append(position)
+                else:
+                    found_rows[word] = [row]
+                    found_positions[word] = [position]
+
+        self.words = sorted(found_rows)
+        self.word_index = {word: n for n, word in enumerate(self.words)}
+
+        self.starts, self.rows, self.positions = array("I", [0]), array("H"), array("B")
+        self.sora_starts, self.soras = array("I", [0]), array("B")
+        self.sora_counts = array("H")
+        self.juz_starts, self.juzs = array("I", [0]), array("B")
+        self.juz_counts = array("H")
+
+        aya_soras, aya_juzs = list(corpus.aya_soras), list(corpus.aya_juzs)
+        for word in self.words:
+            rows = found_rows[word]
+            self.rows.extend(rows)
+            self.positions.extend(found_positions[word])
+            self.starts.append(len(self.rows))
+
+            # The rows are in mushaf order, so are the soras and the juzs.
+            self._count(rows, aya_soras, self.sora_starts, self.soras, self.sora_counts)
+            self._count(rows, aya_juzs, self.juz_starts, self.juzs, self.juz_counts)
+
+        # Word numbers by decreasing frequency, ties in alphabetical order.
+        self.ranking = array(
+            "H", sorted(range(len(self.words)), key=lambda n: -self.frequency(n))
+        )
+
+    @staticmethod
+    def _count(rows, numbers, starts, keys, counts):
+        for key, group in groupby(rows, numbers.__getitem__):
+            keys.append(key)
+            counts.append(sum(1 for _ in group))
+        starts.append(len(keys))
+
+    def frequency(self, n):
+        """
+        The number of occurrences of the n-th word.
+        """
+        return self.starts[n + 1] - self.starts[n]
+
+    def occurrences(self, word):
+        """
+        The (sora, aya, position) of every occurrence of ``word`` in mushaf order, or
+        None when it never occurs.
+        """
+        n = self.word_index.get(word)
+        if n is None:
+            return None
+
+        start, stop = self.starts[n], self.starts[n + 1]
+        corpus = self.corpus
+        return [
+            (corpus.aya_soras[row], corpus.aya_numbers[row], position)
+            for row, position in zip(self.rows[start:stop], self.positions[start:stop])
+        ]
+
+    def sora_frequencies(self, word):
+        """
+        The (sora, count) pairs of the soras ``word`` occurs in, or None when it never
+        occurs.
+        """
+        n = self.word_index.get(word)
+        if n is None:
+            return None
+
+        start, stop = self.sora_starts[n], self.sora_starts[n + 1]
+        return list(zip(self.soras[start:stop], self.sora_counts[start:stop]))
+
+    def juz_frequencies(self, word):
+        """
+        The (juz, count) pairs of the juzs ``word`` occurs in, or None when it never
+        occurs.
+        """
+        n = self.word_index.get(word)
+        if n is None:
+            return None
+
+        start, stop = self.juz_starts[n], self.juz_starts[n + 1]
+        return list(zip(self.juzs[start:stop], self.juz_counts[start:stop]))
+
+    def count(self, word):
+        n = self.word_index.get(word)
+        return 0 if n is None else self.frequency(n)
+
+    def most_common(self, size):
+        """
+        The ``size`` most frequent words, as (word, count) pairs.
+        """
+        return [(self.words[n], self.frequency(n)) for n in self.ranking[:size]]
@@ -0,0 +1,512 @@
+"""
+An immutable, in-process snapshot of The Holy Qur'an.
+
+The 30 Juz, 114 Sora and 6236 Aya never change at runtime, so instead of asking the
+database for them on every request, each worker loads them once into compact,
+column-oriented arrays and renders the API representations straight from memory.
+The representations are identical to the ones produced by ``quran.serializers``.
+"""
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+
+from django.conf import settings
+from rest_framework import fields
+
+from api.query_budget import unbudgeted
+from quran.artifact import ArtifactError, read_artifact, write_artifact
+from quran.concordance import Concordance
+from quran.models import Aya, Juz, Sora
+from quran.verse_keys import parse_aya_lookup
+
+
+class Rows:
+    """
+    A read-only, queryset-like window over one of the corpus tables.
+
+    It implements just enough of the ``QuerySet`` API (``order_by``, ``filter`` on
+    its ``field``, slicing and ``count``) for ``CursorPagination`` to page through it.
+    """
+
+    def __init__(
+        self,
+        render,
+        order,
+        numbers,
+        field="number",
+        start=0,
+        stop=None,
+        reverse=False,
+    ):
+        # ``order`` holds the row indexes sorted by ``field``, ``numbers`` the
+        # matching values so lookups on them are a binary search.
+        self._render = render
+        self._order = order
+        self._numbers = numbers
+        self._field = field
+        self._start = start
+        self._stop = len(order) if stop is None else stop
+        self._reverse = reverse
+
+    def _clone(self, **kwargs):
+        options = {
+            "start": self._start,
+            "stop": self._stop,
+            "reverse": self._reverse,
+            **kwargs,
+        }
+        return Rows(self._render, self._order, self._numbers, self._field, **options)
+
+    def _positions(self):
+        if self._reverse:
+            return range(self._stop - 1, self._start - 1, -1)
+        return range(self._start, self._stop)
+
+    def order_by(self, *field_names):
+        if field_names not in ((self._field,), (f"-{self._field}",)):
+            raise ValueError(f"Corpus rows can't be ordered by {field_names}.")
+
+        return self._clone(reverse=field_names[0].startswith("-"))
+
+    def filter(self, **kwargs):
+        start, stop = self._start, self._stop
+
+        for lookup, value in kwargs.items():
+            field_name, _, lookup_type = lookup.partition("__")
+            if field_name != self._field:
+                raise ValueError(f"Corpus rows can't be filtered by {lookup}.")
+
+            value = int(value)
+            if lookup_type in ("", "exact", "gte"):
+                start = max(start, bisect_left(self._numbers, value))
+            if lookup_type in ("", "exact", "lte"):
+                stop = min(stop, bisect_right(self._numbers, value))
+            if lookup_type == "gt":
+                start = max(start, bisect_right(self._numbers, value))
+            if lookup_type == "lt":
+                stop = min(stop, bisect_left(self._numbers, value))
+
+        return self._clone(start=start, stop=max(start, stop))
+
+    def count(self):
+        return len(self)
+
+    def exists(self):
+        return len(self) > 0
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        return (self._render(self._order[position]) for position in self._positions())
+
+    def __getitem__(self, key):
+        positions = self._positions()[key]
+
+        if isinstance(key, slice):
+            return [self._render(self._order[position]) for position in positions]
+        return self._render(self._order[positions])
+
+
+class Corpus:
+    """
+    Column-oriented storage of every Juz, Sora and Aya.
+
+    Numeric columns live in ``array`` instances and text columns in plain lists, all
+    indexed by a row number. Ayas are stored in mushaf order (by sora, then by aya
+    number) so the ayas of a sora are always a contiguous range of rows.
+    """
+
+    columns = (
+        "juz_ids",
+        "juz_numbers",
+        "juz_worded_ar",
+        "juz_worded_en",
+        "juz_created",
+        "juz_updated",
+        "sora_ids",
+        "sora_numbers",
+        "sora_names_en",
+        "sora_names_ar",
+        "sora_clean_names_ar",
+        "sora_created",
+        "sora_updated",
+        "aya_ids",
+        "aya_soras",
+        "aya_juzs",
+        "aya_texts",
+        "aya_clean_texts",
+        "aya_numbers",
+        "aya_pages",
+        "aya_lines_start",
+        "aya_lines_end",
+        "aya_ordinals",
+        "aya_created",
+        "aya_updated",
+    )
+
+    def __init__(self, juzs, soras, ayas):
+        to_datetime = fields.DateTimeField().to_representation
+
+        self.juz_ids = [str(juz["id"]) for juz in juzs]
+        self.juz_numbers = array("B", (juz["number"] for juz in juzs))
+        self.juz_worded_ar = [juz["number_worded_ar"] for juz in juzs]
+        self.juz_worded_en = [juz["number_worded_en"] for juz in juzs]
+        self.juz_created = [to_datetime(juz["created"]) for juz in juzs]
+        self.juz_updated = [to_datetime(juz["updated"]) for juz in juzs]
+
+        self.sora_ids = [str(sora["id"]) for sora in soras]
+        self.sora_numbers = array("B", (sora["number"] for sora in soras))
+        self.sora_names_en = [sora["name_en"] for sora in soras]
+        self.sora_names_ar = [sora["name_ar"] for sora in soras]
+        self.sora_clean_names_ar = [sora["clean_name_ar"] for sora in soras]
+        self.sora_created = [to_datetime(sora["created"]) for sora in soras]
+        self.sora_updated = [to_datetime(sora["updated"]) for sora in soras]
+
+        self.aya_ids = [str(aya["id"]) for aya in ayas]
+        self.aya_soras = array("B", (aya["sora__number"] for aya in ayas))
+        self.aya_juzs = array("B", (aya["juz__number"] for aya in ayas))
+        self.aya_texts = [aya["text"] for aya in ayas]
+        self.aya_clean_texts = [aya["clean_text"] for aya in ayas]
+        self.aya_numbers = array("H", (aya["number"] for aya in ayas))
+        self.aya_pages = array("H", (aya["page"] for aya in ayas))
+        self.aya_lines_start = array("B", (aya["line_start"] for aya in ayas))
+        self.aya_lines_end = array("B", (aya["line_end"] for aya in ayas))
+        self.aya_ordinals = array("H", (aya["ordinal"] for aya in ayas))
+        self.aya_created = [to_datetime(aya["created"]) for aya in ayas]
+        self.aya_updated = [to_datetime(aya["updated"]) for aya in ayas]
+
+        self.version = self._content_hash()
+        self.last_modified = max(
+            (row["updated"] for rows in (juzs, soras, ayas) for row in rows),
+            default=None,
+        )
+        self._build_indexes()
+
+    def _content_hash(self):
+        """
+        A digest of every column, it changes whenever any of the data does.
+        """
+        digest = hashlib.sha256()
+        for name in sorted(self.columns):
+            column = getattr(self, name)
+            digest.update(name.encode())
+            if isinstance(column, array):
+                digest.update(column.tobytes())
+            else:
+                digest.update("\x1f".join(map(str, column)).encode())
+        return digest.hexdigest()
+
+    def _build_indexes(self):
+        self.juz_index = {number: row for row, number in enumerate(self.juz_numbers)}
+        self.sora_index = {number: row for row, number in enumerate(self.sora_numbers)}
+        self.aya_index = {pk: row for row, pk in enumerate(self.aya_ids)}
+        self.aya_ordinal_index = {
+            ordinal: row for row, ordinal in enumerate(self.aya_ordinals)
+        }
+
+        # sora_offsets[row] is the first aya row of the sora at ``row``, and
+        # sora_offsets[row + 1] is where the next sora starts.
+        self.sora_offsets = array("H", [0])
+        self.sora_offsets.extend(
+            bisect_right(self.aya_soras, number) for number in self.sora_numbers
+        )
+
+        # In mushaf order pages never go back, so the ayas of a page are a contiguous
+        # range of rows too, and within a page the lines never go back either.
+        # page_lines maps a page number to (line, start row, stop row) triples
+        # of the ayas starting on that line.
+        self.page_lines = {}
+        for row, page in enumerate(self.aya_pages):
+            lines = self.page_lines.setdefault(page, [])
+            line = self.aya_lines_start[row]
+            if lines and lines[-1][0] == line:
+                lines[-1][2] = row + 1
+            else:
+                lines.append([line, row, row + 1])
+
+    @classmethod
+    def load(cls):
+        """
+        Loads the corpus from the database, in three queries.
+        """
+        juzs = Juz.objects.order_by("number").values(
+            "id",
+            "number",
+            "number_worded_ar",
+            "number_worded_en",
+            "created",
+            "updated",
+        )
+        soras = Sora.objects.order_by("number").values(
+            "id",
+            "name_en",
+            "name_ar",
+            "clean_name_ar",
+            "number",
+            "created",
+            "updated",
+        )
+        ayas = Aya.objects.order_by("sora__number", "number").values(
+            "id",
+            "sora__number",
+            "juz__number",
+            "text",
+            "clean_text",
+            "number",
+            "page",
+            "line_start",
+            "line_end",
+            "ordinal",
+            "created",
+            "updated",
+        )
+        return cls(list(juzs), list(soras), list(ayas))
+
+    @classmethod
+    def from_artifact(cls, path):
+        """
+        Maps the corpus from the artifact at ``path``, see ``quran.artifact``.
+        """
+        columns, version, last_modified, buffer = read_artifact(path)
+
+        missing = set(cls.columns) - set(columns)
+        if missing:
+            raise ArtifactError(
+                f"{path} lacks the columns {', '.join(sorted(missing))}."
+            )
+
+        corpus = cls.__new__(cls)
+        for name in cls.columns:
+            setattr(corpus, name, columns[name])
+        corpus.version = version
+        corpus.last_modified = last_modified
+        # The columns are views over the mapping, it must live as long as they do.
+        corpus.artifact = buffer
+        corpus._build_indexes()
+        return corpus
+
+    def write_artifact(self, path):
+        """
+        Writes the corpus to an artifact ``from_artifact`` can map.
+        """
+        columns = {name: getattr(self, name) for name in self.columns}
+        write_artifact(path, columns, self.version, self.last_modified)
+
+    @cached_property
+    def concordance(self):
+        """
+        The concordance of the words of the ayas, see ``quran.concordance``, built on
+        first use.
+        """
+        return Concordance(self)
+
+    @property
+    def juz_count(self):
+        return len(self.juz_numbers)
+
+    @property
+    def sora_count(self):
+        return len(self.sora_numbers)
+
+    @property
+    def aya_count(self):
+        return len(self.aya_ids)
+
+    def juz_data(self, row):
+        return {
+            "id": self.juz_ids[row],
+            "number": self.juz_numbers[row],
+            "number_worded_ar": self.juz_worded_ar[row],
+            "number_worded_en": self.juz_worded_en[row],
+            "created": self.juz_created[row],
+            "updated": self.juz_updated[row],
+        }
+
+    def sora_data(self, row):
+        return {
+            "id": self.sora_ids[row],
+            "name_en": self.sora_names_en[row],
+            "name_ar": self.sora_names_ar[row],
+            "ayas_count": self.sora_offsets[row + 1] - self.sora_offsets[row],
+            "clean_name_ar": self.sora_clean_names_ar[row],
+            "number": self.sora_numbers[row],
+            "created": self.sora_created[row],
+            "updated": self.sora_updated[row],
+        }
+
+    def aya_data(self, row):
+        return {
+            "id": self.aya_ids[row],
+            "sora": self.aya_soras[row],
+            "juz": self.aya_juzs[row],
+            "text": self.aya_texts[row],
+            "clean_text": self.aya_clean_texts[row],
+            "number": self.aya_numbers[row],
+            "page": self.aya_pages[row],
+            "line_start": self.aya_lines_start[row],
+            "line_end": self.aya_lines_end[row],
+            "ordinal": self.aya_ordinals[row],
+            "verse_key": f"{self.aya_soras[row]}:{self.aya_numbers[row]}",
+            "created": self.aya_created[row],
+            "updated": self.aya_updated[row],
+        }
+
+    @property
+    def juzs(self):
+        order = range(self.juz_count)
+        return Rows(self.juz_data, order, self.juz_numbers)
+
+    @property
+    def soras(self):
+        order = range(self.sora_count)
+        return Rows(self.sora_data, order, self.sora_numbers)
+
+    @property
+    def ayas(self):
+        # Rows are in mushaf order, which is the order of the ordinals.
+        order = range(self.aya_count)
+        return Rows(self.aya_data, order, self.aya_ordinals, "ordinal")
+
+    def juz(self, number):
+        """
+        Returns the representation of the Juz with ``number``, or None.
+        """
+        row = self.juz_index.get(_to_int(number))
+        return None if row is None else self.juz_data(row)
+
+    def sora(self, number):
+        """
+        Returns the representation of the Sora with ``number``, or None.
+        """
+        row = self.sora_index.get(_to_int(number))
+        return None if row is None else self.sora_data(row)
+
+    def aya(self, value):
+        """
+        Returns the representation of the Aya with the ordinal, verse key or primary
+        key ``value``, or None.
+        """
+        lookup = parse_aya_lookup(value)
+        if lookup is None:
+            return None
+
+        field, value = lookup
+        if field == "verse_key":
+            return self.sora_aya(*value.split(":"))
+
+        if field == "ordinal":
+            row = self.aya_ordinal_index.get(value)
+        else:
+            row = self.aya_index.get(str(value))
+        return None if row is None else self.aya_data(row)
+
+    def sora_aya_rows(self, number):
+        """
+        Returns the range of aya rows of the Sora with ``number``, or None.
+        """
+        row = self.sora_index.get(_to_int(number))
+        if row is None:
+            return None
+        return range(self.sora_offsets[row], self.sora_offsets[row + 1])
+
+    def sora_ayas(self, number):
+        """
+        Returns the representations of the ayas of a Sora ordered by their number,
+        or None if there is no such Sora.
+        """
+        rows = self.sora_aya_rows(number)
+        return None if rows is None else [self.aya_data(row) for row in rows]
+
+    def sora_aya(self, number, aya_number):
+        """
+        Returns the representation of one aya of a Sora, or None.
+        """
+        rows = self.sora_aya_rows(number)
+        aya_number = _to_int(aya_number)
+        if rows is None or aya_number is None:
+            return None
+
+        row = rows.start + aya_number - 1
+        if row not in rows or self.aya_numbers[row] != aya_number:
+            return None
+        return self.aya_data(row)
+
+    def verse_range_rows(self, number, first, last):
+        """
+        Returns the range of rows of the ayas ``first`` to ``last`` of a Sora, or
+        None if any of them doesn't exist.
+        """
+        rows = self.sora_aya_rows(number)
+        if rows is None or first < 1 or last > len(rows) or first > last:
+            return None
+        return range(rows.start + first - 1, rows.start + last)
+
+    def page_lines_data(self, number):
+        """
+        Returns the ayas of a mushaf page grouped by the line they start on, as a
+        list of (line number, aya representations) pairs, or None if there is no
+        such page.
+        """
+        lines = self.page_lines.get(_to_int(number))
+        if lines is None:
+            return None
+
+        return [
+            (line, [self.aya_data(row) for row in range(start, stop)])
+            for line, start, stop in lines
+        ]
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+def read_corpus():
+    """
+    Loads a corpus from the artifact in ``QURAN_CORPUS_ARTIFACT`` if there is one,
+    or else from the database.
+    """
+    if settings.QURAN_CORPUS_ARTIFACT:
+        return Corpus.from_artifact(settings.QURAN_CORPUS_ARTIFACT)
+    with unbudgeted():
+        return Corpus.load()
+
+
+def get_corpus():
+    """
+    Returns the corpus of this process, loading it on first use.
+    """
+    global _corpus
+
+    if _corpus is None:
+        with _corpus_lock:
+            if _corpus is None:
+                _corpus = read_corpus()
+    return _corpus
+
+
+def corpus_loaded():
+    return _corpus is not None
+
+
+def reload_corpus():
+    """
+    Loads a fresh corpus, from the same source as ``get_corpus``, and swaps it in
+    atomically.
+    """
+    global _corpus
+
+    corpus = read_corpus()
+    with _corpus_lock:
+        _corpus = corpus
+    return corpus
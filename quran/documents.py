@@ -1,7 +1,7 @@
 from django_elasticsearch_dsl import Document, fields
 from django_elasticsearch_dsl.registries import registry
 
-from quran.models import Aya
+from quran.models import Aya, Juz, Sora
 
 
 @registry.register_document
@@ -55,3 +55,12 @@ class AyaDocument(Document):
             "id",
             "text",
         ]
+        queryset_pagination = 500
+        related_models = [Sora, Juz]
+
+    def get_queryset(self):
+        # Every document embeds its sora and juz
+        return super().get_queryset().select_related("sora", "juz")
+
+    def get_instances_from_related(self, related_instance):
+        return related_instance.ayas.all()
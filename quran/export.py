@@ -0,0 +1,109 @@
+"""
+Streams the whole corpus, or a part of it, as NDJSON or CSV.
+
+Rows are read with a chunked ``QuerySet.iterator()`` and written as they come, so
+the full result set is never held in memory.
+"""
+import csv
+import json
+
+from rest_framework import fields
+
+from quran.models import Aya
+
+# The columns of AyaSerializer, and the values to read for each of them.
+EXPORT_FIELDS = {
+    "id": "id",
+    "sora": "sora__number",
+    "juz": "juz__number",
+    "text": "text",
+    "clean_text": "clean_text",
+    "number": "number",
+    "page": "page",
+    "line_start": "line_start",
+    "line_end": "line_end",
+    "ordinal": "ordinal",
+    "verse_key": "verse_key",
+    "created": "created",
+    "updated": "updated",
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+CHUNK_SIZE = 500
+
+
+def export_queryset(sora=None, juz=None, page=None):
+    """
+    The ayas to export in mushaf order, optionally limited to a sora, juz or page.
+    """
+    filters = {"sora__number": sora, "juz__number": juz, "page": page}
+    return (
+        Aya.objects.filter(
+            **{lookup: value for lookup, value in filters.items() if value is not None}
+        )
+        .order_by("sora__number", "number")
+        .values_list(*EXPORT_FIELDS.values())
+    )
+
+
+def iter_rows(queryset):
+    to_datetime = fields.DateTimeField().to_representation
+
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row = dict(zip(EXPORT_FIELDS, row))
+        row["id"] = str(row["id"])
+        row["created"] = to_datetime(row["created"])
+        row["updated"] = to_datetime(row["updated"])
+        yield row
+
+
+def iter_ndjson(queryset):
+    """
+    One JSON object per aya, per line.
+    """
+    lines = []
+    for row in iter_rows(queryset):
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) == CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+class Echo:
+    """
+    A file-like object returning what's written to it, for ``csv.writer``.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset):
+    """
+    A header and one line per aya.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+
+    lines = []
+    for row in iter_rows(queryset):
+        lines.append(writer.writerow(row.values()))
+        if len(lines) == CHUNK_SIZE:
+            yield "".join(lines)
+            lines = []
+
+    if lines:
+        yield "".join(lines)
+
+
+def iter_export(export_format, queryset):
+    if export_format == "csv":
+        return iter_csv(queryset)
+    return iter_ndjson(queryset)
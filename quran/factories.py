@@ -7,14 +7,14 @@ from quran import models
 
 
 class JuzFactory(DjangoModelFactory):
-    number = random.randrange(1, 30 + 1)
+    number = factory.Sequence(lambda n: n % 30 + 1)
 
     class Meta:
         model = models.Juz
 
 
 class SoraFactory(DjangoModelFactory):
-    number = random.randrange(1, 114 + 1)
+    number = factory.Sequence(lambda n: n % 114 + 1)
 
     class Meta:
         model = models.Sora
@@ -24,10 +24,12 @@ class AyaFactory(DjangoModelFactory):
     juz = factory.SubFactory(JuzFactory)
     sora = factory.SubFactory(SoraFactory)
 
-    number = random.randrange(1, 286 + 1)
+    number = factory.Sequence(lambda n: n % 286 + 1)
     page = random.randrange(1, 604 + 1)
     line_start = random.randrange(1, 15 + 1)
     line_end = random.randrange(1, 15 + 1)
+    ordinal = factory.Sequence(lambda n: n % 6236 + 1)
+    verse_key = factory.LazyAttribute(lambda aya: f"{aya.sora.number}:{aya.number}")
 
     class Meta:
         model = models.Aya
@@ -0,0 +1,147 @@
+"""
+Buffered hit counting.
+
+Views record hits in ``hit_buffer``, which only adds them up in memory. Every
+``QURAN_HIT_FLUSH_INTERVAL`` seconds the totals are written to ``ViewCount`` in one
+bulk upsert per batch of objects, once a request is finished so no response waits
+for it, and a last time when the worker exits. Popular objects are written once per
+flush however many hits they get, instead of locking their row on every request.
+
+Hits are recorded by the views, so requests answered without running them aren't
+counted. Conditional requests run the view before they get their 304, and the views
+recording hits are kept out of the response cache.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.utils import timezone
+
+from quran.models import ViewCount
+
+logger = logging.getLogger(__name__)
+
+
+def upsert_hits(counts, batch_size):
+    """
+    Adds ``counts``, hits keyed by (model label, primary key), to the view counts in
+    one ``INSERT ... ON CONFLICT`` statement per batch of rows.
+    """
+    opts = ViewCount._meta
+    fields = [
+        opts.get_field(name)
+        for name in ("content_type", "object_id", "hits", "modified")
+    ]
+    table, content_type, object_id, hits, modified = (
+        connection.ops.quote_name(name)
+        for name in (opts.db_table, *(field.column for field in fields))
+    )
+    sql = (
+        f"INSERT INTO {table} ({content_type}, {object_id}, {hits}, {modified}) "
+        "VALUES {values} "
+        f"ON CONFLICT ({content_type}, {object_id}) DO UPDATE SET "
+        f"{hits} = {table}.{hits} + EXCLUDED.{hits}, {modified} = EXCLUDED.{modified}"
+    )
+
+    now = timezone.now()
+    rows = []
+    for (label, pk), count in counts.items():
+        content_type_id = ContentType.objects.get_for_model(apps.get_model(label)).pk
+        values = (content_type_id, pk, count, now)
+        rows.append(
+            [
+                field.get_db_prep_value(value, connection)
+                for field, value in zip(fields, values)
+            ]
+        )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            stop = start + batch_size
+            batch = rows[start:stop]
+            cursor.execute(
+                sql.format(values=", ".join(["(%s, %s, %s, %s)"] * len(batch))),
+                [value for row in batch for value in row],
+            )
+
+
+class HitBuffer:
+    """
+    The hits recorded by this process since they were last flushed.
+
+    ``stats`` counts the hits recorded, the flushes, the rows they wrote, the flushes
+    that failed and the time they took.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counts = Counter()
+        self._last_flush = time.monotonic()
+        self.stats = {
+            "hits": 0,
+            "flushes": 0,
+            "rows": 0,
+            "errors": 0,
+            "elapsed_ms": 0.0,
+        }
+
+    def __len__(self):
+        return len(self._counts)
+
+    def record(self, model, pk):
+        if not settings.QURAN_HIT_COUNTING_ENABLED:
+            return
+
+        with self._lock:
+            self._counts[model._meta.label, str(pk)] += 1
+            self.stats["hits"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counts = Counter()
+
+    def flush(self):
+        """
+        Writes the buffered hits to the database. They're put back in the buffer
+        when that fails, to be written with the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+                self._last_flush = time.monotonic()
+            if not counts:
+                return
+
+            start = time.perf_counter()
+            try:
+                upsert_hits(counts, settings.QURAN_HIT_BATCH_SIZE)
+            except Exception:
+                logger.exception("Couldn't flush %d hit counts.", len(counts))
+                with self._lock:
+                    self._counts.update(counts)
+                    self.stats["errors"] += 1
+                return
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.stats["flushes"] += 1
+                self.stats["rows"] += len(counts)
+                self.stats["elapsed_ms"] += elapsed_ms
+
+    def flush_if_due(self, **kwargs):
+        """
+        Flushes the buffer when the last flush is older than the flush interval.
+        Connected to ``request_finished`` by ``QuranConfig``.
+        """
+        interval = settings.QURAN_HIT_FLUSH_INTERVAL
+        if self._counts and time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+
+hit_buffer = HitBuffer()
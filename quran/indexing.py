@@ -0,0 +1,209 @@
+"""
+Keeps the search index in sync with the database in batches.
+
+The realtime signal processor of django_elasticsearch_dsl sends a request to
+Elasticsearch on every save, inside the transaction. ``BatchedSignalProcessor``
+only records which documents changed, and sends them all in one bulk request once
+the transaction commits. Documents are read back from the database when they're
+flushed, so a rolled back change is never indexed.
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+from django.db import models, transaction
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
+from django_elasticsearch_dsl.signals import BaseSignalProcessor
+from elasticsearch.helpers import bulk
+
+logger = logging.getLogger(__name__)
+
+
+class IndexBatch:
+    """
+    The documents changed in a transaction, flushed when it commits.
+    """
+
+    def __init__(self, processor, using):
+        self.processor = processor
+        self.using = using
+        # By document class: the primary keys of the saved and deleted instances,
+        # and the related instances whose documents embed them.
+        self.saved = defaultdict(set)
+        self.deleted = defaultdict(set)
+        self.related = defaultdict(list)
+        self.flushed = False
+
+    def __bool__(self):
+        return any((self.saved, self.deleted, self.related))
+
+    def __call__(self):
+        self.flushed = True
+        self.processor.flush(self)
+
+    def actions(self):
+        """
+        The bulk actions bringing the index up to date with the database.
+        """
+        for document_class in {*self.saved, *self.deleted, *self.related}:
+            document = document_class()
+
+            pks = self.saved[document_class] | self.deleted[document_class]
+            for instance in self.related[document_class]:
+                related = document.get_instances_from_related(instance)
+                if related is not None:
+                    pks.update(related.values_list("pk", flat=True))
+
+            instances = document.get_queryset().using(self.using).filter(pk__in=pks)
+            found = set()
+            for instance in instances:
+                found.add(instance.pk)
+                yield document._prepare_action(instance, "index")
+
+            for pk in pks - found:
+                yield {
+                    "_op_type": "delete",
+                    "_index": document._index._name,
+                    "_id": pk,
+                }
+
+
+class BatchedSignalProcessor(BaseSignalProcessor):
+    """
+    Indexes the instances saved or deleted in a transaction in one bulk request,
+    once it commits. Outside of transactions, every change is flushed right away.
+
+    ``stats`` counts the flushes, the documents they sent, the documents
+    Elasticsearch refused, the flushes that failed, and the time they took.
+    """
+
+    def setup(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {
+            "flushes": 0,
+            "documents": 0,
+            "failed": 0,
+            "errors": 0,
+            "elapsed_ms": 0.0,
+        }
+
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+        models.signals.m2m_changed.connect(self.handle_m2m_changed)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+        models.signals.m2m_changed.disconnect(self.handle_m2m_changed)
+
+    def get_batch(self, using):
+        """
+        The batch of the current transaction on ``using``, scheduled to be flushed
+        on commit.
+
+        Only the on_commit callback holds on to a batch, the processor keeps a weak
+        reference to it: a batch is done with once it's flushed, or once its
+        transaction rolls back and Django drops the callback along with the batch.
+        """
+        batches = self._local.__dict__.setdefault("batches", {})
+        reference = batches.get(using)
+        batch = reference() if reference is not None else None
+
+        if batch is None or batch.flushed:
+            batch = IndexBatch(self, using)
+            batches[using] = weakref.ref(batch)
+            transaction.on_commit(batch, using=using)
+        return batch
+
+    def record(self, instance, using, deleted=False):
+        if not DEDConfig.autosync_enabled():
+            return
+
+        model = instance.__class__
+        documents = [
+            document
+            for document in registry._models.get(model, ())
+            if not document.django.ignore_signals
+        ]
+        related = list(registry._get_related_doc(instance))
+        if not documents and not related:
+            return
+
+        batch = self.get_batch(using)
+        for document in documents:
+            (batch.deleted if deleted else batch.saved)[document].add(instance.pk)
+        for document in related:
+            batch.related[document].append(instance)
+
+        # Outside of a transaction on_commit already flushed the empty batch.
+        if not transaction.get_connection(using).in_atomic_block:
+            batch()
+
+    def handle_save(self, sender, instance, using=None, **kwargs):
+        self.record(instance, using)
+
+    def handle_delete(self, sender, instance, using=None, **kwargs):
+        self.record(instance, using, deleted=True)
+
+    def handle_pre_delete(self, sender, instance, **kwargs):
+        # Deletions are handled once the transaction commits.
+        pass
+
+    def flush(self, batch):
+        """
+        Sends the changes in ``batch`` to Elasticsearch in one bulk request.
+
+        A failure is logged, not raised: the transaction is already committed. So are
+        the documents Elasticsearch refused, but for deletions of documents it
+        doesn't have.
+        """
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            actions = list(batch.actions())
+            errors = []
+            if actions:
+                _, errors = bulk(
+                    self.connections.get_connection(), actions, raise_on_error=False
+                )
+        except Exception:
+            logger.exception("Couldn't flush the search index batch.")
+            with self._lock:
+                self.stats["errors"] += 1
+            return
+        finally:
+            batch.saved.clear()
+            batch.deleted.clear()
+            batch.related.clear()
+
+        failed = 0
+        for error in errors:
+            (op_type, item), *_ = error.items()
+            if op_type == "delete" and item.get("status") == 404:
+                continue
+            failed += 1
+            logger.warning(
+                "Couldn't %s search document %s: %s",
+                op_type,
+                item.get("_id"),
+                item.get("error", item.get("status")),
+            )
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.stats["flushes"] += 1
+            self.stats["documents"] += len(actions)
+            self.stats["failed"] += failed
+            self.stats["elapsed_ms"] += elapsed_ms
+        logger.info(
+            "Flushed %d search documents in %.1f ms, %d failed.",
+            len(actions),
+            elapsed_ms,
+            failed,
+        )
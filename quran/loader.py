@@ -0,0 +1,172 @@
+"""
+Loads the corpus from the preflight data in a handful of bulk queries.
+
+The model classes are passed in rather than imported, and the values of the fields
+they lack are ignored. Loading is
+idempotent: rows are matched on their natural keys, missing ones are created and
+outdated ones updated in place, so their ids are kept.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+# Āl-‘Imrān renders poorly in browsers as it's spelled in hafsData_v18.
+SORA_NAME_AR_FIXES = {3: "آلِ عِمۡرَانَ"}
+
+
+def preflight_path(name):
+    return settings.BASE_DIR / "preflight" / name
+
+
+def read_preflight():
+    """
+    Reads the preflight files into the juz, sora and aya rows keyed by their
+    natural keys.
+    """
+    with open(preflight_path("hafsData_v18.json"), encoding="utf-8") as data_file:
+        data = json.load(data_file)
+    with open(
+        preflight_path("hafsData_clean_arabic_sura_v18.json"), encoding="utf-8"
+    ) as surahs_mapping_file:
+        surahs_mapping = json.load(surahs_mapping_file)
+    with open(preflight_path("juz_number.json"), encoding="utf-8") as juzs_file:
+        juz_names = json.load(juzs_file)
+
+    juzs, soras, ayas = {}, {}, {}
+    for aya in data:
+        if aya["jozz"] not in juzs:
+            juz_name = juz_names.get(str(aya["jozz"]), {})
+            juzs[aya["jozz"]] = {
+                "number": aya["jozz"],
+                "number_worded_ar": juz_name.get("ar"),
+                "number_worded_en": juz_name.get("en"),
+            }
+        if aya["sora"] not in soras:
+            soras[aya["sora"]] = {
+                "number": aya["sora"],
+                "name_en": aya["sora_name_en"],
+                "name_ar": SORA_NAME_AR_FIXES.get(aya["sora"], aya["sora_name_ar"]),
+                "clean_name_ar": surahs_mapping[aya["sora_name_ar"]],
+            }
+        ayas[aya["sora"], aya["aya_no"]] = {
+            "sora_id": aya["sora"],
+            "juz_id": aya["jozz"],
+            "text": aya["aya_text"],
+            "clean_text": aya["aya_text_emlaey"],
+            "number": aya["aya_no"],
+            "page": aya["page"],
+            "line_start": aya["line_start"],
+            "line_end": aya["line_end"],
+            "ordinal": aya["id"],
+            "verse_key": f"{aya['sora']}:{aya['aya_no']}",
+        }
+
+    return juzs, soras, ayas
+
+
+@dataclass
+class LoadReport:
+    created: dict = field(default_factory=dict)
+    updated: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+
+    @property
+    def total_ms(self):
+        return sum(self.timings.values())
+
+
+def sync_rows(model, rows, key, batch_size=BATCH_SIZE):
+    """
+    Creates the missing rows of a model and updates the outdated ones.
+
+    ``rows`` maps the natural keys to field values, and ``key`` gets the natural key
+    of an existing instance. Values for fields the model doesn't have are ignored.
+    Returns the instances by natural key, and the number of created and updated rows.
+    """
+    names = {model_field.attname for model_field in model._meta.concrete_fields}
+    rows = {
+        natural_key: {name: value for name, value in row.items() if name in names}
+        for natural_key, row in rows.items()
+    }
+
+    instances = {key(instance): instance for instance in model.objects.all()}
+
+    now = timezone.now()
+    fields = set()
+    outdated = []
+    for natural_key, row in rows.items():
+        instance = instances.get(natural_key)
+        if instance is None:
+            continue
+
+        changed = {
+            name for name, value in row.items() if getattr(instance, name) != value
+        }
+        if changed:
+            for name in changed:
+                setattr(instance, name, row[name])
+            instance.updated = now
+            fields |= changed
+            outdated.append(instance)
+
+    if outdated:
+        model.objects.bulk_update(
+            outdated, sorted(fields | {"updated"}), batch_size=batch_size
+        )
+
+    missing = [
+        model(**row)
+        for natural_key, row in rows.items()
+        if natural_key not in instances
+    ]
+    model.objects.bulk_create(missing, batch_size=batch_size)
+    for instance in missing:
+        instances[key(instance)] = instance
+
+    return instances, len(missing), len(outdated)
+
+
+def load_corpus(juz_model, sora_model, aya_model, batch_size=BATCH_SIZE):
+    """
+    Loads the preflight data into the given models in one transaction.
+    """
+    report = LoadReport()
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        report.timings[stage] = (time.perf_counter() - start) * 1000
+        return result
+
+    juzs, soras, ayas = timed("read", read_preflight)
+
+    with transaction.atomic():
+        juz_instances, report.created["juzs"], report.updated["juzs"] = timed(
+            "juzs", sync_rows, juz_model, juzs, lambda juz: juz.number, batch_size
+        )
+        sora_instances, report.created["soras"], report.updated["soras"] = timed(
+            "soras", sync_rows, sora_model, soras, lambda sora: sora.number, batch_size
+        )
+
+        # The ayas reference their juz and sora by number up to here.
+        for row in ayas.values():
+            row["juz_id"] = juz_instances[row["juz_id"]].pk
+            row["sora_id"] = sora_instances[row["sora_id"]].pk
+
+        sora_numbers = {sora.pk: number for number, sora in sora_instances.items()}
+        _, report.created["ayas"], report.updated["ayas"] = timed(
+            "ayas",
+            sync_rows,
+            aya_model,
+            ayas,
+            lambda aya: (sora_numbers[aya.sora_id], aya.number),
+            batch_size,
+        )
+
+    return report
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+from django.utils.module_loading import autodiscover_modules
+
+from api.benchmark import scenarios
+
+
+class Command(BaseCommand):
+    help = "Runs the benchmark scenarios declared in the apps' benchmarks modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenarios", nargs="*", help="Scenarios to run.")
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of measured requests per case.",
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="List the available scenarios."
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules("benchmarks")
+
+        if options["list"]:
+            for name in sorted(scenarios):
+                self.stdout.write(name)
+            return
+
+        names = options["scenarios"] or sorted(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        # Lets the test client through ALLOWED_HOSTS and keeps DEBUG off, so the
+        # numbers aren't skewed by debug-only bookkeeping.
+        setup_test_environment(debug=False)
+        # Nor do the measured requests count hits in ViewCount.
+        override_settings(QURAN_HIT_COUNTING_ENABLED=False).enable()
+
+        header = (
+            f"{'case':<48}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}"
+        )
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(header)
+
+            for result in scenarios[name](options["requests"]):
+                self.stdout.write(
+                    f"{result.label:<48}{result.mean_ms:>10.3f}{result.p50_ms:>10.3f}"
+                    f"{result.p99_ms:>10.3f}{result.queries:>10.1f}"
+                )
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quran.corpus import Corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles the corpus loaded in the database into the artifact the workers "
+        "map on start, see quran.artifact."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.QURAN_CORPUS_ARTIFACT,
+            help="Path of the artifact, QURAN_CORPUS_ARTIFACT by default.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["output"]:
+            raise CommandError("Set QURAN_CORPUS_ARTIFACT or pass --output.")
+
+        start = time.perf_counter()
+        corpus = Corpus.load()
+        corpus.write_artifact(options["output"])
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compiled corpus {corpus.version[:12]} to {options['output']} "
+                f"in {elapsed:.1f} ms"
+            )
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from quran.export import EXPORT_FORMATS, export_queryset, iter_export
+
+
+class Command(BaseCommand):
+    help = "Exports the ayas, optionally filtered by sora, juz or page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(EXPORT_FORMATS), default="ndjson"
+        )
+        parser.add_argument("--sora", type=int)
+        parser.add_argument("--juz", type=int)
+        parser.add_argument("--page", type=int)
+        parser.add_argument(
+            "--output", help="File to write to, the standard output by default."
+        )
+
+    def handle(self, *args, **options):
+        queryset = export_queryset(
+            sora=options["sora"], juz=options["juz"], page=options["page"]
+        )
+
+        chunks = iter_export(options["format"], queryset)
+
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from quran.loader import BATCH_SIZE, load_corpus
+from quran.models import Aya, Juz, Sora
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the juzs, soras and ayas from the preflight data. Existing rows are "
+        "updated in place, so it's safe to run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of rows per bulk query.",
+        )
+
+    def handle(self, *args, **options):
+        report = load_corpus(Juz, Sora, Aya, batch_size=options["batch_size"])
+
+        for name in ("juzs", "soras", "ayas"):
+            self.stdout.write(
+                f"{name:<8}{report.created[name]:>6} created{report.updated[name]:>6} "
+                f"updated{report.timings[name]:>10.1f} ms"
+            )
+        self.stdout.write(f"{'read':<36}{report.timings['read']:>10.1f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(f"{'total':<36}{report.total_ms:>10.1f} ms")
+        )
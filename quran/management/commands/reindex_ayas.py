@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quran.reindex import (
+    CHUNK_SIZE,
+    THREAD_COUNT,
+    ReindexError,
+    get_alias,
+    reindex,
+    rollback,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds a new aya search index and swaps the alias to it without downtime, "
+        "or points the alias back at the previous index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Number of ayas per bulk request.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=THREAD_COUNT,
+            help="Number of concurrent bulk requests.",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=2,
+            help="Number of previous indexes to keep for rollback.",
+        )
+        parser.add_argument(
+            "--rollback",
+            action="store_true",
+            help="Point the alias back at the previous index.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["rollback"]:
+                index = rollback()
+                self.stdout.write(
+                    self.style.SUCCESS(f"{get_alias()} points at {index} again.")
+                )
+                return
+
+            report = reindex(
+                chunk_size=options["chunk_size"],
+                thread_count=options["threads"],
+                keep=options["keep"],
+            )
+        except ReindexError as error:
+            raise CommandError(error)
+
+        self.stdout.write(f"Indexed {report.indexed} ayas into {report.index}")
+        for stage, elapsed in report.timings.items():
+            self.stdout.write(f"{stage:<12}{elapsed:>10.1f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{get_alias()} points at {report.index}, previously at "
+                f"{', '.join(report.previous) or 'no index'}."
+            )
+        )
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    set_response_etag,
+)
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date
+
+from quran.cache import CachedResponse, cache_key, make_etag, response_cache
+from quran.corpus import get_corpus
+
+
+class ConditionalGetMiddleware(MiddlewareMixin):
+    """
+    Answers conditional requests to the quran read endpoints from the corpus.
+
+    The ETag of a response is derived from the corpus content hash and the request,
+    and Last-Modified is the latest update of the corpus, so a successful response
+    matching ``If-None-Match`` or ``If-Modified-Since`` is turned into a 304 without
+    being rendered again by the server cache, or sent. Only successful responses are,
+    so invalid lookups and parameters still get their error. Successful responses get
+    the ``Cache-Control`` configured for their URL name in ``QURAN_CACHE_CONTROL``,
+    the endpoints mapped to None are left alone.
+
+    With ``QURAN_CORPUS_ENABLED`` turned off there is no corpus to derive them from
+    before the view runs: the ETag is then the hash of the rendered content, with no
+    Last-Modified, so a 304 only saves sending the response, not building it.
+    """
+
+    def process_response(self, request, response):
+        cache_control = getattr(request, "cache_control", None)
+        if cache_control is None or response.status_code not in (200, 304):
+            return response
+
+        last_modified = request.conditional_last_modified
+        if not response.has_header("ETag"):
+            if request.conditional_etag is not None:
+                response["ETag"] = request.conditional_etag
+            elif not response.streaming:
+                set_response_etag(response)
+        if last_modified is not None and not response.has_header("Last-Modified"):
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, **cache_control)
+        # The renderer, so the ETag, depends on it.
+        patch_vary_headers(response, ("Accept",))
+
+        if response.status_code != 200:
+            return response
+        return get_conditional_response(
+            request,
+            etag=response.get("ETag"),
+            last_modified=last_modified,
+            response=response,
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if request.method not in ("GET", "HEAD") or match.namespace != "quran":
+            return None
+
+        policies = settings.QURAN_CACHE_CONTROL
+        cache_control = policies.get(match.url_name, policies["default"])
+        if cache_control is None:
+            return None
+
+        request.cache_control = cache_control
+        if not settings.QURAN_CORPUS_ENABLED:
+            request.conditional_etag = None
+            request.conditional_last_modified = None
+            return None
+
+        corpus = get_corpus()
+        request.conditional_etag = make_etag(corpus.version, cache_key(request))
+        # An empty corpus was never modified.
+        request.conditional_last_modified = (
+            None
+            if corpus.last_modified is None
+            else int(corpus.last_modified.timestamp())
+        )
+        return None
+
+
+class ResponseCacheMiddleware(MiddlewareMixin):
+    """
+    Serves the views named in ``QURAN_RESPONSE_CACHE_URL_NAMES`` from the response
+    cache, rendering each of their responses once per corpus version.
+    """
+
+    def process_response(self, request, response):
+        key = getattr(request, "response_cache_key", None)
+        if key is None:
+            return response
+
+        # Only JSON and MessagePack are stored: the browsable API embeds per-request
+        # tokens.
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and response["Content-Type"].startswith(
+                ("application/json", "application/msgpack")
+            )
+        ):
+            version = request.response_cache_version
+            entry = CachedResponse.from_response(response, make_etag(version, key))
+            response_cache.set(version, key, entry)
+            response["ETag"] = entry.etag
+
+        response["X-Cache"] = "MISS"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.QURAN_RESPONSE_CACHE_ENABLED or request.method not in (
+            "GET",
+            "HEAD",
+        ):
+            return None
+
+        match = request.resolver_match
+        if (
+            match.namespace != "quran"
+            or match.url_name not in settings.QURAN_RESPONSE_CACHE_URL_NAMES
+        ):
+            return None
+
+        version = get_corpus().version
+        key = cache_key(request)
+
+        entry = response_cache.get(version, key)
+        if entry is None:
+            request.response_cache_key = key
+            request.response_cache_version = version
+            return None
+
+        response = entry.to_response(request)
+        response["X-Cache"] = "HIT"
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
@@ -4,8 +4,10 @@ Initializes the database from hafsData_v18
 
 import json
 
-from django.db import migrations
 from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 1000
 
 
 def copy_ayas(apps, schema_editor):
@@ -14,40 +16,53 @@ def copy_ayas(apps, schema_editor):
 
     We can't import the models directly as they may be a newer
     version than this migration expects. We use the historical version.
+
+    The juzs, soras and ayas are created in bulk, in the order of the file. This is
+    a frozen copy of the loader as it was then: later fixes of the data are applied
+    by their own migrations.
     """
     Aya = apps.get_model("quran", "Aya")
     Sora = apps.get_model("quran", "Sora")
     Juz = apps.get_model("quran", "Juz")
 
-    data_file = open(settings.BASE_DIR / "preflight" / "hafsData_v18.json")
-    surahs_mapping_file = open(
-        settings.BASE_DIR / "preflight" / "hafsData_clean_arabic_sura_v18.json"
-    )
-
-    ayas = json.load(data_file)
-    surahs_mapping = json.load(surahs_mapping_file)
+    preflight = settings.BASE_DIR / "preflight"
+    with open(preflight / "hafsData_v18.json", encoding="utf-8") as data_file:
+        ayas = json.load(data_file)
+    with open(
+        preflight / "hafsData_clean_arabic_sura_v18.json", encoding="utf-8"
+    ) as surahs_mapping_file:
+        surahs_mapping = json.load(surahs_mapping_file)
 
+    juzs, soras = {}, {}
     for aya in ayas:
-        juz, _ = Juz.objects.get_or_create(number=aya["jozz"])
-        sora, _ = Sora.objects.get_or_create(
-            number=aya["sora"],
-            defaults={
-                "name_en": aya["sora_name_en"],
-                "name_ar": aya["sora_name_ar"],
-                "clean_name_ar": surahs_mapping[aya["sora_name_ar"]],
-            },
-        )
+        if aya["jozz"] not in juzs:
+            juzs[aya["jozz"]] = Juz(number=aya["jozz"])
+        if aya["sora"] not in soras:
+            soras[aya["sora"]] = Sora(
+                number=aya["sora"],
+                name_en=aya["sora_name_en"],
+                name_ar=aya["sora_name_ar"],
+                clean_name_ar=surahs_mapping[aya["sora_name_ar"]],
+            )
 
-        Aya.objects.create(
-            sora=sora,
-            juz=juz,
-            text=aya["aya_text"],
-            clean_text=aya["aya_text_emlaey"],
-            number=aya["aya_no"],
-            page=aya["page"],
-            line_start=aya["line_start"],
-            line_end=aya["line_end"],
-        )
+    Juz.objects.bulk_create(juzs.values(), batch_size=BATCH_SIZE)
+    Sora.objects.bulk_create(soras.values(), batch_size=BATCH_SIZE)
+    Aya.objects.bulk_create(
+        (
+            Aya(
+                sora=soras[aya["sora"]],
+                juz=juzs[aya["jozz"]],
+                text=aya["aya_text"],
+                clean_text=aya["aya_text_emlaey"],
+                number=aya["aya_no"],
+                page=aya["page"],
+                line_start=aya["line_start"],
+                line_end=aya["line_end"],
+            )
+            for aya in ayas
+        ),
+        batch_size=BATCH_SIZE,
+    )
 
 
 class Migration(migrations.Migration):
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:35
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quran', '0006_auto_juz_number_mapping'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aya',
+            name='page',
+            field=models.PositiveSmallIntegerField(db_index=True, editable=False, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(604)], verbose_name='The page number this verse is in. The maximum is 604.'),
+        ),
+    ]
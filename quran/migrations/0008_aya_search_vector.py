@@ -0,0 +1,42 @@
+"""
+Adds the full-text search column of the ayas on PostgreSQL, see
+search.views.AyaDatabaseSearchView. Other databases are left alone.
+"""
+
+from django.db import migrations
+
+
+def add_search_vector(apps, schema_editor):
+    """
+    A tsvector of the clean text generated by PostgreSQL itself, so it never goes
+    stale, and its GIN index.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE quran_aya ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', clean_text)) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX quran_aya_search_vector_idx ON quran_aya "
+        "USING GIN (search_vector)"
+    )
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("ALTER TABLE quran_aya DROP COLUMN search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quran", "0007_alter_aya_page"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
@@ -0,0 +1,62 @@
+"""
+Adds the global ordinal and the verse key of the ayas, filled from their position in
+the mushaf before they're made unique.
+"""
+
+from django.db import migrations, models
+
+import django.core.validators
+
+
+def fill_ordinals(apps, schema_editor):
+    Aya = apps.get_model("quran", "Aya")
+
+    ayas = list(Aya.objects.select_related("sora").order_by("sora__number", "number"))
+    for ordinal, aya in enumerate(ayas, 1):
+        aya.ordinal = ordinal
+        aya.verse_key = f"{aya.sora.number}:{aya.number}"
+    Aya.objects.bulk_update(ayas, ["ordinal", "verse_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quran", "0009_viewcount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aya",
+            name="ordinal",
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="aya",
+            name="verse_key",
+            field=models.CharField(editable=False, max_length=7, null=True),
+        ),
+        migrations.RunPython(fill_ordinals, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="aya",
+            name="ordinal",
+            field=models.PositiveSmallIntegerField(
+                editable=False,
+                unique=True,
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(6236),
+                ],
+                verbose_name="The number of the verse in the whole Quran, in the mushaf order. The maximum is 6236.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="aya",
+            name="verse_key",
+            field=models.CharField(
+                editable=False,
+                max_length=7,
+                unique=True,
+                verbose_name="The chapter and verse numbers of the verse, e.g. 2:255.",
+            ),
+        ),
+    ]
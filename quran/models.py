@@ -1,6 +1,7 @@
 """
 Models that represents The Holy Qur'an.
 """
+from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils.translation import gettext as _
@@ -104,6 +105,7 @@ class Aya(BaseModel):
     )
     page = models.PositiveSmallIntegerField(
         editable=False,
+        db_index=True,
         validators=[MinValueValidator(1), MaxValueValidator(604)],
         verbose_name=_("The page number this verse is in. The maximum is 604."),
     )
@@ -117,6 +119,45 @@ class Aya(BaseModel):
         validators=[MinValueValidator(1), MaxValueValidator(15)],
         verbose_name=_("End line of the verse. The maximum is 15."),
     )
+    ordinal = models.PositiveSmallIntegerField(
+        unique=True,
+        editable=False,
+        validators=[MinValueValidator(1), MaxValueValidator(6236)],
+        verbose_name=_(
+            "The number of the verse in the whole Quran, in the mushaf order. The "
+            "maximum is 6236."
+        ),
+    )
+    verse_key = models.CharField(
+        max_length=7,
+        unique=True,
+        editable=False,
+        verbose_name=_("The chapter and verse numbers of the verse, e.g. 2:255."),
+    )
 
     class Meta:
         unique_together = ["sora", "number"]
+
+
+class ViewCount(models.Model):
+    """
+    How many times an object was viewed, counted by ``quran.hits``. The hit counts of
+    django-hitcount can't reference the UUID primary keys of ``BaseModel``.
+    """
+
+    content_type = models.ForeignKey(
+        ContentType, related_name="+", on_delete=models.CASCADE
+    )
+    object_id = models.UUIDField()
+    hits = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"], name="quran_viewcount_object"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["content_type", "-hits"], name="quran_viewcount_top")
+        ]
@@ -5,3 +5,13 @@ class NumberCursorPagination(pagination.CursorPagination):
     ordering = "number"
     page_size_query_param = "page_size"
     max_page_size = 200
+
+
+class OrdinalCursorPagination(NumberCursorPagination):
+    """
+    Pages through the ayas in mushaf order. Aya numbers repeat in every sora, the
+    ordinals are unique, so a cursor is just the ordinal of the last aya of a page
+    and the next one is a seek on its unique index, as cheap as the first one.
+    """
+
+    ordering = "ordinal"
@@ -0,0 +1,199 @@
+"""
+Rebuilds the aya search index without taking search down.
+
+``AyaDocument`` reads and writes through the ``quran-aya`` alias. A reindex builds a
+new index, loads it with ``parallel_bulk`` while refreshing is off, force-merges it
+and then points the alias at it in one atomic ``update_aliases`` call. Indexes are
+named after the alias, a timestamp to the microsecond and a random suffix, so their
+names sort in the order they were built and never collide. The previous indexes are
+kept, so the alias can be pointed back at one of them.
+"""
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from django.utils import timezone
+from elasticsearch.helpers import parallel_bulk
+
+from quran.documents import AyaDocument
+
+CHUNK_SIZE = 500
+THREAD_COUNT = 4
+
+# Restored once the load is over.
+REFRESH_INTERVAL = "1s"
+
+
+class ReindexError(Exception):
+    pass
+
+
+@dataclass
+class ReindexReport:
+    index: str
+    previous: list
+    indexed: int = 0
+    timings: dict = field(default_factory=dict)
+
+
+def get_client():
+    return AyaDocument._get_connection()
+
+
+def get_alias():
+    return AyaDocument._index._name
+
+
+def versioned_indexes(client, alias):
+    """
+    The indexes built by previous reindexes, oldest first.
+    """
+    indexes = client.indices.get(index=f"{alias}-*", ignore_unavailable=True)
+    return sorted(indexes)
+
+
+def aliased_indexes(client, alias):
+    """
+    The indexes the alias currently points at.
+    """
+    if not client.indices.exists_alias(name=alias):
+        return []
+    return sorted(client.indices.get_alias(name=alias))
+
+
+def index_name(alias):
+    """
+    A new index name for ``alias``, sorting after the ones built before it.
+    """
+    return f"{alias}-{timezone.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+
+def create_index(name):
+    """
+    Creates an index with the mappings and settings of ``AyaDocument``, refreshing
+    disabled for the bulk load.
+    """
+    index = AyaDocument._index.clone(name=name)
+    index.settings(refresh_interval="-1")
+    index.create()
+    return index
+
+
+def iter_actions(index_name, chunk_size=CHUNK_SIZE):
+    """
+    The bulk actions indexing every aya into ``index_name``.
+    """
+    document = AyaDocument()
+    ayas = document.get_queryset().iterator(chunk_size=chunk_size)
+    for action in document._get_actions(ayas, "index"):
+        action["_index"] = index_name
+        yield action
+
+
+def swap_alias(client, alias, index_name):
+    """
+    Points ``alias`` at ``index_name`` alone, in one atomic operation.
+
+    A concrete index named like the alias, left by ``search_index --create``, is
+    deleted in the same operation as it can't coexist with the alias.
+    """
+    actions = [
+        {"remove": {"index": name, "alias": alias}}
+        for name in aliased_indexes(client, alias)
+    ]
+    if client.indices.exists(index=alias) and not client.indices.exists_alias(
+        name=alias
+    ):
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": index_name, "alias": alias}})
+
+    client.indices.update_aliases(body={"actions": actions})
+
+
+def load_index(client, name, report, chunk_size, thread_count):
+    """
+    Indexes every aya into ``name`` with concurrent bulk requests.
+    """
+    for ok, item in parallel_bulk(
+        client,
+        iter_actions(name, chunk_size),
+        thread_count=thread_count,
+        chunk_size=chunk_size,
+        raise_on_error=False,
+    ):
+        if not ok:
+            raise ReindexError(f"Couldn't index {item}.")
+        report.indexed += 1
+
+
+def finish_index(client, name):
+    """
+    Turns refreshing back on and merges the segments left by the bulk load.
+    """
+    client.indices.put_settings(
+        index=name, body={"index": {"refresh_interval": REFRESH_INTERVAL}}
+    )
+    client.indices.refresh(index=name)
+    client.indices.forcemerge(index=name, max_num_segments=1)
+
+
+def reindex(chunk_size=CHUNK_SIZE, thread_count=THREAD_COUNT, keep=2):
+    """
+    Builds a new index of the ayas and swaps the alias to it.
+
+    Of the previous indexes, the ``keep`` most recent ones are kept for rollback and
+    older ones deleted.
+    """
+    client = get_client()
+    alias = get_alias()
+    name = index_name(alias)
+    report = ReindexReport(index=name, previous=aliased_indexes(client, alias))
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        report.timings[stage] = (time.perf_counter() - start) * 1000
+        return result
+
+    timed("create", create_index, name)
+    try:
+        timed("load", load_index, client, name, report, chunk_size, thread_count)
+        timed("forcemerge", finish_index, client, name)
+
+        expected = AyaDocument().get_queryset().count()
+        if report.indexed != expected:
+            raise ReindexError(f"Indexed {report.indexed} ayas out of {expected}.")
+
+        timed("swap", swap_alias, client, alias, name)
+    except Exception:
+        # The alias still points at the previous index, drop the partial one
+        client.indices.delete(index=name, ignore=[404])
+        raise
+
+    previous = [index for index in versioned_indexes(client, alias) if index != name]
+    stale = previous[:-keep] if keep else previous
+    for index in stale:
+        client.indices.delete(index=index)
+
+    return report
+
+
+def rollback():
+    """
+    Points the alias back at the index built before the current one, and returns
+    its name.
+    """
+    client = get_client()
+    alias = get_alias()
+
+    current = aliased_indexes(client, alias)
+    previous = [
+        index
+        for index in versioned_indexes(client, alias)
+        if current and index < current[0]
+    ]
+    if not previous:
+        raise ReindexError(f"There's no index to roll {alias} back to.")
+
+    swap_alias(client, alias, previous[-1])
+    return previous[-1]
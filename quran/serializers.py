@@ -1,9 +1,114 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import DateTimeField, UUIDField
 from rest_framework import serializers
 
 from quran import models
 
 
-class JuzSerializer(serializers.HyperlinkedModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Renders only the ``fields`` given to the serializer, when they're given, and
+    maps them to the columns to fetch, see ``quran.views.SparseFieldsetMixin``.
+    Read-only lists are rendered faster by ``values_data``.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def sparse_fields(cls, query_params):
+        """
+        The fields asked for with ?fields=a,b less the ones left out with ?omit=c,d,
+        in the order of ``Meta.fields``, or None when neither is given.
+        """
+        names = cls.Meta.fields
+        asked, omitted = (
+            [name for name in query_params.get(param, "").split(",") if name]
+            for param in ("fields", "omit")
+        )
+
+        unknown = [name for name in asked + omitted if name not in names]
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"Unknown fields {', '.join(unknown)}."}
+            )
+
+        if "fields" not in query_params and "omit" not in query_params:
+            return None
+        return [
+            name
+            for name in names
+            if (not asked or name in asked) and name not in omitted
+        ]
+
+    @classmethod
+    def field_source(cls, name):
+        """
+        The lookup a field is read from, the relation it follows or None, and its
+        model field, None for the annotations of the views, e.g. ayas_count.
+        """
+        field = cls._declared_fields.get(name)
+        if isinstance(field, serializers.SlugRelatedField):
+            return f"{name}__{field.slug_field}", name, None
+
+        try:
+            return name, None, cls.Meta.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return name, None, None
+
+    @classmethod
+    def prune_queryset(cls, queryset, fields, *extra):
+        """
+        Fetches only the columns ``fields`` are rendered from, the primary key and
+        the ``extra`` ones, and joins only the related rows they need.
+        """
+        columns, related = {queryset.model._meta.pk.name, *extra}, []
+        for name in fields:
+            lookup, relation, model_field = cls.field_source(name)
+            if relation is not None:
+                related.append(relation)
+                columns.update((relation, lookup))
+            elif model_field is not None:
+                columns.add(name)
+
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    @classmethod
+    def values_data(cls, queryset, fields=None):
+        """
+        The representations of the rows of ``queryset``, the same ones as with
+        ``many=True``, built from ``values_list()`` rows instead of model instances
+        going through the serializer fields.
+        """
+        fields = fields or cls.Meta.fields
+        to_datetime = serializers.DateTimeField().to_representation
+
+        lookups, converters = [], []
+        for index, name in enumerate(fields):
+            lookup, _, model_field = cls.field_source(name)
+            lookups.append(lookup)
+            if isinstance(model_field, DateTimeField):
+                converters.append((index, to_datetime))
+            elif isinstance(model_field, UUIDField):
+                converters.append((index, str))
+
+        data = []
+        for row in queryset.values_list(*lookups):
+            row = list(row)
+            for index, convert in converters:
+                if row[index] is not None:
+                    row[index] = convert(row[index])
+            data.append(dict(zip(fields, row)))
+        return data
+
+
+class JuzSerializer(SparseFieldsetMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = models.Juz
         fields = [
@@ -16,11 +121,9 @@ class JuzSerializer(serializers.HyperlinkedModelSerializer):
         ]
 
 
-class SoraSerializer(serializers.HyperlinkedModelSerializer):
-    ayas_count = serializers.SerializerMethodField()
-
-    def get_ayas_count(self, obj):
-        return obj.ayas.count()
+class SoraSerializer(SparseFieldsetMixin, serializers.HyperlinkedModelSerializer):
+    # Annotated on the queryset by the view, see SoraViewSet.
+    ayas_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.Sora
@@ -36,7 +139,7 @@ class SoraSerializer(serializers.HyperlinkedModelSerializer):
         ]
 
 
-class AyaSerializer(serializers.HyperlinkedModelSerializer):
+class AyaSerializer(SparseFieldsetMixin, serializers.HyperlinkedModelSerializer):
     sora = serializers.SlugRelatedField(read_only=True, slug_field="number")
     juz = serializers.SlugRelatedField(read_only=True, slug_field="number")
 
@@ -52,6 +155,26 @@ class AyaSerializer(serializers.HyperlinkedModelSerializer):
             "page",
             "line_start",
             "line_end",
+            "ordinal",
+            "verse_key",
             "created",
             "updated",
         ]
+
+
+class ExportFiltersSerializer(serializers.Serializer):
+    sora = serializers.IntegerField(required=False, min_value=1, max_value=114)
+    juz = serializers.IntegerField(required=False, min_value=1, max_value=30)
+    page = serializers.IntegerField(required=False, min_value=1, max_value=604)
+
+
+class WordFrequenciesSerializer(serializers.Serializer):
+    size = serializers.IntegerField(
+        required=False, min_value=1, max_value=1000, default=100
+    )
+
+
+class MostViewedSerializer(serializers.Serializer):
+    size = serializers.IntegerField(
+        required=False, min_value=1, max_value=100, default=10
+    )
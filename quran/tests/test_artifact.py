@@ -0,0 +1,101 @@
+import io
+import os
+import struct
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from quran import corpus as corpus_module
+from quran.artifact import HEADER, ArtifactError
+from quran.corpus import Corpus, get_corpus, reload_corpus
+
+
+class TestArtifact(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "corpus.bin")
+
+        self.corpus = Corpus.load()
+        self.corpus.write_artifact(self.path)
+
+    def test_same_corpus(self):
+        with self.assertNumQueries(0):
+            mapped = Corpus.from_artifact(self.path)
+
+        self.assertEqual(self.corpus.version, mapped.version)
+        self.assertEqual(self.corpus.last_modified, mapped.last_modified)
+
+        for name in Corpus.columns:
+            self.assertEqual(
+                list(getattr(self.corpus, name)), list(getattr(mapped, name))
+            )
+
+        self.assertEqual(list(self.corpus.juzs), list(mapped.juzs))
+        self.assertEqual(list(self.corpus.soras), list(mapped.soras))
+        self.assertEqual(list(self.corpus.ayas), list(mapped.ayas))
+        self.assertEqual(self.corpus.page_lines, mapped.page_lines)
+
+    def test_nulls(self):
+        self.corpus.juz_worded_en = [None] + self.corpus.juz_worded_en[1:]
+        self.corpus.write_artifact(self.path)
+
+        mapped = Corpus.from_artifact(self.path)
+        self.assertIsNone(mapped.juz(1)["number_worded_en"])
+        self.assertEqual("Second", mapped.juz(2)["number_worded_en"])
+
+    @override_settings(QURAN_RESPONSE_CACHE_ENABLED=False)
+    def test_serves_the_api(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+        expected = self.client.get(url).content
+
+        with mock.patch.object(corpus_module, "_corpus", None), override_settings(
+            QURAN_CORPUS_ARTIFACT=self.path
+        ):
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertIsNotNone(get_corpus().artifact)
+
+        self.assertEqual(expected, response.content)
+
+    def test_reload(self):
+        self.corpus.juz_worded_en = ["Artifact"] + self.corpus.juz_worded_en[1:]
+        self.corpus.write_artifact(self.path)
+
+        with mock.patch.object(corpus_module, "_corpus", None), override_settings(
+            QURAN_CORPUS_ARTIFACT=self.path
+        ):
+            with self.assertNumQueries(0):
+                reloaded = reload_corpus()
+            self.assertIs(reloaded, get_corpus())
+
+        self.assertIsNotNone(reloaded.artifact)
+        self.assertEqual("Artifact", reloaded.juz(1)["number_worded_en"])
+
+    def test_invalid(self):
+        with open(self.path, "r+b") as artifact:
+            artifact.write(b"JSON")
+        with self.assertRaises(ArtifactError):
+            Corpus.from_artifact(self.path)
+
+        with open(self.path, "r+b") as artifact:
+            artifact.write(struct.pack("<4sH", b"QRNC", 99))
+        with self.assertRaisesRegex(ArtifactError, "format version 99"):
+            Corpus.from_artifact(self.path)
+
+        with open(self.path, "wb") as artifact:
+            artifact.write(b"\0" * (HEADER.size - 1))
+        with self.assertRaises(ArtifactError):
+            Corpus.from_artifact(self.path)
+
+    def test_command(self):
+        os.remove(self.path)
+
+        stdout = io.StringIO()
+        call_command("compile_corpus", "--output", self.path, stdout=stdout)
+
+        self.assertIn(self.corpus.version[:12], stdout.getvalue())
+        self.assertEqual(self.corpus.version, Corpus.from_artifact(self.path).version)
@@ -0,0 +1,142 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework import status
+
+from api import urls
+from api.async_views import ASGIHandler, async_urlpatterns
+from api.query_budget import QueryBudgetMiddleware, get_query_budget
+from quran.corpus import get_corpus
+from quran.middleware import ConditionalGetMiddleware, ResponseCacheMiddleware
+
+
+class AsyncURLConf:
+    urlpatterns = async_urlpatterns(urls.urlpatterns)
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf, QURAN_RESPONSE_CACHE_ENABLED=False)
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        get_corpus()
+
+    async def test_answered_in_the_event_loop(self):
+        # ddt doesn't wrap coroutines, so the URLs are checked in turn.
+        for url in (
+            reverse("quran:juz-list"),
+            reverse("quran:sora-detail", kwargs={"number": 2}),
+            reverse("quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255}),
+            reverse("quran:aya-detail", kwargs={"pk": "2:255"}),
+            reverse("quran:page-detail", kwargs={"number": 604}),
+            reverse("quran:metadata"),
+        ):
+            with self.subTest(url=url), mock.patch(
+                "api.async_views.sync_to_async", wraps=sync_to_async
+            ) as wrap:
+                response = await self.async_client.get(url)
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                wrap.assert_not_called()
+
+                with override_settings(ROOT_URLCONF="api.urls"):
+                    expected = await sync_to_async(self.client.get)(url)
+                self.assertEqual(expected.content, response.content)
+
+    @override_settings(QURAN_CORPUS_ENABLED=False)
+    async def test_database_in_a_thread(self):
+        url = reverse("quran:sora-detail", kwargs={"number": 2})
+
+        with mock.patch("api.async_views.sync_to_async", wraps=sync_to_async) as wrap:
+            response = await self.async_client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["number"], 2)
+        wrap.assert_called_once()
+
+    async def test_not_in_memory_in_a_thread(self):
+        with mock.patch("api.async_views.sync_to_async", wraps=sync_to_async) as wrap:
+            response = await self.async_client.get(reverse("quran:cache-stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        wrap.assert_called_once()
+
+    async def test_not_modified(self):
+        url = reverse("quran:sora-detail", kwargs={"number": 2})
+        response = await self.async_client.get(url)
+
+        # Unlike Client, AsyncClient takes the headers by their name.
+        not_modified = await self.async_client.get(
+            url, **{"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["Vary"], response["Vary"])
+
+    async def test_export_streamed(self):
+        # Unlike AsyncClient, the ASGI handler iterates the response in the event loop.
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": reverse("quran:export", kwargs={"export_format": "csv"}),
+            "query_string": b"sora=1",
+            "headers": [(b"host", b"testserver")],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        # As Client does, so the handler doesn't close the connection of the test
+        # transaction.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            # Two ayas per chunk, so al-Fatiha takes several.
+            with mock.patch("quran.export.CHUNK_SIZE", 2):
+                await ASGIHandler()(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        start, *body = messages
+        self.assertEqual(start["status"], status.HTTP_200_OK)
+        lines = b"".join(message.get("body", b"") for message in body).splitlines()
+        # The header and the 7 ayas of al-Fatiha
+        self.assertEqual(len(lines), 8)
+        # The header, then the chunks of 2, 2, 2 and 1 ayas, in a message each
+        chunks = [message for message in body if message.get("more_body")]
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(len(chunks[1]["body"].splitlines()), 2)
+
+    def test_async_urlpatterns(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+        self.assertEqual(
+            url, reverse("quran:sora-ayas", kwargs={"number": 2}, urlconf="api.urls")
+        )
+
+        match = resolve(url)
+        self.assertEqual(match.view_name, "quran:sora-ayas")
+        self.assertTrue(asyncio.iscoroutinefunction(match.func))
+
+        sync_match = resolve(url, urlconf="api.urls")
+        self.assertEqual(match.func.cls, sync_match.func.cls)
+        self.assertEqual(match.func.actions, sync_match.func.actions)
+        self.assertTrue(match.func.csrf_exempt)
+        self.assertEqual(
+            get_query_budget(match.func, "get"),
+            get_query_budget(sync_match.func, "get"),
+        )
+
+    def test_middlewares_async_capable(self):
+        for middleware in (
+            QueryBudgetMiddleware,
+            ConditionalGetMiddleware,
+            ResponseCacheMiddleware,
+        ):
+            self.assertTrue(middleware.async_capable, msg=middleware.__name__)
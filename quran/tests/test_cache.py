@@ -0,0 +1,147 @@
+import gzip
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from quran.cache import CachedResponse, ResponseCache, response_cache
+from quran.corpus import get_corpus
+
+
+class TestResponseCacheMiddleware(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def test_miss_then_hit(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual("MISS", response["X-Cache"])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+
+        self.assertEqual("HIT", cached["X-Cache"])
+        self.assertEqual(response.content, cached.content)
+        self.assertEqual(response["Content-Type"], cached["Content-Type"])
+        self.assertEqual(response["ETag"], cached["ETag"])
+
+        stats = response_cache.stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["entries"])
+        self.assertEqual(get_corpus().version, stats["version"])
+
+    def test_gzip(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+        response = self.client.get(url)
+
+        cached = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual("gzip", cached["Content-Encoding"])
+        self.assertIn("Accept-Encoding", cached["Vary"])
+        self.assertEqual(response.content, gzip.decompress(cached.content))
+        self.assertNotEqual(response["ETag"], cached["ETag"])
+
+    def test_not_modified(self):
+        url = reverse("quran:juz-list")
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(b"", response.content)
+
+    def test_key_normalization(self):
+        url = reverse("quran:sora-list")
+
+        self.client.get(f"{url}?page_size=10&cursor=cD0xMA%3D%3D")
+        response = self.client.get(f"{url}?cursor=cD0xMA%3D%3D&page_size=10")
+        self.assertEqual("HIT", response["X-Cache"])
+
+        # A different page is a different response
+        response = self.client.get(f"{url}?page_size=11")
+        self.assertEqual("MISS", response["X-Cache"])
+
+    def test_not_cached(self):
+        # Not listed in QURAN_RESPONSE_CACHE_URL_NAMES
+        url = reverse("quran:sora-detail", kwargs={"number": 1})
+        self.client.get(url)
+        self.assertNotIn("X-Cache", self.client.get(url))
+
+        # Errors and the browsable API aren't stored
+        url = reverse("quran:sora-ayas", kwargs={"number": 115})
+        self.client.get(url)
+        self.assertEqual("MISS", self.client.get(url)["X-Cache"])
+
+        url = reverse("quran:metadata")
+        self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertEqual(
+            "MISS", self.client.get(url, HTTP_ACCEPT="text/html")["X-Cache"]
+        )
+
+    @override_settings(QURAN_RESPONSE_CACHE_ENABLED=False)
+    def test_disabled(self):
+        url = reverse("quran:metadata")
+        self.client.get(url)
+        self.assertNotIn("X-Cache", self.client.get(url))
+
+    def test_corpus_reload_invalidates(self):
+        url = reverse("quran:metadata")
+        self.client.get(url)
+
+        corpus = mock.Mock(
+            version="another version",
+            last_modified=get_corpus().last_modified,
+            aya_count=1,
+        )
+        with mock.patch("quran.middleware.get_corpus", return_value=corpus):
+            response = self.client.get(url)
+
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual("another version", response_cache.stats()["version"])
+
+    def test_stats_view(self):
+        self.client.get(reverse("quran:metadata"))
+
+        response = self.client.get(reverse("quran:cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, response.data["misses"])
+        self.assertEqual(1, response.data["entries"])
+
+
+class TestResponseCache(TestCase):
+    def make_entry(self, size):
+        return CachedResponse(
+            content=b"x" * size, content_type="application/json", etag='"etag"'
+        )
+
+    @override_settings(QURAN_RESPONSE_CACHE_MAX_BYTES=100)
+    def test_eviction(self):
+        cache = ResponseCache()
+        cache.set("v1", "a", self.make_entry(40))
+        cache.set("v1", "b", self.make_entry(40))
+
+        # "a" becomes the most recently used one
+        self.assertIsNotNone(cache.get("v1", "a"))
+        cache.set("v1", "c", self.make_entry(40))
+
+        self.assertIsNone(cache.get("v1", "b"))
+        self.assertIsNotNone(cache.get("v1", "a"))
+        self.assertIsNotNone(cache.get("v1", "c"))
+
+        stats = cache.stats()
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(80, stats["bytes"])
+
+        # Too large to be cached at all
+        cache.set("v1", "d", self.make_entry(101))
+        self.assertIsNone(cache.get("v1", "d"))
+
+    def test_version(self):
+        cache = ResponseCache()
+        cache.set("v1", "a", self.make_entry(10))
+
+        self.assertIsNone(cache.get("v2", "a"))
+        self.assertEqual(0, cache.stats()["entries"])
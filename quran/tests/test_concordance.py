@@ -0,0 +1,96 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from quran.corpus import get_corpus
+from quran.models import Aya
+
+
+class TestConcordance(TestCase):
+    def setUp(self):
+        self.concordance = get_corpus().concordance
+
+    def test_occurrences(self):
+        self.assertEqual(
+            [(2, 183, 6), (2, 187, 4), (2, 187, 45)],
+            self.concordance.occurrences("الصيام"),
+        )
+        self.assertIsNone(self.concordance.occurrences("missing"))
+
+    def test_matches_database(self):
+        word = "الضالين"
+        expected = [
+            (aya.sora.number, aya.number, position)
+            for aya in Aya.objects.filter(clean_text__contains=word)
+            .select_related("sora")
+            .order_by("sora__number", "number")
+            for position, found in enumerate(aya.clean_text.split(), 1)
+            if found == word
+        ]
+        self.assertEqual(expected, self.concordance.occurrences(word))
+
+    def test_frequencies(self):
+        self.assertEqual(2153, self.concordance.count("الله"))
+        self.assertEqual(0, self.concordance.count("missing"))
+
+        soras = self.concordance.sora_frequencies("الله")
+        self.assertEqual(2153, sum(count for _, count in soras))
+        self.assertEqual(sorted(soras), soras)
+        self.assertEqual(
+            [(1, 1), (2, 1), (7, 1), (19, 2), (27, 1)],
+            self.concordance.juz_frequencies("الضالين"),
+        )
+
+    def test_most_common(self):
+        words = self.concordance.most_common(5)
+        self.assertEqual([("من", 2765), ("الله", 2153)], words[:2])
+        counts = [count for _, count in words]
+        self.assertEqual(sorted(counts, reverse=True), counts)
+
+        total = sum(len(text.split()) for text in get_corpus().aya_clean_texts)
+        self.assertEqual(
+            total, sum(count for _, count in self.concordance.most_common(None))
+        )
+
+
+class TestWordViewSet(TestCase):
+    def test_list(self):
+        url = reverse("quran:word-list")
+
+        response = self.client.get(url, {"size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [{"word": "من", "count": 2765}, {"word": "الله", "count": 2153}],
+            response.data,
+        )
+
+        self.assertEqual(100, len(self.client.get(url).data))
+        self.assertEqual(1000, len(self.client.get(url, {"size": 1000}).data))
+        for size in (0, 1001):
+            response = self.client.get(url, {"size": size})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve(self):
+        url = reverse("quran:word-detail", kwargs={"word": "الصيام"})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(3, response.data["count"])
+        self.assertEqual(
+            {"sora": 2, "aya": 187, "position": 45}, response.data["occurrences"][2]
+        )
+
+        url = reverse("quran:word-detail", kwargs={"word": "missing"})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, self.client.get(url).status_code)
+
+    def test_counts(self):
+        url = reverse("quran:word-counts", kwargs={"word": "الضالين"})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(6, response.data["count"])
+        self.assertEqual({"sora": 26, "count": 2}, response.data["soras"][3])
+        self.assertEqual({"juz": 19, "count": 2}, response.data["juzs"][3])
+
+        url = reverse("quran:word-counts", kwargs={"word": "missing"})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, self.client.get(url).status_code)
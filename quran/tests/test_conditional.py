@@ -0,0 +1,173 @@
+from unittest import mock
+
+from ddt import data, ddt
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+
+from quran.cache import response_cache
+from quran.corpus import get_corpus
+from quran.models import Aya
+
+
+@ddt
+@override_settings(QURAN_RESPONSE_CACHE_ENABLED=False)
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        self.corpus = get_corpus()
+
+    @data(
+        reverse("quran:juz-list"),
+        reverse("quran:juz-detail", kwargs={"number": 30}),
+        reverse("quran:sora-list"),
+        reverse("quran:sora-detail", kwargs={"number": 2}),
+        reverse("quran:sora-ayas", kwargs={"number": 2}),
+        reverse("quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255}),
+        reverse("quran:aya-list"),
+        reverse("quran:metadata"),
+    )
+    def test_not_modified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        last_modified = int(self.corpus.last_modified.timestamp())
+        self.assertEqual(http_date(last_modified), response["Last-Modified"])
+        self.assertTrue(response["ETag"].startswith('"'))
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+        self.assertEqual(response["ETag"], not_modified["ETag"])
+        self.assertIn("max-age", not_modified["Cache-Control"])
+
+        not_modified = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+
+    def test_aya_detail(self):
+        aya = Aya.objects.first()
+        url = reverse("quran:aya-detail", kwargs={"pk": aya.pk})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_modified(self):
+        url = reverse("quran:juz-list")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"outdated"')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT"
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_etag_per_representation(self):
+        url = reverse("quran:sora-list")
+        etag = self.client.get(url)["ETag"]
+
+        self.assertNotEqual(etag, self.client.get(url + "?page_size=10")["ETag"])
+        self.assertNotEqual(etag, self.client.get(url, HTTP_ACCEPT="text/html")["ETag"])
+
+    def test_etag_changes_with_the_corpus(self):
+        url = reverse("quran:metadata")
+        etag = self.client.get(url)["ETag"]
+
+        corpus = mock.Mock(
+            version="another version",
+            last_modified=self.corpus.last_modified,
+            aya_count=1,
+        )
+        with mock.patch("quran.middleware.get_corpus", return_value=corpus):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
+
+    @override_settings(QURAN_CORPUS_ENABLED=False)
+    def test_corpus_disabled(self):
+        url = reverse("quran:sora-detail", kwargs={"number": 2})
+
+        with mock.patch("quran.middleware.get_corpus") as get_corpus_mock:
+            response = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        get_corpus_mock.assert_not_called()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified.status_code)
+        self.assertEqual(response["ETag"], not_modified["ETag"])
+
+    @override_settings(
+        QURAN_CACHE_CONTROL={
+            "default": {"public": True, "max_age": 10},
+            "sora-ayas": {"private": True, "max_age": 20},
+            "cache-stats": None,
+        }
+    )
+    def test_cache_control(self):
+        response = self.client.get(reverse("quran:juz-list"))
+        self.assertEqual("public, max-age=10", response["Cache-Control"])
+
+        response = self.client.get(reverse("quran:sora-ayas", kwargs={"number": 1}))
+        self.assertEqual("private, max-age=20", response["Cache-Control"])
+
+        response = self.client.get(reverse("quran:cache-stats"))
+        self.assertNotIn("Cache-Control", response)
+        self.assertNotIn("ETag", response)
+
+    def test_not_found(self):
+        response = self.client.get(reverse("quran:sora-detail", kwargs={"number": 115}))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertNotIn("ETag", response)
+
+    def test_errors_not_modified(self):
+        last_modified = self.client.get(reverse("quran:juz-list"))["Last-Modified"]
+
+        for url, status_code in (
+            (
+                reverse("quran:sora-detail", kwargs={"number": 999}),
+                status.HTTP_404_NOT_FOUND,
+            ),
+            (reverse("quran:juz-list") + "?fields=bogus", status.HTTP_400_BAD_REQUEST),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+                self.assertEqual(status_code, response.status_code)
+
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(status_code, response.status_code)
+
+    def test_never_modified(self):
+        corpus = mock.Mock(wraps=self.corpus, version="empty", last_modified=None)
+        with mock.patch("quran.middleware.get_corpus", return_value=corpus):
+            response = self.client.get(reverse("quran:juz-list"))
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+
+class TestConditionalGetCached(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+
+    def test_cached_response_etag(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+
+        response = self.client.get(url)
+        cached = self.client.get(url)
+        self.assertEqual("HIT", cached["X-Cache"])
+        self.assertEqual(response["ETag"], cached["ETag"])
+        self.assertEqual(response["Last-Modified"], cached["Last-Modified"])
+        self.assertEqual(response["Cache-Control"], cached["Cache-Control"])
+
+        gzipped = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=gzipped["ETag"]
+        )
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertIn("max-age", response["Cache-Control"])
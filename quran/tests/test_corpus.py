@@ -0,0 +1,169 @@
+import json
+from base64 import b64decode
+from urllib.parse import parse_qs, urlsplit
+
+from ddt import data, ddt
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from quran import corpus as corpus_module
+from quran.corpus import Corpus, get_corpus, reload_corpus
+from quran.models import Aya, Juz, Sora
+
+
+@ddt
+@override_settings(QURAN_RESPONSE_CACHE_ENABLED=False)
+class TestCorpusResponses(TestCase):
+    """
+    The corpus must render exactly what the serializers render from the database.
+    """
+
+    def get_both(self, url):
+        with override_settings(QURAN_CORPUS_ENABLED=False):
+            expected = self.client.get(url)
+        with override_settings(QURAN_CORPUS_ENABLED=True):
+            actual = self.client.get(url)
+
+        self.assertEqual(expected.status_code, actual.status_code)
+        return expected, actual
+
+    @data(
+        reverse("quran:juz-list"),
+        reverse("quran:juz-detail", kwargs={"number": 13}),
+        reverse("quran:juz-detail", kwargs={"number": 31}),
+        reverse("quran:sora-list"),
+        reverse("quran:sora-list") + "?page_size=200",
+        reverse("quran:sora-list") + "?page_size=7",
+        reverse("quran:sora-detail", kwargs={"number": 2}),
+        reverse("quran:sora-detail", kwargs={"number": 115}),
+        reverse("quran:sora-ayas", kwargs={"number": 2}),
+        reverse("quran:sora-ayas", kwargs={"number": 114}),
+        reverse("quran:sora-ayas", kwargs={"number": 0}),
+        reverse("quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255}),
+        reverse("quran:sora-ayas-detail", kwargs={"number": 1, "aya_number": 8}),
+        reverse("quran:aya-detail", kwargs={"pk": "not-a-uuid"}),
+        reverse("quran:aya-detail", kwargs={"pk": 262}),
+        reverse("quran:aya-detail", kwargs={"pk": 6237}),
+        reverse("quran:aya-detail", kwargs={"pk": "2:255"}),
+        reverse("quran:aya-detail", kwargs={"pk": "2:287"}),
+        reverse("quran:aya-detail", kwargs={"pk": 262}) + "?fields=number,text",
+        reverse("quran:aya-list") + "?omit=text,clean_text&page_size=20",
+        reverse("quran:sora-list") + "?fields=number,ayas_count",
+        reverse("quran:sora-ayas", kwargs={"number": 2}) + "?fields=verse_key",
+        reverse("quran:juz-detail", kwargs={"number": 13}) + "?omit=id",
+        reverse("quran:verses") + "?keys=2:255-257,1:1&fields=verse_key,text",
+        reverse("quran:page-detail", kwargs={"number": 250}) + "?omit=id,text",
+        reverse("quran:metadata"),
+    )
+    def test_byte_identical(self, url):
+        expected, actual = self.get_both(url)
+        self.assertEqual(expected.content, actual.content)
+
+    def test_sora_list_pages(self):
+        url = reverse("quran:sora-list") + "?page_size=50"
+
+        while url:
+            expected, actual = self.get_both(url)
+            self.assertEqual(expected.content, actual.content)
+            url = json.loads(actual.content)["next"]
+
+    def test_aya_detail(self):
+        aya = Aya.objects.order_by("?").first()
+        url = reverse("quran:aya-detail", kwargs={"pk": aya.pk})
+
+        expected, actual = self.get_both(url)
+        self.assertEqual(expected.content, actual.content)
+
+    def test_aya_list(self):
+        """
+        Ayas are listed in mushaf order, by their unique ordinal, so every page is
+        identical and its cursor never needs an offset.
+        """
+        url = reverse("quran:aya-list") + "?page_size=200"
+
+        for number in range(1, 4):
+            expected, actual = self.get_both(url)
+            self.assertEqual(expected.content, actual.content)
+
+            data = json.loads(actual.content)
+            first = (number - 1) * 200 + 1
+            self.assertEqual(first, data["results"][0]["ordinal"])
+
+            url = data["next"]
+            cursor = parse_qs(urlsplit(url).query)["cursor"][0]
+            position = parse_qs(b64decode(cursor).decode())
+            self.assertEqual({"p": [str(first + 199)]}, position)
+
+
+class TestCorpus(TestCase):
+    def test_load_queries(self):
+        with self.assertNumQueries(3):
+            corpus = Corpus.load()
+
+        self.assertEqual(30, corpus.juz_count)
+        self.assertEqual(114, corpus.sora_count)
+        self.assertEqual(6236, corpus.aya_count)
+
+    @override_settings(QURAN_RESPONSE_CACHE_ENABLED=False)
+    def test_no_queries_once_loaded(self):
+        get_corpus()
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse("quran:sora-ayas", kwargs={"number": 2}))
+            self.client.get(reverse("quran:aya-list"))
+
+    def test_sora_ayas(self):
+        corpus = get_corpus()
+
+        for sora in Sora.objects.all():
+            ayas = corpus.sora_ayas(sora.number)
+            self.assertEqual(sora.ayas.count(), len(ayas))
+            self.assertEqual(list(range(1, len(ayas) + 1)), [a["number"] for a in ayas])
+            self.assertEqual({sora.number}, {aya["sora"] for aya in ayas})
+
+    def test_lookups_not_found(self):
+        corpus = get_corpus()
+
+        self.assertIsNone(corpus.juz("x"))
+        self.assertIsNone(corpus.sora(None))
+        self.assertIsNone(corpus.aya("x"))
+        self.assertIsNone(corpus.sora_aya(1, 0))
+        self.assertIsNone(corpus.sora_aya(1, 8))
+        self.assertIsNone(corpus.sora_ayas(115))
+
+    def test_rows(self):
+        rows = get_corpus().ayas
+
+        self.assertEqual(Aya.objects.count(), rows.count())
+        self.assertEqual(1, rows.filter(ordinal=262).count())
+        self.assertEqual("2:255", rows.filter(ordinal=262)[0]["verse_key"])
+        self.assertEqual(
+            Aya.objects.filter(ordinal__gt=200).count(),
+            rows.filter(ordinal__gt=200).count(),
+        )
+        self.assertEqual(
+            Aya.objects.filter(ordinal__lt=3).count(),
+            rows.filter(ordinal__lt=3).count(),
+        )
+
+        last = rows.order_by("-ordinal")[0]
+        self.assertEqual("114:6", last["verse_key"])
+        with self.assertRaises(ValueError):
+            rows.order_by("number")
+
+        soras = get_corpus().soras
+        self.assertEqual(2, soras.order_by("-number").filter(number__lt=3)[0]["number"])
+
+    def test_reload(self):
+        corpus = get_corpus()
+        # Leave the pristine corpus for the other tests
+        self.addCleanup(setattr, corpus_module, "_corpus", corpus)
+
+        juz = Juz.objects.get(number=1)
+        juz.number_worded_en = "Changed"
+        juz.save()
+
+        reloaded = reload_corpus()
+        self.assertIsNot(corpus, reloaded)
+        self.assertIs(reloaded, get_corpus())
+        self.assertEqual("Changed", reloaded.juz(1)["number_worded_en"])
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from quran.export import EXPORT_FIELDS
+from quran.models import Aya
+from quran.serializers import AyaSerializer
+
+
+class TestExportView(TestCase):
+    def get_content(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        url = reverse("quran:export", kwargs={"export_format": "ndjson"})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual("application/x-ndjson", response["Content-Type"])
+
+        lines = self.get_content(response).splitlines()
+        self.assertEqual(6236, len(lines))
+
+        # Same representation as the API, in mushaf order
+        aya = Aya.objects.get(sora__number=1, number=1)
+        self.assertEqual(AyaSerializer(aya).data, json.loads(lines[0]))
+        self.assertEqual(114, json.loads(lines[-1])["sora"])
+
+    def test_csv(self):
+        url = reverse("quran:export", kwargs={"export_format": "csv"})
+        response = self.client.get(url, {"sora": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("quran-ayas.csv", response["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(self.get_content(response))))
+        self.assertEqual(286, len(rows))
+        self.assertEqual(list(EXPORT_FIELDS), list(rows[0]))
+
+        aya = Aya.objects.get(sora__number=2, number=255)
+        self.assertEqual(aya.text, rows[254]["text"])
+        self.assertEqual(str(aya.pk), rows[254]["id"])
+
+    def test_filters(self):
+        url = reverse("quran:export", kwargs={"export_format": "ndjson"})
+
+        for query, expected in (
+            ({"juz": 30}, Aya.objects.filter(juz__number=30)),
+            ({"page": 250}, Aya.objects.filter(page=250)),
+            ({"sora": 2, "juz": 1}, Aya.objects.filter(sora__number=2, juz__number=1)),
+        ):
+            lines = self.get_content(self.client.get(url, query)).splitlines()
+            self.assertEqual(expected.count(), len(lines))
+
+    def test_invalid(self):
+        url = reverse("quran:export", kwargs={"export_format": "xml"})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, self.client.get(url).status_code)
+
+        url = reverse("quran:export", kwargs={"export_format": "csv"})
+        for query in ({"sora": 115}, {"juz": "a"}, {"page": 0}):
+            response = self.client.get(url, query)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+
+class TestExportCorpusCommand(TestCase):
+    def test_stdout(self):
+        stdout = io.StringIO()
+        call_command("export_corpus", "--sora", "1", stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(7, len(lines))
+        self.assertEqual(1, json.loads(lines[0])["number"])
+
+    def test_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quran.csv")
+            call_command("export_corpus", "--format", "csv", "--output", path)
+
+            with open(path, encoding="utf-8", newline="") as output:
+                self.assertEqual(6236, len(list(csv.DictReader(output))))
@@ -0,0 +1,141 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from quran.hits import HitBuffer, hit_buffer
+from quran.models import Aya, Sora, ViewCount
+
+
+@override_settings(QURAN_HIT_COUNTING_ENABLED=True)
+class TestHitBuffer(TestCase):
+    def setUp(self):
+        self.buffer = HitBuffer()
+        self.ayas = list(Aya.objects.order_by("sora__number", "number")[:3])
+
+    def counts(self):
+        return {
+            str(view.object_id): view.hits
+            for view in ViewCount.objects.filter(content_type__model="aya")
+        }
+
+    def test_flush(self):
+        first, second, _ = self.ayas
+        for aya in (first, first, second):
+            self.buffer.record(Aya, aya.pk)
+        self.assertEqual(2, len(self.buffer))
+
+        with self.assertNumQueries(3):
+            self.buffer.flush()
+        self.assertEqual(0, len(self.buffer))
+        self.assertEqual({str(first.pk): 2, str(second.pk): 1}, self.counts())
+
+        self.buffer.record(Aya, first.pk)
+        self.buffer.flush()
+        self.assertEqual({str(first.pk): 3, str(second.pk): 1}, self.counts())
+
+        self.assertEqual(4, self.buffer.stats["hits"])
+        self.assertEqual(2, self.buffer.stats["flushes"])
+        self.assertEqual(3, self.buffer.stats["rows"])
+
+    @override_settings(QURAN_HIT_BATCH_SIZE=2)
+    def test_batches(self):
+        for aya in self.ayas:
+            self.buffer.record(Aya, aya.pk)
+        self.buffer.flush()
+        self.assertEqual({str(aya.pk): 1 for aya in self.ayas}, self.counts())
+
+    def test_failed_flush(self):
+        aya = self.ayas[0]
+        self.buffer.record(Aya, aya.pk)
+
+        with mock.patch("quran.hits.upsert_hits", side_effect=RuntimeError):
+            with self.assertLogs("quran.hits", "ERROR"):
+                self.buffer.flush()
+        self.assertEqual(1, self.buffer.stats["errors"])
+        self.assertEqual(1, len(self.buffer))
+
+        self.buffer.record(Aya, aya.pk)
+        self.buffer.flush()
+        self.assertEqual({str(aya.pk): 2}, self.counts())
+
+    @override_settings(QURAN_HIT_FLUSH_INTERVAL=60)
+    def test_flush_if_due(self):
+        self.buffer.record(Aya, self.ayas[0].pk)
+        self.buffer.flush_if_due()
+        self.assertEqual(1, len(self.buffer))
+
+        with override_settings(QURAN_HIT_FLUSH_INTERVAL=0):
+            self.buffer.flush_if_due()
+        self.assertEqual(0, len(self.buffer))
+
+    @override_settings(QURAN_HIT_COUNTING_ENABLED=False)
+    def test_disabled(self):
+        self.buffer.record(Aya, self.ayas[0].pk)
+        self.assertEqual(0, len(self.buffer))
+
+
+@override_settings(QURAN_HIT_COUNTING_ENABLED=True, QURAN_HIT_FLUSH_INTERVAL=60)
+class TestMostViewed(TestCase):
+    def setUp(self):
+        hit_buffer.clear()
+        self.addCleanup(hit_buffer.clear)
+
+    def test_retrieve_records_hits(self):
+        sora = Sora.objects.get(number=2)
+        aya = Aya.objects.get(sora=sora, number=255)
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse("quran:sora-detail", kwargs={"number": 2}))
+            self.client.get(reverse("quran:aya-detail", kwargs={"pk": aya.pk}))
+            self.client.get(
+                reverse(
+                    "quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255}
+                )
+            )
+        self.assertEqual(2, len(hit_buffer))
+
+        hit_buffer.flush()
+        self.assertEqual(2, ViewCount.objects.get(object_id=aya.pk).hits)
+        self.assertEqual(1, ViewCount.objects.get(object_id=sora.pk).hits)
+
+    def test_not_modified_records_hits(self):
+        url = reverse("quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        hit_buffer.flush()
+        aya = Aya.objects.get(sora__number=2, number=255)
+        self.assertEqual(2, ViewCount.objects.get(object_id=aya.pk).hits)
+
+    def test_counted_views_not_cached(self):
+        # Responses of the response cache don't run the view, so aren't counted.
+        counted = {"aya-detail", "sora-detail", "sora-ayas-detail"}
+        self.assertFalse(counted & set(settings.QURAN_RESPONSE_CACHE_URL_NAMES))
+
+    def test_most_viewed(self):
+        soras = {number: Sora.objects.get(number=number) for number in (1, 2, 3)}
+        for number, hits in ((1, 2), (2, 5), (3, 1)):
+            for _ in range(hits):
+                hit_buffer.record(Sora, soras[number].pk)
+        hit_buffer.flush()
+
+        url = reverse("quran:sora-most-viewed")
+        response = self.client.get(url, {"size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(2, 5), (1, 2)],
+            [(sora["number"], sora["hits"]) for sora in response.data],
+        )
+        self.assertEqual(str(soras[2].pk), response.data[0]["id"])
+        self.assertNotIn("ETag", response)
+
+        response = self.client.get(url, {"size": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("quran:aya-most-viewed"))
+        self.assertEqual([], response.data)
@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+
+from quran.indexing import BatchedSignalProcessor
+from quran.models import Aya, Juz, Sora
+
+
+@mock.patch("quran.indexing.bulk", return_value=(0, []))
+class TestBatchedSignalProcessor(TestCase):
+    def setUp(self):
+        self.processor = apps.get_app_config(
+            "django_elasticsearch_dsl"
+        ).signal_processor
+        self.assertIsInstance(self.processor, BatchedSignalProcessor)
+
+    def get_actions(self, bulk):
+        self.assertEqual(1, bulk.call_count)
+        return bulk.call_args.args[1]
+
+    def test_one_bulk_request_on_commit(self, bulk):
+        ayas = list(Aya.objects.filter(sora__number=112))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for aya in ayas:
+                aya.save()
+            # Nothing is sent before the transaction commits
+            bulk.assert_not_called()
+
+        actions = self.get_actions(bulk)
+        self.assertEqual(
+            {aya.pk for aya in ayas}, {action["_id"] for action in actions}
+        )
+        self.assertEqual({"index"}, {action["_op_type"] for action in actions})
+        self.assertEqual(112, actions[0]["_source"]["sora"]["number"])
+
+    def test_related(self, bulk):
+        sora = Sora.objects.get(number=114)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sora.save()
+            Juz.objects.get(number=30).save()
+
+        actions = self.get_actions(bulk)
+        self.assertEqual(
+            Aya.objects.filter(juz__number=30).count(),
+            len({action["_id"] for action in actions}),
+        )
+
+    def test_delete(self, bulk):
+        deleted, kept = Aya.objects.filter(sora__number=1)[:2]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Deleted without the ORM, the hit counts can't be collected on SQLite
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {Aya._meta.db_table} WHERE id = %s", [deleted.pk.hex]
+                )
+            self.processor.handle_delete(Aya, deleted, using="default")
+            # The row is still there, e.g. the delete was rolled back
+            self.processor.handle_delete(Aya, kept, using="default")
+
+        actions = {action["_id"]: action for action in self.get_actions(bulk)}
+        self.assertEqual(
+            {"_op_type": "delete", "_index": "quran-aya", "_id": deleted.pk},
+            actions[deleted.pk],
+        )
+        self.assertEqual("index", actions[kept.pk]["_op_type"])
+
+    def test_rolled_back(self, bulk):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Aya.objects.first().save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual([], callbacks)
+        bulk.assert_not_called()
+
+    def test_stats(self, bulk):
+        flushes = self.processor.stats["flushes"]
+        documents = self.processor.stats["documents"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Aya.objects.first().save()
+
+        self.assertEqual(flushes + 1, self.processor.stats["flushes"])
+        self.assertEqual(documents + 1, self.processor.stats["documents"])
+
+    def test_failure_is_logged(self, bulk):
+        bulk.side_effect = ConnectionError
+        errors = self.processor.stats["errors"]
+
+        with self.assertLogs("quran.indexing", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                Aya.objects.first().save()
+
+        self.assertEqual(errors + 1, self.processor.stats["errors"])
+
+    def test_refused_documents(self, bulk):
+        refused, kept = Aya.objects.filter(sora__number=1)[:2]
+        bulk.return_value = (
+            0,
+            [
+                {"index": {"_id": refused.pk, "status": 400, "error": "mapping"}},
+                # Deleting a document that isn't indexed
+                {"delete": {"_id": kept.pk, "status": 404}},
+            ],
+        )
+        failed = self.processor.stats["failed"]
+
+        with self.assertLogs("quran.indexing", "WARNING") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                refused.save()
+
+        self.assertEqual(failed + 1, self.processor.stats["failed"])
+        warnings = [log for log in logs.output if log.startswith("WARNING")]
+        self.assertEqual(1, len(warnings))
+        self.assertIn(str(refused.pk), warnings[0])
+
+    def test_rolled_back_batch_dropped(self, bulk):
+        first, second = Aya.objects.filter(sora__number=1)[:2]
+
+        try:
+            with transaction.atomic():
+                first.save()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.save()
+
+        # The batch of the rolled back transaction went with its callback
+        self.assertEqual([second.pk], [a["_id"] for a in self.get_actions(bulk)])
+
+    def test_rolled_back_savepoint(self, bulk):
+        first, second = Aya.objects.filter(sora__number=1)[:2]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    first.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            second.save()
+
+        self.assertEqual([second.pk], [a["_id"] for a in self.get_actions(bulk)])
+
+    @override_settings(ELASTICSEARCH_DSL_AUTOSYNC=False)
+    def test_autosync_disabled(self, bulk):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Aya.objects.first().save()
+
+        self.assertEqual([], callbacks)
+        bulk.assert_not_called()
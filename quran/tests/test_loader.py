@@ -0,0 +1,80 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from quran.loader import load_corpus
+from quran.models import Aya, Juz, Sora
+
+
+class TestLoadCorpus(TestCase):
+    def load(self):
+        return load_corpus(Juz, Sora, Aya)
+
+    def test_idempotent(self):
+        ids = set(Aya.objects.values_list("id", flat=True))
+
+        report = self.load()
+        self.assertEqual({"juzs": 0, "soras": 0, "ayas": 0}, report.created)
+        self.assertEqual({"juzs": 0, "soras": 0, "ayas": 0}, report.updated)
+        self.assertEqual(ids, set(Aya.objects.values_list("id", flat=True)))
+
+    def test_bulk_queries(self):
+        # Reads each table once whatever the number of rows, in a savepoint
+        with self.assertNumQueries(5):
+            self.load()
+
+    def test_fixes(self):
+        # The juz names from 0006 and Āl-‘Imrān's name from 0004
+        self.assertEqual("آلِ عِمۡرَانَ", Sora.objects.get(number=3).name_ar)
+        self.assertEqual("Thirtieth", Juz.objects.get(number=30).number_worded_en)
+
+    def test_updates_outdated_rows(self):
+        aya = Aya.objects.get(sora__number=2, number=255)
+        Aya.objects.filter(pk=aya.pk).update(text="outdated", page=1)
+        Juz.objects.filter(number=30).update(number_worded_en=None)
+
+        report = self.load()
+        self.assertEqual(1, report.updated["ayas"])
+        self.assertEqual(1, report.updated["juzs"])
+
+        updated = Aya.objects.get(pk=aya.pk)
+        self.assertEqual((aya.text, aya.page), (updated.text, updated.page))
+        self.assertGreater(updated.updated, aya.updated)
+        self.assertEqual("Thirtieth", Juz.objects.get(number=30).number_worded_en)
+
+    def test_creates_missing_rows(self):
+        expected = list(
+            Aya.objects.filter(sora__number=114).values_list("number", "text", "juz")
+        )
+        # Deleted without the signals, the search index and hit counts don't matter
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Aya._meta.db_table} WHERE sora_id = %s",
+                [Sora.objects.get(number=114).pk.hex],
+            )
+        self.assertEqual(6230, Aya.objects.count())
+
+        report = self.load()
+        self.assertEqual(6, report.created["ayas"])
+        self.assertEqual(6236, Aya.objects.count())
+        self.assertEqual(
+            expected,
+            list(
+                Aya.objects.filter(sora__number=114)
+                .order_by("number")
+                .values_list("number", "text", "juz")
+            ),
+        )
+
+
+class TestLoadCorpusCommand(TestCase):
+    def test_report(self):
+        stdout = io.StringIO()
+        call_command("load_corpus", stdout=stdout)
+
+        output = stdout.getvalue()
+        for stage in ("juzs", "soras", "ayas", "read", "total"):
+            self.assertIn(stage, output)
+        self.assertIn("0 created", output)
@@ -4,7 +4,7 @@ from django.forms import ValidationError
 from django.test import TestCase
 
 from quran.constants import LETTERS
-from quran.factories import JuzFactory, SoraFactory
+from quran.factories import AyaFactory, JuzFactory, SoraFactory
 from quran.models import Aya, Juz, Sora
 
 
@@ -108,6 +108,14 @@ class TestAya(TestCase):
         with self.assertRaises(ProtectedError):
             Sora.objects.first().delete()
 
+    def test_factory_unique(self):
+        first, second = AyaFactory.build_batch(2)
+
+        self.assertNotEqual(first.ordinal, second.ordinal)
+        self.assertNotEqual(first.verse_key, second.verse_key)
+        for aya in (first, second):
+            self.assertEqual(f"{aya.sora.number}:{aya.number}", aya.verse_key)
+
 
 class TestAyaNotNone(TestCase):
     def test_clean_text_not_null(self):
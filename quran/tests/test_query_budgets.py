@@ -0,0 +1,79 @@
+from unittest import mock
+
+from ddt import data, ddt
+from django.test import TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from api.query_budget import QueryBudgetExceeded, get_query_budget
+from api.testing import QueryBudgetTestMixin
+from quran.models import Aya
+from quran.views import SoraViewSet
+
+
+def iter_url_patterns(patterns, namespace=None):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_url_patterns(
+                pattern.url_patterns, pattern.namespace or namespace
+            )
+        elif isinstance(pattern, URLPattern):
+            yield namespace, pattern
+
+
+@ddt
+@override_settings(QURAN_CORPUS_ENABLED=False, QURAN_RESPONSE_CACHE_ENABLED=False)
+class TestQueryBudgets(QueryBudgetTestMixin, TestCase):
+    def test_every_endpoint_declares_a_budget(self):
+        for namespace, pattern in iter_url_patterns(get_resolver().url_patterns):
+            if namespace not in ("quran", "search") or pattern.name == "api-root":
+                continue
+
+            actions = getattr(pattern.callback, "actions", None) or {"get": None}
+            for method in actions:
+                self.assertIsNotNone(
+                    get_query_budget(pattern.callback, method),
+                    msg=f"{namespace}:{pattern.name} declares no budget for {method}",
+                )
+
+    @data(
+        reverse("quran:juz-list"),
+        reverse("quran:juz-detail", kwargs={"number": 30}),
+        reverse("quran:sora-list") + "?page_size=200",
+        reverse("quran:sora-detail", kwargs={"number": 2}),
+        reverse("quran:sora-ayas", kwargs={"number": 2}),
+        reverse("quran:sora-ayas-detail", kwargs={"number": 2, "aya_number": 255}),
+        reverse("quran:aya-list") + "?page_size=200",
+        reverse("quran:metadata"),
+    )
+    def test_within_budget(self, url):
+        self.assertWithinQueryBudget(url)
+
+    def test_aya_detail_within_budget(self):
+        aya = Aya.objects.first()
+        self.assertWithinQueryBudget(reverse("quran:aya-detail", kwargs={"pk": aya.pk}))
+
+    def test_aya_pages_within_budget(self):
+        url = reverse("quran:aya-list") + "?page_size=200"
+
+        for _ in range(3):
+            response = self.assertWithinQueryBudget(url)
+            url = response.data["next"]
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_over_budget_raises(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+
+        with mock.patch.object(SoraViewSet, "query_budgets", {"ayas": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_over_budget_logs(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 2})
+
+        with mock.patch.object(SoraViewSet, "query_budgets", {"ayas": 1}):
+            with self.assertLogs("api.query_budget", level="WARNING") as logs:
+                response = self.client.get(url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn("over its budget of 1", logs.output[0])
@@ -0,0 +1,126 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from quran import reindex
+from quran.models import Aya
+
+OLD_INDEX = "quran-aya-20260101000000"
+OLDER_INDEX = "quran-aya-20250101000000"
+
+
+def successful_bulk(client, actions, **kwargs):
+    for action in actions:
+        yield True, {"index": {"_id": action["_id"]}}
+
+
+class TestReindex(TestCase):
+    """
+    Elasticsearch is mocked, these check the calls made to it.
+    """
+
+    def setUp(self):
+        self.client = mock.MagicMock()
+        self.client.indices.exists_alias.return_value = True
+        self.client.indices.get_alias.return_value = {OLD_INDEX: {}}
+        self.client.indices.get.return_value = {OLDER_INDEX: {}, OLD_INDEX: {}}
+
+        for target, value in (
+            ("get_client", self.client),
+            ("create_index", None),
+        ):
+            patcher = mock.patch.object(reindex, target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def get_actions(self):
+        return self.client.indices.update_aliases.call_args.kwargs["body"]["actions"]
+
+    def test_actions(self):
+        with self.assertNumQueries(1):
+            actions = list(reindex.iter_actions("quran-aya-new"))
+
+        self.assertEqual(Aya.objects.count(), len(actions))
+        self.assertEqual({"quran-aya-new"}, {action["_index"] for action in actions})
+        self.assertIn("clean_name_ar", actions[0]["_source"]["sora"])
+        self.assertIn("number_worded_en", actions[0]["_source"]["juz"])
+
+    @mock.patch.object(reindex, "parallel_bulk", side_effect=successful_bulk)
+    def test_reindex(self, parallel_bulk):
+        report = reindex.reindex(keep=1)
+
+        self.assertEqual(Aya.objects.count(), report.indexed)
+        self.assertEqual([OLD_INDEX], report.previous)
+        self.assertTrue(report.index.startswith("quran-aya-"))
+        self.assertEqual({"create", "load", "forcemerge", "swap"}, set(report.timings))
+
+        # Refreshing comes back on before the merge
+        self.client.indices.put_settings.assert_called_once_with(
+            index=report.index, body={"index": {"refresh_interval": "1s"}}
+        )
+        self.client.indices.forcemerge.assert_called_once_with(
+            index=report.index, max_num_segments=1
+        )
+
+        self.assertEqual(
+            [
+                {"remove": {"index": OLD_INDEX, "alias": "quran-aya"}},
+                {"add": {"index": report.index, "alias": "quran-aya"}},
+            ],
+            self.get_actions(),
+        )
+
+        # The previous index is kept for rollback, the one before is dropped
+        self.client.indices.delete.assert_called_once_with(index=OLDER_INDEX)
+
+    @mock.patch.object(reindex, "parallel_bulk", side_effect=successful_bulk)
+    def test_replaces_concrete_index(self, parallel_bulk):
+        self.client.indices.exists_alias.return_value = False
+        self.client.indices.exists.return_value = True
+
+        report = reindex.reindex()
+        self.assertEqual(
+            [
+                {"remove_index": {"index": "quran-aya"}},
+                {"add": {"index": report.index, "alias": "quran-aya"}},
+            ],
+            self.get_actions(),
+        )
+
+    @mock.patch.object(reindex, "parallel_bulk")
+    def test_failure(self, parallel_bulk):
+        parallel_bulk.return_value = iter([(True, {}), (False, {"index": {}})])
+
+        with self.assertRaises(reindex.ReindexError):
+            reindex.reindex()
+
+        self.client.indices.update_aliases.assert_not_called()
+        name = self.client.indices.delete.call_args.kwargs["index"]
+        self.assertNotIn(name, (OLD_INDEX, OLDER_INDEX))
+
+    def test_index_names(self):
+        now = reindex.timezone.now()
+        with mock.patch.object(reindex.timezone, "now", return_value=now):
+            names = [reindex.index_name("quran-aya") for _ in range(2)]
+
+        self.assertNotEqual(*names)
+        self.assertRegex(names[0], r"^quran-aya-\d{20}-[0-9a-f]{8}$")
+        # Names from before microseconds were added sort by time as well
+        self.assertEqual(
+            [OLDER_INDEX, OLD_INDEX, *sorted(names)],
+            sorted([*names, OLD_INDEX, OLDER_INDEX]),
+        )
+
+    def test_rollback(self):
+        self.assertEqual(OLDER_INDEX, reindex.rollback())
+        self.assertEqual(
+            [
+                {"remove": {"index": OLD_INDEX, "alias": "quran-aya"}},
+                {"add": {"index": OLDER_INDEX, "alias": "quran-aya"}},
+            ],
+            self.get_actions(),
+        )
+
+        self.client.indices.get_alias.return_value = {OLDER_INDEX: {}}
+        with self.assertRaises(reindex.ReindexError):
+            reindex.rollback()
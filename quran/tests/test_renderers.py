@@ -0,0 +1,95 @@
+import json
+from unittest import skipUnless
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import renderers, status
+
+from api.renderers import JSONRenderer, msgpack, orjson
+from quran.models import Aya
+from quran.serializers import AyaSerializer, SoraSerializer
+from quran.views import SoraViewSet, ayas_queryset
+
+
+class TestValuesData(TestCase):
+    def test_same_as_serializer(self):
+        ayas = ayas_queryset.filter(sora__number=2).order_by("number")
+
+        with self.assertNumQueries(1):
+            data = AyaSerializer.values_data(ayas)
+        self.assertEqual(AyaSerializer(ayas, many=True).data, data)
+
+        soras = SoraViewSet.queryset.order_by("number")
+        self.assertEqual(
+            SoraSerializer(soras, many=True).data, SoraSerializer.values_data(soras)
+        )
+
+    def test_fields(self):
+        ayas = ayas_queryset.filter(sora__number=1).order_by("number")[:2]
+        self.assertEqual(
+            [{"sora": 1, "verse_key": "1:1"}, {"sora": 1, "verse_key": "1:2"}],
+            AyaSerializer.values_data(ayas, ["sora", "verse_key"]),
+        )
+
+
+@skipUnless(orjson, "orjson isn't installed")
+class TestJSONRenderer(TestCase):
+    def test_same_as_rest_framework(self):
+        ayas = Aya.objects.filter(sora__number=2).order_by("number")
+        data = {
+            "ayas": AyaSerializer(ayas, many=True).data,
+            "separators": "  ",
+            1: None,
+        }
+        self.assertEqual(
+            renderers.JSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_wide_integers(self):
+        data = {"count": 2**70, "ids": [-(2**64)]}
+        self.assertEqual(
+            renderers.JSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_floats(self):
+        self.assertEqual(b"[0.5,1e20,1e-7]", JSONRenderer().render([0.5, 1e20, 1e-7]))
+        self.assertEqual(
+            b"[0.5,1e+20,1e-07]", renderers.JSONRenderer().render([0.5, 1e20, 1e-7])
+        )
+
+    def test_nan(self):
+        data = [float("nan"), float("inf"), float("-inf")]
+        self.assertEqual(b"[null,null,null]", JSONRenderer().render(data))
+        with self.assertRaises(ValueError):
+            renderers.JSONRenderer().render(data)
+
+    def test_indent(self):
+        data = {"number": 1}
+        self.assertEqual(
+            b'{\n  "number": 1\n}',
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+
+
+@override_settings(QURAN_RESPONSE_CACHE_ENABLED=False)
+class TestNegotiation(TestCase):
+    def test_json(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 1})
+
+        response = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(7, len(json.loads(response.content)))
+        self.assertIn("Accept", response["Vary"])
+
+    @skipUnless(msgpack, "msgpack isn't installed")
+    def test_msgpack(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 1})
+
+        json_response = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual("application/msgpack", response["Content-Type"])
+        self.assertEqual(
+            json.loads(json_response.content), msgpack.unpackb(response.content)
+        )
+        self.assertNotEqual(json_response["ETag"], response["ETag"])
@@ -0,0 +1,98 @@
+import gc
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.test import TestCase, override_settings
+
+from api import startup
+from quran.cache import response_cache
+from quran.hits import hit_buffer
+
+
+class TestStartup(TestCase):
+    def setUp(self):
+        hit_buffer.clear()
+        self.addCleanup(hit_buffer.clear)
+
+    @override_settings(QURAN_HIT_COUNTING_ENABLED=True)
+    def test_warmup(self):
+        # The search endpoints of Elasticsearch aren't warmed up.
+        with mock.patch.object(startup, "logger") as logger:
+            self.assertEqual(startup.warmup(), 0)
+
+        logger.warning.assert_not_called()
+        logger.exception.assert_not_called()
+        self.assertEqual(len(hit_buffer), 0)
+        self.assertEqual(response_cache.stats()["entries"], 0)
+
+    def test_warmup_urls(self):
+        self.assertNotIn("/api/search/aya/", " ".join(startup.warmup_urls()))
+
+        with override_settings(SEARCH_BACKEND="local"):
+            self.assertIn("/api/search/aya/", " ".join(startup.warmup_urls()))
+
+    @override_settings(ALLOWED_HOSTS=[".example.com", "api.example.com"])
+    def test_warmup_host(self):
+        self.assertEqual(startup.warmup_host(), "example.com")
+
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            self.assertEqual(startup.warmup_host(), "localhost")
+
+    def test_warmup_failure(self):
+        with mock.patch.object(startup, "warmup_urls", return_value=["/missing/"]):
+            with self.assertLogs("api.startup", "WARNING"):
+                self.assertEqual(startup.warmup(), 1)
+
+    @mock.patch("api.startup.gc.freeze")
+    @mock.patch("api.startup.connections")
+    def test_prepare(self, connections, freeze):
+        timings = startup.prepare()
+
+        self.assertEqual(timings["warmup_failures"], 0)
+        self.assertGreater(timings["build_ms"], 0)
+        connections.close_all.assert_called_once()
+        freeze.assert_called_once()
+
+    def test_warmup_request(self):
+        application = get_wsgi_application()
+        self.assertEqual(
+            200, startup.warmup_request(application, "/api/quran/juz/30/", "testserver")
+        )
+        self.assertEqual(
+            404, startup.warmup_request(application, "/api/quran/juz/31/", "testserver")
+        )
+
+    @mock.patch("api.startup.gc.freeze")
+    @mock.patch("api.startup.connections")
+    def test_prepare_failure(self, connections, freeze):
+        with mock.patch.object(startup, "build", side_effect=RuntimeError("no db")):
+            with self.assertLogs("api.startup", "ERROR"):
+                self.assertIsNone(startup.prepare())
+
+        connections.close_all.assert_called_once()
+        freeze.assert_called_once()
+
+    def test_when_ready_enables_gc(self):
+        self.addCleanup(gc.enable)
+        config = runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+        self.assertFalse(gc.isenabled())
+
+        server = mock.Mock()
+        with mock.patch.object(startup, "prepare", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                config["when_ready"](server)
+        self.assertTrue(gc.isenabled())
+
+        gc.disable()
+        with mock.patch.object(startup, "prepare", return_value=None):
+            config["when_ready"](server)
+        self.assertTrue(gc.isenabled())
+        server.log.warning.assert_called_once()
+
+    def test_memory_usage(self):
+        usage = startup.memory_usage()
+
+        self.assertGreater(usage["rss"], 0)
+        self.assertRegex(startup.format_memory(usage), r"^rss \d+\.\d MiB")
@@ -0,0 +1,58 @@
+import uuid
+
+from ddt import data, ddt
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from quran.verse_keys import MAX_AYAS, MAX_RANGES, parse_aya_lookup, parse_verse_keys
+
+
+@ddt
+class TestParseVerseKeys(SimpleTestCase):
+    def test_single(self):
+        self.assertEqual([(2, 255, 255)], parse_verse_keys("2:255"))
+
+    def test_ranges(self):
+        self.assertEqual(
+            [(1, 1, 1), (2, 1, 5), (112, 1, 4)],
+            parse_verse_keys("1:1, 2:1-5,112:1-4"),
+        )
+
+    @data(
+        None,
+        "",
+        "2",
+        "2:",
+        ":1",
+        "2:a",
+        "2:1-",
+        "2:0",
+        "2:5-1",
+        "1:1;2:1",
+        "1:1,,2:1",
+        "1000:1",
+    )
+    def test_invalid(self, expression):
+        with self.assertRaises(ValidationError):
+            parse_verse_keys(expression)
+
+    def test_limits(self):
+        with self.assertRaises(ValidationError):
+            parse_verse_keys(",".join(["1:1"] * (MAX_RANGES + 1)))
+
+        with self.assertRaises(ValidationError):
+            parse_verse_keys(f"2:1-{MAX_AYAS // 2},3:1-{MAX_AYAS // 2 + 1}")
+
+        with self.assertRaises(ValidationError):
+            parse_verse_keys("1:1," * 1000)
+
+
+class TestParseAyaLookup(SimpleTestCase):
+    def test_lookups(self):
+        pk = uuid.uuid4()
+        self.assertEqual(("ordinal", 262), parse_aya_lookup("262"))
+        self.assertEqual(("verse_key", "2:255"), parse_aya_lookup("02:255"))
+        self.assertEqual(("pk", pk), parse_aya_lookup(str(pk)))
+
+        for value in ("12345", "2:", "1:2:3", "not-a-uuid"):
+            self.assertIsNone(parse_aya_lookup(value))
@@ -1,7 +1,7 @@
 from random import randrange
 from uuid import uuid4
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.dateparse import parse_datetime
 from rest_framework import status
@@ -130,7 +130,7 @@ class TestAyaViewSet(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
-        self.assertEqual(11, len(response.data))
+        self.assertEqual(13, len(response.data))
 
         instance = Aya.objects.get(pk=aya.pk)
         self.assertEqual(str(instance.id), response.data["id"])
@@ -142,10 +142,31 @@ class TestAyaViewSet(TestCase):
         self.assertEqual(instance.page, response.data["page"])
         self.assertEqual(instance.line_start, response.data["line_start"])
         self.assertEqual(instance.line_end, response.data["line_end"])
+        self.assertEqual(instance.ordinal, response.data["ordinal"])
+        self.assertEqual(instance.verse_key, response.data["verse_key"])
 
         self.assertEqual(instance.created, parse_datetime(response.data["created"]))
         self.assertEqual(instance.updated, parse_datetime(response.data["updated"]))
 
+    @override_settings(QURAN_CORPUS_ENABLED=False)
+    def test_retrieve_by_ordinal_and_verse_key(self):
+        aya = Aya.objects.get(sora__number=2, number=255)
+        self.assertEqual(262, aya.ordinal)
+        self.assertEqual("2:255", aya.verse_key)
+
+        for lookup in (262, "2:255", "002:255", aya.pk):
+            url = reverse("quran:aya-detail", kwargs={"pk": lookup})
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(str(aya.pk), response.data["id"])
+
+        for lookup in (0, 6237, "2:287", "115:1", "2:", uuid4()):
+            url = reverse("quran:aya-detail", kwargs={"pk": lookup})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_delete(self):
         # Pick a random aya
         aya = Aya.objects.order_by("?").first()
@@ -258,6 +279,33 @@ class TestSoraViewSet(TestCase):
         self.assertEqual(instance.created, parse_datetime(response.data["created"]))
         self.assertEqual(instance.updated, parse_datetime(response.data["updated"]))
 
+    @override_settings(QURAN_CORPUS_ENABLED=False, QURAN_RESPONSE_CACHE_ENABLED=False)
+    def test_list_num_queries(self):
+        url = reverse("quran:sora-list")
+        query = (
+            f"?{NumberCursorPagination.page_size_query_param}"
+            f"={NumberCursorPagination.max_page_size}"
+        )
+
+        # One query for all the soras along with their ayas count
+        with self.assertNumQueries(1):
+            response = self.client.get(url + query)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        for result in response.data["results"]:
+            sora = Sora.objects.get(number=result["number"])
+            self.assertEqual(sora.ayas.count(), result["ayas_count"])
+
+    @override_settings(QURAN_CORPUS_ENABLED=False)
+    def test_retrieve_num_queries(self):
+        url = reverse("quran:sora-detail", kwargs={"number": 2})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(286, response.data["ayas_count"])
+
     def test_retrieve_sora_ayas(self):
         # Pick a random sora
         sora = Sora.objects.order_by("?").first()
@@ -269,7 +317,7 @@ class TestSoraViewSet(TestCase):
         self.assertEqual(sora.ayas.count(), len(response.data))
 
         aya_response = response.data[randrange(1, sora.ayas.count())]
-        self.assertEqual(11, len(aya_response))
+        self.assertEqual(13, len(aya_response))
 
         instance = Aya.objects.get(pk=aya_response["id"])
 
@@ -300,7 +348,7 @@ class TestSoraViewSet(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
-        self.assertEqual(11, len(response.data))
+        self.assertEqual(13, len(response.data))
 
         instance = Aya.objects.get(pk=response.data["id"])
 
@@ -386,6 +434,111 @@ class TestSoraViewSet(TestCase):
         )
 
 
+class TestPageViewSet(TestCase):
+    def test_retrieve(self):
+        page = 250
+        url = reverse("quran:page-detail", kwargs={"number": page})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(page, response.data["number"])
+
+        ayas = [aya for line in response.data["lines"] for aya in line["ayas"]]
+        expected = Aya.objects.filter(page=page).order_by("sora__number", "number")
+        self.assertEqual([str(aya.pk) for aya in expected], [aya["id"] for aya in ayas])
+
+        for line in response.data["lines"]:
+            for aya in line["ayas"]:
+                self.assertEqual(line["number"], aya["line_start"])
+                self.assertEqual(page, aya["page"])
+
+    def test_retrieve_bounds(self):
+        for page in (1, 604):
+            url = reverse("quran:page-detail", kwargs={"number": page})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for page in (0, 605):
+            url = reverse("quran:page-detail", kwargs={"number": page})
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(QURAN_CORPUS_ENABLED=False, QURAN_RESPONSE_CACHE_ENABLED=False)
+    def test_retrieve_from_database(self):
+        url = reverse("quran:page-detail", kwargs={"number": 250})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        with self.settings(QURAN_CORPUS_ENABLED=True):
+            self.assertEqual(response.content, self.client.get(url).content)
+
+
+class TestVersesView(TestCase):
+    def get_keys(self, response):
+        return [(aya["sora"], aya["number"]) for aya in response.data]
+
+    def test_get(self):
+        url = reverse("quran:verses")
+        response = self.client.get(url, {"keys": "2:255-257,1:1,112:1-4"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(
+            [(2, 255), (2, 256), (2, 257), (1, 1), (112, 1), (112, 2), (112, 3)]
+            + [(112, 4)],
+            self.get_keys(response),
+        )
+
+        aya = Aya.objects.get(sora__number=2, number=255)
+        self.assertEqual(str(aya.pk), response.data[0]["id"])
+        self.assertEqual(aya.text, response.data[0]["text"])
+        self.assertEqual(13, len(response.data[0]))
+
+    def test_whole_sora(self):
+        url = reverse("quran:verses")
+        response = self.client.get(url, {"keys": "1:1-7"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(
+            [(1, number) for number in range(1, 8)], self.get_keys(response)
+        )
+
+    def test_invalid(self):
+        url = reverse("quran:verses")
+
+        for query in ({}, {"keys": "2"}, {"keys": "2:5-1"}):
+            response = self.client.get(url, query)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, msg=response.data
+            )
+
+    def test_not_found(self):
+        url = reverse("quran:verses")
+
+        for keys in ("1:1-8", "115:1", "1:1,2:287"):
+            response = self.client.get(url, {"keys": keys})
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, msg=response.data
+            )
+
+    @override_settings(QURAN_CORPUS_ENABLED=False, QURAN_RESPONSE_CACHE_ENABLED=False)
+    def test_get_from_database(self):
+        url = reverse("quran:verses")
+        query = {"keys": "2:255-257,1:1,112:1-4,1:1"}
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, query)
+
+        with self.settings(QURAN_CORPUS_ENABLED=True):
+            self.assertEqual(response.content, self.client.get(url, query).content)
+
+        for keys in ("1:1-8", "115:1"):
+            response = self.client.get(url, {"keys": keys})
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, msg=response.data
+            )
+
+
 class TestQuranMetadataView(TestCase):
     def test_get(self):
         url = reverse("quran:metadata")
@@ -397,3 +550,77 @@ class TestQuranMetadataView(TestCase):
         self.assertEqual(response.data["aya_count"], Aya.objects.count())
         self.assertEqual(response.data["sora_count"], Sora.objects.count())
         self.assertEqual(response.data["juz_count"], Juz.objects.count())
+
+
+@override_settings(QURAN_CORPUS_ENABLED=False)
+class TestSparseFieldsets(TestCase):
+    def test_fields(self):
+        url = reverse("quran:aya-detail", kwargs={"pk": "2:255"})
+
+        with self.assertNumQueries(1) as context:
+            response = self.client.get(url, {"fields": "number,text"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(["text", "number"], list(response.data))
+        self.assertNotIn("clean_text", context.captured_queries[0]["sql"])
+        self.assertNotIn("quran_sora", context.captured_queries[0]["sql"])
+
+    def test_omit(self):
+        url = reverse("quran:sora-ayas", kwargs={"number": 1})
+
+        response = self.client.get(url, {"omit": "text,clean_text,created,updated"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(7, len(response.data))
+        self.assertEqual(
+            {
+                "id",
+                "sora",
+                "juz",
+                "number",
+                "page",
+                "line_start",
+                "line_end",
+                "ordinal",
+                "verse_key",
+            },
+            set(response.data[0]),
+        )
+
+    def test_list_cursor(self):
+        url = reverse("quran:aya-list")
+
+        response = self.client.get(url, {"fields": "verse_key", "page_size": 2})
+        self.assertEqual(
+            [{"verse_key": "1:1"}, {"verse_key": "1:2"}], response.data["results"]
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [{"verse_key": "1:3"}, {"verse_key": "1:4"}], response.data["results"]
+        )
+
+    def test_unknown_field(self):
+        url = reverse("quran:sora-list")
+
+        response = self.client.get(url, {"fields": "number,text"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+
+    def test_verses_and_page(self):
+        for url, query in (
+            (reverse("quran:verses"), {"keys": "1:1-7,2:255"}),
+            (reverse("quran:page-detail", kwargs={"number": 250}), {}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, {**query, "fields": "verse_key"})
+                self.assertEqual(
+                    response.status_code, status.HTTP_200_OK, msg=response.data
+                )
+
+                data = response.data
+                ayas = data if isinstance(data, list) else data["lines"][0]["ayas"]
+                self.assertEqual(["verse_key"], list(ayas[0]))
+
+                response = self.client.get(url, {**query, "omit": "bogus"})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
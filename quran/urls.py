@@ -1,15 +1,35 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from quran.views import AyaViewSet, JuzViewSet, QuranMetadataView, SoraViewSet
+from api.async_views import async_urlpatterns
+from quran.views import (
+    AyaViewSet,
+    ExportView,
+    JuzViewSet,
+    PageViewSet,
+    QuranMetadataView,
+    ResponseCacheStatsView,
+    SoraViewSet,
+    VersesView,
+    WordViewSet,
+)
 
 router = routers.DefaultRouter()
 router.register(r"aya", AyaViewSet)
 router.register(r"juz", JuzViewSet)
 router.register(r"sora", SoraViewSet)
+router.register(r"page", PageViewSet, basename="page")
+router.register(r"word", WordViewSet, basename="word")
 
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("verses/", VersesView.as_view(), name="verses"),
+    path("export/<str:export_format>/", ExportView.as_view(), name="export"),
     path("metadata/", QuranMetadataView.as_view(), name="metadata"),
+    path("cache/", ResponseCacheStatsView.as_view(), name="cache-stats"),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns(urlpatterns)
@@ -0,0 +1,77 @@
+"""
+Verse key expressions, e.g. "2:255-257" or "1:1,2:1-5,112:1-4".
+
+An expression is a comma separated list of ``sora:aya`` keys or ``sora:first-last``
+ranges of ayas in a sora. A single aya is also looked up by its verse key or by its
+ordinal in the whole Quran, see ``parse_aya_lookup``.
+"""
+import re
+import uuid
+
+from rest_framework.exceptions import ValidationError
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_RANGES = 100
+MAX_AYAS = 1000
+
+verse_range_re = re.compile(r"^(\d{1,3}):(\d{1,3})(?:-(\d{1,3}))?$")
+verse_key_re = re.compile(r"^(\d{1,3}):(\d{1,3})$")
+ordinal_re = re.compile(r"^\d{1,4}$")
+
+
+def parse_verse_keys(expression):
+    """
+    Parses a verse key expression into a list of (sora, first aya, last aya)
+    triples, in the order they're given.
+    """
+    expression = (expression or "").replace(" ", "")
+    if not expression:
+        raise ValidationError("Expected verse keys such as 1:1,2:1-5.")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValidationError(
+            f"Verse keys are limited to {MAX_EXPRESSION_LENGTH} characters."
+        )
+
+    parts = expression.split(",")
+    if len(parts) > MAX_RANGES:
+        raise ValidationError(f"Verse keys are limited to {MAX_RANGES} ranges.")
+
+    ranges = []
+    for part in parts:
+        match = verse_range_re.match(part)
+        if match is None:
+            raise ValidationError(f"Invalid verse key {part!r}.")
+
+        sora, first, last = match.groups()
+        sora, first = int(sora), int(first)
+        last = first if last is None else int(last)
+        if first < 1 or last < first:
+            raise ValidationError(f"Invalid range of ayas {part!r}.")
+
+        ranges.append((sora, first, last))
+
+    if sum(last - first + 1 for _, first, last in ranges) > MAX_AYAS:
+        raise ValidationError(f"Verse keys are limited to {MAX_AYAS} ayas.")
+
+    return ranges
+
+
+def parse_aya_lookup(value):
+    """
+    Parses the lookup value of an aya, its ordinal, its verse key or its UUID, into
+    a (field, value) pair, e.g. ("verse_key", "2:255"). Returns None when it's none
+    of them.
+    """
+    value = str(value)
+    if ordinal_re.match(value):
+        return "ordinal", int(value)
+
+    match = verse_key_re.match(value)
+    if match is not None:
+        sora, number = map(int, match.groups())
+        return "verse_key", f"{sora}:{number}"
+
+    try:
+        return "pk", uuid.UUID(value)
+    except ValueError:
+        return None
@@ -1,3 +1,10 @@
+import uuid
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
@@ -5,10 +12,205 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from quran import pagination, serializers
-from quran.models import Aya, Juz, Sora
+from quran.cache import response_cache
+from quran.corpus import corpus_loaded, get_corpus
+from quran.export import EXPORT_FORMATS, export_queryset, iter_export
+from quran.hits import hit_buffer
+from quran.models import Aya, Juz, Sora, ViewCount
+from quran.verse_keys import parse_aya_lookup, parse_verse_keys
+
+# Everything AyaSerializer renders, fetched along with the aya in a single query.
+ayas_queryset = Aya.objects.select_related("sora", "juz").only(
+    *serializers.AyaSerializer.Meta.fields, "sora__number", "juz__number"
+)
+
+
+class InMemoryMixin:
+    """
+    Declares the ``memory_actions`` answered from the corpus alone once it's loaded,
+    which run in the event loop under ASGI, see ``api.async_views``.
+    """
+
+    memory_actions = ()
+
+    @classmethod
+    def answers_from_memory(cls, request, action):
+        # The browsable API renders templates, and looks the user up.
+        return (
+            action in cls.memory_actions
+            and settings.QURAN_CORPUS_ENABLED
+            and corpus_loaded()
+            and "text/html" not in request.headers.get("Accept", "")
+        )
+
+    def perform_authentication(self, request):
+        # The corpus is public: the user is only looked up when it's used, so
+        # reading the session doesn't query the database from the event loop.
+        pass
+
+
+class CorpusMixin(InMemoryMixin):
+    """
+    Serves list and retrieve from the in-process corpus (see ``quran.corpus``)
+    instead of the database, unless ``QURAN_CORPUS_ENABLED`` is turned off.
+    """
+
+    # The name of the corpus rows to list, and of the corpus method returning a
+    # single object by its lookup value.
+    corpus_rows = None
+    corpus_lookup = None
+    memory_actions = ("list", "retrieve")
+
+    @property
+    def corpus(self):
+        if settings.QURAN_CORPUS_ENABLED:
+            return get_corpus()
+        return None
+
+    def list(self, request, *args, **kwargs):
+        if self.corpus is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = getattr(self.corpus, self.corpus_rows)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+
+        return Response(list(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.corpus is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        data = getattr(self.corpus, self.corpus_lookup)(self.kwargs[lookup_url_kwarg])
+        if data is None:
+            raise Http404
+
+        return Response(data)
+
+
+class SparseFieldsetMixin:
+    """
+    Serves ?fields=number,text and ?omit=created,updated: the other fields of the
+    serializer are left out of the responses, and out of the queries.
+
+    The serializers still render the ``id``, hits are counted by it, and it's
+    dropped from the response along with the corpus fields that weren't asked for.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.sparse_fields = self.get_serializer_class().sparse_fields(
+            request.query_params
+        )
+
+    def sparse_queryset(self, queryset):
+        if self.sparse_fields is None:
+            return queryset
+
+        # The paginator reads the ordering column off the rows for its cursors.
+        ordering = getattr(self.pagination_class, "ordering", "").lstrip("-")
+        return self.get_serializer_class().prune_queryset(
+            queryset, self.sparse_fields, *filter(None, [ordering])
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_serializer_class().Meta.model is not queryset.model:
+            return queryset
+        return self.sparse_queryset(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.sparse_fields is not None:
+            kwargs.setdefault("fields", ["id", *self.sparse_fields])
+        return super().get_serializer(*args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "sparse_fields", None) is None or response.status_code != 200:
+            return response
+
+        data = response.data
+        if isinstance(data, dict) and "results" in data:
+            data = data["results"]
+        dropped = set(self.get_serializer_class().Meta.fields) - set(self.sparse_fields)
+        for item in data if isinstance(data, list) else [data]:
+            for name in dropped:
+                item.pop(name, None)
+        return response
+
+
+class SparseAyasMixin:
+    """
+    Serves ?fields= and ?omit= on the views nesting the ayas of ``AyaSerializer``
+    in responses of their own, like ``SparseFieldsetMixin`` does.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.sparse_fields = serializers.AyaSerializer.sparse_fields(
+            request.query_params
+        )
+
+    def values_fields(self, *needed):
+        """
+        The fields to read from the database, the ``needed`` ones to build the
+        response along with the ones asked for, or None for all of them.
+        """
+        if self.sparse_fields is None:
+            return None
+        return [
+            name
+            for name in serializers.AyaSerializer.Meta.fields
+            if name in self.sparse_fields or name in needed
+        ]
+
+    def sparse_ayas(self, ayas):
+        if self.sparse_fields is None:
+            return ayas
+        return [{name: aya[name] for name in self.sparse_fields} for aya in ayas]
+
+
+class ViewCountMixin:
+    """
+    Counts the views of the retrieved objects in the hit buffer (see
+    ``quran.hits``), and lists the most viewed ones, e.g. most-viewed/?size=5.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        hit_buffer.record(self.queryset.model, response.data["id"])
+        return response
+
+    @action(methods=["GET"], detail=False, url_path="most-viewed")
+    def most_viewed(self, request, *args, **kwargs):
+        params = serializers.MostViewedSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        opts = self.queryset.model._meta
+        counts = dict(
+            ViewCount.objects.filter(
+                content_type__app_label=opts.app_label,
+                content_type__model=opts.model_name,
+            )
+            .order_by("-hits", "object_id")
+            .values_list("object_id", "hits")[: params.validated_data["size"]]
+        )
+
+        objects = self.get_queryset().filter(pk__in=counts)
+        data = self.get_serializer(objects, many=True).data
+        return Response(
+            sorted(
+                ({**item, "hits": counts[uuid.UUID(item["id"])]} for item in data),
+                key=lambda item: (-item["hits"], item["id"]),
+            )
+        )
 
 
 class JuzViewSet(
+    SparseFieldsetMixin,
+    CorpusMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
@@ -17,53 +219,285 @@ class JuzViewSet(
     serializer_class = serializers.JuzSerializer
     lookup_field = "number"
     pagination_class = pagination.NumberCursorPagination
+    corpus_rows = "juzs"
+    corpus_lookup = "juz"
+    query_budgets = {"list": 1, "retrieve": 1}
 
 
 class SoraViewSet(
+    SparseFieldsetMixin,
+    ViewCountMixin,
+    CorpusMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Sora.objects.all()
+    queryset = Sora.objects.annotate(ayas_count=Count("ayas"))
     serializer_class = serializers.SoraSerializer
     lookup_field = "number"
     pagination_class = pagination.NumberCursorPagination
+    corpus_rows = "soras"
+    corpus_lookup = "sora"
+    query_budgets = {
+        "list": 1,
+        "retrieve": 1,
+        "ayas": 2,
+        "ayas_detail": 2,
+        "most_viewed": 2,
+    }
+    memory_actions = ("list", "retrieve", "ayas", "ayas_detail")
+
+    def get_serializer_class(self):
+        if self.action in ("ayas", "ayas_detail"):
+            return serializers.AyaSerializer
+        return super().get_serializer_class()
 
     @action(methods=["GET"], detail=True)
     def ayas(self, *args, **kwargs):
+        if self.corpus is not None:
+            ayas = self.corpus.sora_ayas(kwargs["number"])
+            if ayas is None:
+                raise Http404
+
+            return Response(ayas)
+
         sora = self.get_object()
-        ayas = sora.ayas.all().order_by("number")
+        ayas = ayas_queryset.filter(sora=sora).order_by("number")
 
-        serializer = serializers.AyaSerializer(ayas, many=True)
-        return Response(serializer.data)
+        fields = None if self.sparse_fields is None else ["id", *self.sparse_fields]
+        return Response(serializers.AyaSerializer.values_data(ayas, fields))
 
     @action(methods=["GET"], detail=True, url_path=r"ayas/(?P<aya_number>\d+)")
     def ayas_detail(self, *args, **kwargs):
-        sora = self.get_object()
         aya_number = kwargs.get("aya_number")
 
-        aya = get_object_or_404(Aya.objects.all(), sora=sora, number=aya_number)
-        serializer = serializers.AyaSerializer(aya, many=False)
+        if self.corpus is not None:
+            aya = self.corpus.sora_aya(kwargs["number"], aya_number)
+            if aya is None:
+                raise Http404
+        else:
+            sora = self.get_object()
+            aya = get_object_or_404(
+                self.sparse_queryset(ayas_queryset), sora=sora, number=aya_number
+            )
+            aya = self.get_serializer(aya, many=False).data
 
-        return Response(serializer.data)
+        hit_buffer.record(Aya, aya["id"])
+        return Response(aya)
 
 
 class AyaViewSet(
+    SparseFieldsetMixin,
+    ViewCountMixin,
+    CorpusMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = Aya.objects.all()
+    queryset = ayas_queryset
     serializer_class = serializers.AyaSerializer
-    pagination_class = pagination.NumberCursorPagination
+    pagination_class = pagination.OrdinalCursorPagination
+    corpus_rows = "ayas"
+    corpus_lookup = "aya"
+    query_budgets = {"list": 1, "retrieve": 1, "most_viewed": 2}
+
+    def get_object(self):
+        """
+        Looks the aya up by its ordinal, e.g. aya/255/, its verse key, e.g.
+        aya/2:255/, or its UUID.
+        """
+        lookup = parse_aya_lookup(self.kwargs[self.lookup_field])
+        if lookup is None:
+            raise Http404
+
+        field, value = lookup
+        aya = get_object_or_404(
+            self.filter_queryset(self.get_queryset()), **{field: value}
+        )
+        self.check_object_permissions(self.request, aya)
+        return aya
+
 
+class PageViewSet(SparseAyasMixin, InMemoryMixin, viewsets.ViewSet):
+    """
+    The ayas of a page of the mushaf, grouped by the line they start on.
+    """
+
+    lookup_field = "number"
+    lookup_value_regex = r"\d+"
+    query_budgets = {"retrieve": 1}
+    memory_actions = ("retrieve",)
+
+    def retrieve(self, request, number=None):
+        if settings.QURAN_CORPUS_ENABLED:
+            lines = get_corpus().page_lines_data(number)
+        else:
+            ayas = ayas_queryset.filter(page=number).order_by("sora__number", "number")
+            data = serializers.AyaSerializer.values_data(
+                ayas, self.values_fields("line_start")
+            )
+            lines = [
+                (line, list(line_ayas))
+                for line, line_ayas in groupby(data, key=itemgetter("line_start"))
+            ]
+
+        if not lines:
+            raise Http404
+
+        return Response(
+            {
+                "number": int(number),
+                "lines": [
+                    {"number": line, "ayas": self.sparse_ayas(line_ayas)}
+                    for line, line_ayas in lines
+                ],
+            }
+        )
+
+
+class WordViewSet(viewsets.ViewSet):
+    """
+    The words of the ayas from the concordance of the corpus (see
+    ``quran.concordance``): the most frequent ones, e.g. ?size=10, the occurrences
+    of a word and its counts by sora and juz.
+    """
+
+    lookup_field = "word"
+    lookup_value_regex = r"[^/]+"
+    query_budgets = {"list": 0, "retrieve": 0, "counts": 0}
+
+    def get_concordance(self):
+        return get_corpus().concordance
+
+    def list(self, request):
+        params = serializers.WordFrequenciesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        words = self.get_concordance().most_common(params.validated_data["size"])
+        return Response([{"word": word, "count": count} for word, count in words])
+
+    def retrieve(self, request, word=None):
+        occurrences = self.get_concordance().occurrences(word)
+        if occurrences is None:
+            raise Http404
+
+        return Response(
+            {
+                "word": word,
+                "count": len(occurrences),
+                "occurrences": [
+                    {"sora": sora, "aya": aya, "position": position}
+                    for sora, aya, position in occurrences
+                ],
+            }
+        )
+
+    @action(methods=["GET"], detail=True)
+    def counts(self, request, word=None):
+        concordance = self.get_concordance()
+        soras = concordance.sora_frequencies(word)
+        if soras is None:
+            raise Http404
+
+        return Response(
+            {
+                "word": word,
+                "count": concordance.count(word),
+                "soras": [{"sora": sora, "count": count} for sora, count in soras],
+                "juzs": [
+                    {"juz": juz, "count": count}
+                    for juz, count in concordance.juz_frequencies(word)
+                ],
+            }
+        )
 
-class QuranMetadataView(APIView):
+
+class VersesView(SparseAyasMixin, InMemoryMixin, APIView):
+    """
+    View to fetch many ayas at once by their verse keys, e.g. ?keys=1:1,2:255-257.
+    The ayas are returned in the order they're requested.
+    """
+
+    query_budgets = {"get": 1}
+    memory_actions = ("get",)
+
+    def get(self, request, *args, **kwargs):
+        ranges = parse_verse_keys(request.query_params.get("keys"))
+
+        if settings.QURAN_CORPUS_ENABLED:
+            corpus = get_corpus()
+            ayas = []
+            for sora, first, last in ranges:
+                rows = corpus.verse_range_rows(sora, first, last)
+                if rows is None:
+                    raise Http404(f"No ayas {sora}:{first}-{last}.")
+                ayas.extend(corpus.aya_data(row) for row in rows)
+
+            return Response(self.sparse_ayas(ayas))
+
+        condition = Q()
+        for sora, first, last in ranges:
+            condition |= Q(sora__number=sora, number__range=(first, last))
+
+        data = serializers.AyaSerializer.values_data(
+            ayas_queryset.filter(condition), self.values_fields("sora", "number")
+        )
+        by_key = {(aya["sora"], aya["number"]): aya for aya in data}
+
+        ayas = []
+        for sora, first, last in ranges:
+            for number in range(first, last + 1):
+                if (sora, number) not in by_key:
+                    raise Http404(f"No ayas {sora}:{first}-{last}.")
+                ayas.append(by_key[sora, number])
+
+        return Response(self.sparse_ayas(ayas))
+
+
+class ExportView(APIView):
+    """
+    View to stream all the ayas, optionally filtered by sora, juz or page, as
+    NDJSON or CSV.
+    """
+
+    query_budgets = {"get": 1}
+
+    def get(self, request, export_format, *args, **kwargs):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+
+        filters = serializers.ExportFiltersSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        response = StreamingHttpResponse(
+            iter_export(export_format, export_queryset(**filters.validated_data)),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="quran-ayas.{export_format}"'
+        return response
+
+
+class QuranMetadataView(InMemoryMixin, APIView):
     """
     View to list all quran metadata.
     """
 
+    query_budgets = {"get": 3}
+    memory_actions = ("get",)
+
     def get(self, *args, **kwargs):
+        if settings.QURAN_CORPUS_ENABLED:
+            corpus = get_corpus()
+            return Response(
+                {
+                    "aya_count": corpus.aya_count,
+                    "sora_count": corpus.sora_count,
+                    "juz_count": corpus.juz_count,
+                }
+            )
+
         return Response(
             {
                 "aya_count": Aya.objects.count(),
@@ -71,3 +505,14 @@ class QuranMetadataView(APIView):
                 "juz_count": Juz.objects.count(),
             }
         )
+
+
+class ResponseCacheStatsView(APIView):
+    """
+    View to report the usage of this worker's response cache.
+    """
+
+    query_budgets = {"get": 0}
+
+    def get(self, *args, **kwargs):
+        return Response(response_cache.stats())
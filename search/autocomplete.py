@@ -0,0 +1,145 @@
+"""
+Autocompletion of the words of the ayas and of the names of the soras.
+
+Completions are kept in a sorted array, so the ones starting with a prefix are a
+contiguous range found by binary search. A sparse table of the most frequent entry
+of every power-of-two range then gives the most frequent entry of any range in
+constant time, and the top ``size`` of the range are drawn from a heap of ranges
+split around their best entry: ``size`` lookups, however many entries match.
+"""
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+
+from quran.corpus import get_corpus
+
+# Sorts after any character a completion contains.
+LAST_CHARACTER = chr(0x10FFFF)
+
+
+class PrefixIndex:
+    """
+    The completions of a field, ranked by their weight.
+
+    ``entries`` are (text, weight, data) triples, ``data`` being a dict of extra
+    values returned with the text. Prefixes match case insensitively.
+    """
+
+    def __init__(self, entries):
+        entries = sorted(entries, key=lambda entry: (entry[0].lower(), entry[0]))
+        self.keys = [text.lower() for text, _, _ in entries]
+        self.texts = [text for text, _, _ in entries]
+        self.weights = array("I", (weight for _, weight, _ in entries))
+        self.data = [data for _, _, data in entries]
+
+        # table[level][n] is the index of the best entry of [n, n + 2 ** level).
+        self.table = [array("I", range(len(entries)))]
+        width = 1
+        while width * 2 <= len(entries):
+            previous = self.table[-1]
+            self.table.append(
+                array(
+                    "I",
+                    (
+                        self.best(previous[n], previous[n + width])
+                        for n in range(len(entries) - width * 2 + 1)
+                    ),
+                )
+            )
+            width *= 2
+
+    def best(self, first, second):
+        """
+        Of two entries, the heavier one, or the first in alphabetical order.
+        """
+        if self.weights[second] > self.weights[first]:
+            return second
+        return first
+
+    def range_best(self, start, stop):
+        level = (stop - start).bit_length() - 1
+        return self.best(
+            self.table[level][start], self.table[level][stop - (1 << level)]
+        )
+
+    def prefix_range(self, prefix):
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        return start, bisect_left(self.keys, prefix + LAST_CHARACTER, start)
+
+    def complete(self, prefix, size):
+        """
+        The ``size`` heaviest entries starting with ``prefix``, as dicts of their
+        text, weight and data.
+        """
+        start, stop = self.prefix_range(prefix)
+
+        ranges = []
+        if start < stop:
+            best = self.range_best(start, stop)
+            ranges.append((-self.weights[best], best, start, stop))
+
+        completions = []
+        while ranges and len(completions) < size:
+            _, best, start, stop = heapq.heappop(ranges)
+            completions.append(
+                {
+                    "text": self.texts[best],
+                    "weight": self.weights[best],
+                    **self.data[best],
+                }
+            )
+            for sub_start, sub_stop in ((start, best), (best + 1, stop)):
+                if sub_start < sub_stop:
+                    sub_best = self.range_best(sub_start, sub_stop)
+                    heapq.heappush(
+                        ranges, (-self.weights[sub_best], sub_best, sub_start, sub_stop)
+                    )
+        return completions
+
+
+class Autocomplete:
+    """
+    The completions of the corpus: words ranked by their number of occurrences and
+    sora names, Arabic and English, ranked by their number of ayas.
+    """
+
+    def __init__(self, corpus):
+        self.version = corpus.version
+
+        concordance = corpus.concordance
+        words = (
+            (word, concordance.frequency(n), {})
+            for n, word in enumerate(concordance.words)
+        )
+
+        soras = []
+        for row, number in enumerate(corpus.sora_numbers):
+            ayas = corpus.sora_offsets[row + 1] - corpus.sora_offsets[row]
+            for name in (corpus.sora_clean_names_ar[row], corpus.sora_names_en[row]):
+                soras.append((name, ayas, {"sora": number}))
+
+        self.fields = {"clean_text": PrefixIndex(words), "sora": PrefixIndex(soras)}
+
+    def complete(self, field, prefix, size):
+        return self.fields[field].complete(prefix, size)
+
+
+_autocomplete = None
+_autocomplete_lock = threading.Lock()
+
+
+def get_autocomplete():
+    """
+    Returns the completions of this process, building them on first use and again
+    whenever the corpus changes.
+    """
+    global _autocomplete
+
+    corpus = get_corpus()
+    if _autocomplete is None or _autocomplete.version != corpus.version:
+        with _autocomplete_lock:
+            if _autocomplete is None or _autocomplete.version != corpus.version:
+                _autocomplete = Autocomplete(corpus)
+    return _autocomplete
@@ -0,0 +1,260 @@
+import time
+from itertools import cycle
+
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import include, path, reverse
+from django.utils.http import urlencode
+from elasticsearch.exceptions import ElasticsearchException
+from rest_framework.test import APIRequestFactory
+
+from api.async_views import async_urlpatterns
+from api.benchmark import measure, measure_async, measure_concurrently, register
+from quran.corpus import get_corpus
+from search.autocomplete import get_autocomplete
+from search.index import get_search_index
+from search.views import (
+    AutocompleteView,
+    AyaDatabaseSearchView,
+    AyaDocumentView,
+    AyaLocalSearchView,
+)
+
+# The queries of search.tests, and a few more expensive ones
+QUERIES = {
+    "term": {"search": "الصيام"},
+    "rare term": {"search": "الضالين"},
+    "common term": {"search": "الله"},
+    "and": {"search_simple_query_string": "لعنة الله"},
+    "or": {"search_simple_query_string": "(لعنة | الله)"},
+    "phrase": {"search_simple_query_string": '"لعنة الله"'},
+    "ranked": {"search": "الله", "ordering": "-score"},
+}
+
+# What's typed, one keystroke at a time
+TYPED = {"clean_text": ["ياأيها", "الرحمن", "والأرض"], "sora": ["البقرة", "al-baq"]}
+THREADS = (1, 8)
+
+# The latency added to every search of the asgi scenario, like a remote search
+# backend has, the sync workers serving it and the requests in flight over ASGI.
+SEARCH_LATENCY = 0.05
+WORKERS = 4
+CONCURRENCY = (4, 32)
+
+
+def get_backends():
+    """
+    The search views to measure. Elasticsearch is skipped when it can't be
+    reached, PostgreSQL when it's not the database.
+    """
+    backends = {"local": AyaLocalSearchView}
+    if connection.vendor == "postgresql":
+        backends["postgres"] = AyaDatabaseSearchView
+    try:
+        if AyaDocumentView.document._get_connection().ping():
+            backends["elasticsearch"] = AyaDocumentView
+    except ElasticsearchException:
+        pass
+    return backends
+
+
+@register("search")
+def search(requests):
+    """
+    The search backends answering the same queries. The search cache is off so
+    every request is searched.
+    """
+    get_search_index()
+    factory = APIRequestFactory()
+
+    results = []
+    with override_settings(SEARCH_CACHE_ENABLED=False):
+        for label, query in QUERIES.items():
+            for name, view_class in get_backends().items():
+                view = view_class.as_view({"get": "list"})
+                request = factory.get(f"/api/search/aya/?{urlencode(query)}")
+
+                def search_once():
+                    response = view(request)
+                    assert response.status_code == 200, response.status_code
+                    response.render()
+
+                results.append(measure(f"{label} [{name}]", search_once, requests))
+    return results
+
+
+def keystroke_requests(autocomplete):
+    """
+    A request per character typed, for the autocomplete endpoint or else for the
+    suggest action of the search backends.
+    """
+    factory = APIRequestFactory()
+    for field, texts in TYPED.items():
+        for text in texts:
+            for end in range(1, len(text) + 1):
+                if autocomplete:
+                    query = {"field": field, "prefix": text[:end]}
+                else:
+                    query = {f"{field}__completion": text[:end]}
+                yield factory.get(f"/api/search/?{urlencode(query)}")
+
+
+@register("autocomplete")
+def autocomplete(requests):
+    """
+    Keystroke traffic answered by the completions in memory and by the suggest
+    action of the search backends, from one thread and from several at once.
+    """
+    get_search_index()
+    get_autocomplete()
+
+    views = {"autocomplete": AutocompleteView.as_view()}
+    for name, view_class in get_backends().items():
+        views[f"suggest {name}"] = view_class.as_view({"get": "suggest"})
+
+    results = []
+    for name, view in views.items():
+        keystrokes = cycle(list(keystroke_requests(name == "autocomplete")))
+
+        def keystroke():
+            response = view(next(keystrokes))
+            assert response.status_code == 200, response.status_code
+            response.render()
+
+        for threads in THREADS:
+            results.append(
+                measure_concurrently(
+                    f"keystroke [{name}, {threads} threads]",
+                    keystroke,
+                    max(requests // threads, 1),
+                    threads,
+                )
+            )
+    return results
+
+
+@register("search_pages")
+def search_pages(requests):
+    """
+    Deep pages of every aya by page number against by cursor, when Elasticsearch
+    can be reached. The search cache is off so every request reaches it.
+    """
+    if "elasticsearch" not in get_backends():
+        return []
+
+    factory = APIRequestFactory()
+    view = AyaDocumentView.as_view({"get": "list"})
+
+    def get(url):
+        response = view(factory.get(url))
+        assert response.status_code == 200, response.status_code
+        return response
+
+    results = []
+    with override_settings(SEARCH_CACHE_ENABLED=False):
+        # The cursors of the first, the middle and the last page
+        url, cursors = "/api/search/aya/", {}
+        for number in range(1, 63):
+            if number in (1, 31, 62):
+                cursors[number] = url
+            url = get(url).data["next"]
+
+        for number, cursor_url in cursors.items():
+            page_url = f"/api/search/aya/?page={number}"
+            results.append(
+                measure(f"page {number} [page]", lambda: get(page_url), requests)
+            )
+            results.append(
+                measure(f"page {number} [cursor]", lambda: get(cursor_url), requests)
+            )
+    return results
+
+
+class SlowSearchView(AyaLocalSearchView):
+    """
+    The in-process search waiting ``SEARCH_LATENCY`` seconds before it answers.
+    """
+
+    def list(self, request, *args, **kwargs):
+        time.sleep(SEARCH_LATENCY)
+        return super().list(request, *args, **kwargs)
+
+
+class SyncURLConf:
+    urlpatterns = [
+        path("api/quran/", include(("quran.urls", "quran"), namespace="quran")),
+        path(
+            "api/search/aya/",
+            SlowSearchView.as_view({"get": "list"}),
+            name="slow-search",
+        ),
+    ]
+
+
+class AsyncURLConf:
+    urlpatterns = async_urlpatterns(SyncURLConf.urlpatterns)
+
+
+def mixed_urls():
+    """
+    A search for every three reads of the quran endpoints.
+    """
+    search_url = reverse("slow-search", urlconf=SyncURLConf)
+    return [
+        f"{search_url}?{urlencode(QUERIES['term'])}",
+        reverse("quran:sora-detail", kwargs={"number": 2}, urlconf=SyncURLConf),
+        reverse("quran:aya-detail", kwargs={"pk": "2:255"}, urlconf=SyncURLConf),
+        reverse("quran:juz-detail", kwargs={"number": 30}, urlconf=SyncURLConf),
+    ]
+
+
+@register("asgi")
+def asgi(requests):
+    """
+    Mixed traffic of quran reads and searches slowed down by ``SEARCH_LATENCY``,
+    answered by ``WORKERS`` sync workers and by the async views with up to
+    ``CONCURRENCY`` requests in flight. Reads answered from the corpus don't wait
+    behind the searches over ASGI, which only hold the thread of their request.
+    """
+    get_corpus()
+    get_search_index()
+    urls = mixed_urls()
+
+    results = []
+    with override_settings(
+        QURAN_HIT_COUNTING_ENABLED=False, SEARCH_CACHE_ENABLED=False
+    ):
+        with override_settings(ROOT_URLCONF=SyncURLConf):
+            client = Client()
+            sync_urls = cycle(urls)
+
+            def fetch():
+                response = client.get(next(sync_urls))
+                assert response.status_code == 200, response.status_code
+
+            start = time.perf_counter()
+            result = measure_concurrently(
+                "mixed [sync]", fetch, max(requests // WORKERS, 1), WORKERS
+            )
+            rate = result.requests / (time.perf_counter() - start)
+            result.label = f"mixed [sync, {WORKERS} workers, {rate:.0f} req/s]"
+            results.append(result)
+
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            async_client = AsyncClient()
+
+            for concurrency in CONCURRENCY:
+                async_urls = cycle(urls)
+
+                async def fetch():
+                    response = await async_client.get(next(async_urls))
+                    assert response.status_code == 200, response.status_code
+
+                start = time.perf_counter()
+                result = measure_async("mixed [async]", fetch, requests, concurrency)
+                rate = result.requests / (time.perf_counter() - start)
+                result.label = (
+                    f"mixed [async, {concurrency} in flight, {rate:.0f} req/s]"
+                )
+                results.append(result)
+    return results
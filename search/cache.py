@@ -0,0 +1,179 @@
+"""
+A process-wide cache of search results.
+
+Popular searches are answered again and again with the same results, so the data of
+the search responses is kept for ``SEARCH_CACHE_TTL`` seconds in a least recently
+used cache of at most ``SEARCH_CACHE_MAX_ENTRIES`` entries. Keys are built from the
+normalized parameters, so queries differing only in case or spacing share an entry.
+
+Concurrent misses of the same key are collapsed: the first request runs the search
+while the others wait for its result instead of sending the same query again.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+# Free text parameters, normalized like the analyzers of the search backends do.
+TEXT_PARAMS = ("search", "search_simple_query_string")
+
+
+def normalize_text(value):
+    # Only the spacing and the case: the standard analyzer of Elasticsearch keeps
+    # the compatibility forms, e.g. Arabic presentation forms, apart.
+    return " ".join(value.lower().split())
+
+
+def normalize_params(params):
+    """
+    The query parameters as a sorted tuple of (name, values) pairs, where the
+    differences that don't change the results are normalized away. ``page`` is kept
+    even when it's 1, as it switches the pagination from cursors to page numbers.
+    """
+    normalized = []
+    for name, values in params.lists():
+        if name in TEXT_PARAMS:
+            values = [normalize_text(value) for value in values]
+        elif name == "ordering":
+            values = [
+                ",".join(part.strip() for part in value.split(",") if part.strip())
+                for value in values
+            ]
+        normalized.append((name, tuple(values)))
+    return tuple(sorted(normalized))
+
+
+def search_cache_key(request, backend):
+    """
+    Everything the results depend on: the backend, the host as the pagination links
+    are absolute, the path and the normalized parameters.
+    """
+    return (
+        backend,
+        request.get_host(),
+        request.path,
+        normalize_params(request.query_params),
+    )
+
+
+@dataclass
+class Flight:
+    """
+    A search in progress, the requests missing the same key wait for it.
+    """
+
+    done: threading.Event = field(default_factory=threading.Event)
+    value: object = None
+    error: Exception = None
+
+
+class SearchCache:
+    """
+    A least recently used mapping of keys to search results, each expiring
+    ``SEARCH_CACHE_TTL`` seconds after it was stored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        """
+        The cached value, or else the flight to wait for or, when there's none, to
+        run, along with whether this request leads it. Called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, None, False
+
+            del self._entries[key]
+            self.expirations += 1
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            return None, flight, False
+
+        self.misses += 1
+        flight = self._flights[key] = Flight()
+        return None, flight, True
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the value of ``key`` and how it was found: "HIT", "MISS" when it was
+        computed by calling ``compute`` or "COALESCED" when another thread did.
+        """
+        with self._lock:
+            value, flight, leader = self._lookup(key, time.monotonic())
+        if flight is None:
+            return value, "HIT"
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, "COALESCED"
+
+        try:
+            flight.value = compute()
+        except Exception as error:
+            flight.error = error
+            raise
+        else:
+            self.set(key, flight.value)
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.value, "MISS"
+
+    def set(self, key, value):
+        max_entries = settings.SEARCH_CACHE_MAX_ENTRIES
+        expires = time.monotonic() + settings.SEARCH_CACHE_TTL
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = self.misses = self.coalesced = 0
+            self.expirations = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": settings.SEARCH_CACHE_MAX_ENTRIES,
+                "ttl": settings.SEARCH_CACHE_TTL,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "in_flight": len(self._flights),
+            }
+
+
+search_cache = SearchCache()
@@ -0,0 +1,385 @@
+"""
+An in-process full-text index over the clean text of the ayas.
+
+It lets search work without Elasticsearch: the index is built from the corpus on
+first use, postings are kept in compact integer arrays and hits are ranked with
+BM25. Queries follow the ``simple_query_string`` syntax the Elasticsearch backend
+accepts, with "and" as the default operator::
+
+    لعنة الله          both words
+    لعنة | الله        either word
+    "لعنة الله"        the exact phrase
+    الله -لعنة         the first word but not the second
+    رس*               words starting with a prefix
+    (الله | الرحمن) +الرحيم   grouping
+"""
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from quran.corpus import get_corpus
+
+K1 = 1.2
+B = 0.75
+
+word_re = re.compile(r"\w+")
+query_token_re = re.compile(r'"[^"]*"?|[()|+]|-(?=\S)|[^\s()|+"]+')
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase words, like the standard analyzer.
+    """
+    return word_re.findall(text.lower())
+
+
+class Term:
+    def __init__(self, token, prefix=False):
+        self.token = token
+        self.prefix = prefix
+
+
+class Phrase:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+
+class Not:
+    def __init__(self, clause):
+        self.clause = clause
+
+
+class And:
+    def __init__(self, clauses):
+        self.clauses = clauses
+
+
+class Or:
+    def __init__(self, clauses):
+        self.clauses = clauses
+
+
+class QueryParser:
+    """
+    Parses a ``simple_query_string`` query into a tree of clauses. Like
+    Elasticsearch, it never fails: stray operators are ignored.
+    """
+
+    def __init__(self, query):
+        self.tokens = query_token_re.findall(query)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def parse(self):
+        clause = self.parse_or()
+        # Unbalanced closing parentheses, carry on after them
+        while self.position < len(self.tokens):
+            self.position += 1
+            rest = self.parse_or()
+            if rest is not None:
+                clause = rest if clause is None else And([clause, rest])
+        return clause
+
+    def parse_or(self):
+        clauses = [self.parse_and()]
+        while self.peek() == "|":
+            self.position += 1
+            clauses.append(self.parse_and())
+        return self.combine(Or, clauses)
+
+    def parse_and(self):
+        clauses = []
+        while self.peek() not in (None, "|", ")"):
+            if self.peek() == "+":
+                self.position += 1
+            else:
+                clauses.append(self.parse_unary())
+        return self.combine(And, clauses)
+
+    def parse_unary(self):
+        token = self.peek()
+        self.position += 1
+
+        if token == "-":
+            if self.peek() in (None, "|", ")"):
+                return None
+            clause = self.parse_unary()
+            return None if clause is None else Not(clause)
+        if token == "(":
+            clause = self.parse_or()
+            if self.peek() == ")":
+                self.position += 1
+            return clause
+        return self.parse_words(token)
+
+    def parse_words(self, token):
+        words = tokenize(token)
+        if not words:
+            return None
+        if len(words) > 1:
+            return Phrase(words)
+        prefix = token.endswith("*") and not token.startswith('"')
+        return Term(words[0], prefix=prefix)
+
+    @staticmethod
+    def combine(operator, clauses):
+        clauses = [clause for clause in clauses if clause is not None]
+        if len(clauses) > 1:
+            return operator(clauses)
+        return clauses[0] if clauses else None
+
+
+def parse_query(query):
+    """
+    Parses a ``simple_query_string`` query into a tree of clauses, or None when it
+    has no terms.
+    """
+    return QueryParser(query).parse()
+
+
+class SearchIndex:
+    """
+    An inverted index of the clean text of every aya, by corpus row.
+
+    For each term, ``docs`` holds the rows it appears in, ``freqs`` how many times
+    and ``positions`` where, the positions of the n-th row of ``docs`` being
+    ``positions[starts[n]:starts[n + 1]]``.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.version = corpus.version
+
+        postings = defaultdict(lambda: defaultdict(list))
+        self.lengths = array("H")
+        for row, text in enumerate(corpus.aya_clean_texts):
+            tokens = tokenize(text)
+            self.lengths.append(len(tokens))
+            for position, token in enumerate(tokens):
+                postings[token][row].append(position)
+
+        self.terms = sorted(postings)
+        self.docs, self.freqs, self.starts, self.positions = {}, {}, {}, {}
+        for term, rows in postings.items():
+            self.docs[term] = array("H", rows)
+            self.freqs[term] = array("H", (len(found) for found in rows.values()))
+            self.starts[term] = array("I", [0])
+            self.positions[term] = array("H")
+            for found in rows.values():
+                self.positions[term].extend(found)
+                self.starts[term].append(len(self.positions[term]))
+
+        self.count = len(self.lengths)
+        self.average_length = sum(self.lengths) / self.count if self.count else 0
+
+        # The completion suggesters match the start of the whole field value.
+        self.completions = {
+            "clean_text": sorted(
+                (text, row) for row, text in enumerate(corpus.aya_clean_texts)
+            ),
+            "sora": sorted(
+                (corpus.sora_clean_names_ar[corpus.sora_index[sora]], row)
+                for row, sora in enumerate(corpus.aya_soras)
+            ),
+        }
+
+    def term_scores(self, term):
+        """
+        The BM25 score of ``term`` in every row containing it.
+        """
+        docs = self.docs.get(term)
+        if docs is None:
+            return {}
+
+        idf = math.log(1 + (self.count - len(docs) + 0.5) / (len(docs) + 0.5))
+        scores = {}
+        for row, freq in zip(docs, self.freqs[term]):
+            norm = K1 * (1 - B + B * self.lengths[row] / self.average_length)
+            scores[row] = idf * freq * (K1 + 1) / (freq + norm)
+        return scores
+
+    def prefix_scores(self, prefix):
+        scores = defaultdict(float)
+        index = bisect_left(self.terms, prefix)
+        while index < len(self.terms) and self.terms[index].startswith(prefix):
+            for row, score in self.term_scores(self.terms[index]).items():
+                scores[row] += score
+            index += 1
+        return scores
+
+    def term_positions(self, term):
+        """
+        The positions of ``term`` by row.
+        """
+        docs = self.docs.get(term, ())
+        starts, positions = self.starts.get(term), self.positions.get(term)
+
+        found = {}
+        for n, row in enumerate(docs):
+            start, stop = starts[n], starts[n + 1]
+            found[row] = positions[start:stop]
+        return found
+
+    def phrase_scores(self, tokens):
+        if len(tokens) == 1:
+            return self.term_scores(tokens[0])
+
+        scores = [self.term_scores(token) for token in tokens]
+        rows = set(scores[0]).intersection(*scores[1:])
+        if not rows:
+            return {}
+
+        positions = [self.term_positions(token) for token in tokens]
+        matches = {}
+        for row in rows:
+            starts = set(positions[0][row])
+            for offset, found in enumerate(positions[1:], 1):
+                starts &= {position - offset for position in found[row]}
+            if starts:
+                matches[row] = sum(score[row] for score in scores)
+        return matches
+
+    def evaluate(self, clause):
+        """
+        The rows matching ``clause`` with their scores.
+        """
+        return getattr(self, f"evaluate_{type(clause).__name__.lower()}")(clause)
+
+    def evaluate_term(self, clause):
+        if clause.prefix:
+            return self.prefix_scores(clause.token)
+        return self.term_scores(clause.token)
+
+    def evaluate_phrase(self, clause):
+        return self.phrase_scores(clause.tokens)
+
+    def evaluate_not(self, clause):
+        excluded = self.evaluate(clause.clause)
+        return {row: 0.0 for row in range(self.count) if row not in excluded}
+
+    def evaluate_or(self, clause):
+        scores = defaultdict(float)
+        for child in clause.clauses:
+            for row, score in self.evaluate(child).items():
+                scores[row] += score
+        return scores
+
+    def evaluate_and(self, clause):
+        # Negated clauses only exclude rows, they don't score
+        included = [c for c in clause.clauses if not isinstance(c, Not)]
+        excluded = [c for c in clause.clauses if isinstance(c, Not)]
+
+        if included:
+            results = [self.evaluate(child) for child in included]
+            rows = set(results[0]).intersection(*results[1:])
+            scores = {row: sum(result[row] for result in results) for row in rows}
+        else:
+            scores = {row: 0.0 for row in range(self.count)}
+
+        for child in excluded:
+            for row in self.evaluate(child.clause):
+                scores.pop(row, None)
+        return scores
+
+    def search(self, query):
+        """
+        The rows matching a ``simple_query_string`` query with their scores, every
+        row when there are no terms.
+        """
+        clause = parse_query(query)
+        if clause is None:
+            return {row: 0.0 for row in range(self.count)}
+        return dict(self.evaluate(clause))
+
+    def match_phrase(self, query):
+        """
+        The rows matching ``query`` as a phrase, or as an aya number or id, with
+        their scores. Every row matches a query without terms.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {row: 0.0 for row in range(self.count)}
+
+        scores = dict(self.phrase_scores(tokens))
+        query = query.strip()
+        if query.isdigit():
+            number = int(query)
+            for row, aya_number in enumerate(self.corpus.aya_numbers):
+                if aya_number == number:
+                    scores.setdefault(row, 1.0)
+        row = self.corpus.aya_index.get(query)
+        if row is not None:
+            scores.setdefault(row, 1.0)
+        return scores
+
+    def complete(self, field, prefix, size):
+        """
+        The first ``size`` rows whose ``field`` starts with ``prefix``, as
+        (text, row) pairs.
+        """
+        completions = self.completions[field]
+        index = bisect_left(completions, (prefix,))
+
+        matches = []
+        while (
+            len(matches) < size
+            and index < len(completions)
+            and completions[index][0].startswith(prefix)
+        ):
+            matches.append(completions[index])
+            index += 1
+        return matches
+
+    def document(self, row):
+        """
+        The representation of the aya at ``row`` as it's indexed in Elasticsearch
+        by ``quran.documents.AyaDocument``.
+        """
+        corpus = self.corpus
+        sora = corpus.sora_index[corpus.aya_soras[row]]
+        juz = corpus.juz_index[corpus.aya_juzs[row]]
+        return {
+            "id": corpus.aya_ids[row],
+            "text": corpus.aya_texts[row],
+            "clean_text": corpus.aya_clean_texts[row],
+            "sora": {
+                "id": corpus.sora_ids[sora],
+                "name_en": corpus.sora_names_en[sora],
+                "name_ar": corpus.sora_names_ar[sora],
+                "clean_name_ar": corpus.sora_clean_names_ar[sora],
+                "number": corpus.sora_numbers[sora],
+            },
+            "juz": {
+                "id": corpus.juz_ids[juz],
+                "number_worded_ar": corpus.juz_worded_ar[juz],
+                "number_worded_en": corpus.juz_worded_en[juz],
+                "number": corpus.juz_numbers[juz],
+            },
+            "number": corpus.aya_numbers[row],
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    Returns the search index of this process, building it on first use and again
+    whenever the corpus changes.
+    """
+    global _index
+
+    corpus = get_corpus()
+    if _index is None or _index.version != corpus.version:
+        with _index_lock:
+            if _index is None or _index.version != corpus.version:
+                _index = SearchIndex(corpus)
+    return _index
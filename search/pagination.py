@@ -0,0 +1,152 @@
+"""
+Keyset pagination of the Elasticsearch search results.
+
+From/size pagination makes Elasticsearch collect and sort every hit up to the page
+asked for, so the deeper the page the more it costs. ``SearchAfterPagination``
+pages with ``search_after`` instead: the cursor holds the sort values of the last
+hit of a page and the next page starts right after it, so every page costs the same
+as the first one. Pages are linked by opaque cursors, the ``page`` parameter still
+gets the page number pagination of ``django_elasticsearch_dsl_drf``.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+
+from django_elasticsearch_dsl_drf.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Breaks the ties of every ordering, as search_after needs a total order.
+TIEBREAKER = "id"
+
+
+def sort_orders(queryset):
+    """
+    The sort of a search as (field, order) pairs, with the tiebreaker last.
+    """
+    orders = []
+    for sort in queryset.to_dict().get("sort", []):
+        if isinstance(sort, dict):
+            (name, options), *_ = sort.items()
+            order = options["order"] if isinstance(options, dict) else options
+        else:
+            name, order = sort, "desc" if sort == "_score" else "asc"
+        orders.append((name, order))
+
+    if TIEBREAKER not in (name for name, _ in orders):
+        orders.append((TIEBREAKER, "asc"))
+    return orders
+
+
+def encode_cursor(values, reverse=False):
+    data = json.dumps({"after": values, "reverse": reverse}, separators=(",", ":"))
+    return urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    """
+    The sort values and direction held by ``cursor``, which must have ``length``
+    values. Raises ValueError when it's not a cursor.
+    """
+    try:
+        data = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (Base64Error, UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(cursor) from error
+
+    if (
+        not isinstance(data, dict)
+        or not isinstance(data.get("after"), list)
+        or len(data["after"]) != length
+    ):
+        raise ValueError(cursor)
+    return data["after"], bool(data.get("reverse"))
+
+
+class SearchAfterPagination(PageNumberPagination):
+    """
+    Cursor pagination of search results with ``search_after``, in the response
+    shape of the page number pagination: count, next, previous and results.
+    Requests with a ``page`` parameter are paginated by page number.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.by_cursor = not (
+            getattr(queryset, "_suggest", False)
+            or view.action == "functional_suggest"
+            or self.page_query_param in request.query_params
+        )
+        if not self.by_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        orders = sort_orders(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        after, reverse = None, False
+        if cursor:
+            try:
+                after, reverse = decode_cursor(cursor, len(orders))
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+
+        # Going back, the previous page is the next one in the reverse order.
+        if reverse:
+            orders = [
+                (name, "asc" if order == "desc" else "desc") for name, order in orders
+            ]
+        search = queryset.sort(*({name: {"order": order}} for name, order in orders))
+        if after is not None:
+            search = search.extra(search_after=after)
+
+        # One more hit than asked for tells whether there's another page after it.
+        response = search[: page_size + 1].execute()
+        hits = list(response)
+        more = len(hits) > page_size
+        hits = hits[:page_size]
+        if reverse:
+            hits.reverse()
+
+        self.count = self.get_es_count(response)
+        self.page_hits = hits
+        self.has_next = bool(hits) and (reverse or more)
+        self.has_previous = bool(hits) and (more if reverse else after is not None)
+        return hits
+
+    def get_cursor_link(self, hit, reverse):
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        cursor = encode_cursor(list(hit.meta.sort), reverse)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.by_cursor:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.get_cursor_link(self.page_hits[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.by_cursor:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self.get_cursor_link(self.page_hits[0], reverse=True)
+
+    def get_paginated_response_context(self, data):
+        if not self.by_cursor:
+            return super().get_paginated_response_context(data)
+
+        return [
+            ("count", self.count),
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
@@ -0,0 +1,77 @@
+"""
+Full-text search of the ayas in PostgreSQL.
+
+Migration ``quran.0008_aya_search_vector`` adds a ``search_vector`` column to the
+ayas, a ``tsvector`` of their clean text generated by PostgreSQL, and a GIN index
+on it. The ``simple_query_string`` syntax of the other backends is compiled into a
+``tsquery`` matched against it.
+"""
+import uuid
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from quran.models import Aya
+from search.index import And, Not, Phrase, Term, parse_query, tokenize
+
+CONFIG = "simple"
+
+
+def compile_tsquery(clause):
+    """
+    Compiles a clause of ``search.index.parse_query`` into ``tsquery`` syntax.
+    """
+    if isinstance(clause, Term):
+        return f"'{clause.token}'" + (":*" if clause.prefix else "")
+    if isinstance(clause, Phrase):
+        return " <-> ".join(f"'{token}'" for token in clause.tokens)
+    if isinstance(clause, Not):
+        return f"!({compile_tsquery(clause.clause)})"
+
+    operator = " & " if isinstance(clause, And) else " | "
+    return "(" + operator.join(compile_tsquery(child) for child in clause.clauses) + ")"
+
+
+def search_ayas(search=None, simple_query_string=None):
+    """
+    The ayas matching ``search`` as a phrase, aya number or id, and the
+    ``simple_query_string`` query, annotated with their ``score``.
+    """
+    queryset = Aya.objects.select_related("sora", "juz").annotate(
+        search_vector=RawSQL(
+            f'"{Aya._meta.db_table}"."search_vector"',
+            [],
+            output_field=SearchVectorField(),
+        )
+    )
+
+    queries = []
+    if search and tokenize(search):
+        query = SearchQuery(search, config=CONFIG, search_type="phrase")
+        condition = Q(search_vector=query)
+
+        search = search.strip()
+        if search.isdigit():
+            condition |= Q(number=int(search))
+        try:
+            condition |= Q(pk=uuid.UUID(search))
+        except ValueError:
+            pass
+
+        queryset = queryset.filter(condition)
+        queries.append(query)
+
+    clause = parse_query(simple_query_string or "")
+    if clause is not None:
+        query = SearchQuery(compile_tsquery(clause), config=CONFIG, search_type="raw")
+        queryset = queryset.filter(search_vector=query)
+        queries.append(query)
+
+    if not queries:
+        return queryset
+
+    rank = SearchRank(F("search_vector"), queries[0])
+    for query in queries[1:]:
+        rank = rank + SearchRank(F("search_vector"), query)
+    return queryset.annotate(score=rank)
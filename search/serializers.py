@@ -1,4 +1,5 @@
 from django_elasticsearch_dsl_drf.serializers import DocumentSerializer
+from rest_framework import serializers
 
 from quran.documents import AyaDocument
 
@@ -15,3 +16,9 @@ class ArticleDocumentSerializer(DocumentSerializer):
             "juz",
             "number",
         )
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    prefix = serializers.CharField(trim_whitespace=True)
+    field = serializers.ChoiceField(["clean_text", "sora"], default="clean_text")
+    size = serializers.IntegerField(min_value=1, max_value=50, default=10)
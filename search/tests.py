@@ -1,8 +1,46 @@
+import threading
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
 from ddt import data, ddt, unpack
-from django.test import TestCase
-from django.urls import reverse
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
 from django.utils.http import urlencode
-from rest_framework import status
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Response
+from rest_framework import routers, status
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from quran.models import Aya
+from search.autocomplete import PrefixIndex, get_autocomplete
+from search.cache import SearchCache, normalize_params, search_cache
+from search.index import And, Not, Or, Phrase, Term, get_search_index, parse_query
+from search.pagination import SearchAfterPagination, encode_cursor
+from search.postgres import compile_tsquery, search_ayas
+from search.views import (
+    AyaDatabaseSearchView,
+    AyaLocalSearchView,
+    SearchCacheStatsView,
+)
+
+
+def search_urlpatterns(view_class):
+    """
+    The search endpoints served by ``view_class``, to test the other backends.
+    """
+    router = routers.DefaultRouter()
+    router.register(r"aya", view_class, basename="aya-search")
+    return [
+        path("api/search/", include((router.urls, "search"), namespace="search")),
+    ]
+
+
+# Serves the search endpoints from the local backend, see TestLocalSearchList
+urlpatterns = search_urlpatterns(AyaLocalSearchView)
 
 
 @ddt
@@ -102,3 +140,476 @@ class TestViewSetSearchList(TestCase):
 
         for option in options:
             self.assertIn(term, option["text"])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestLocalSearchList(TestViewSetSearchList):
+    """
+    The local backend must answer the same requests as Elasticsearch does.
+    """
+
+    def setUp(self):
+        search_cache.clear()
+
+    def search(self, **query):
+        url = reverse("search:aya-search-list")
+        response = self.client.get(f"{url}?{urlencode(query)}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        return response.data
+
+    def test_no_queries(self):
+        get_search_index()
+
+        with self.assertNumQueries(0):
+            self.search(search_simple_query_string="الله")
+
+    def test_ordering(self):
+        results = self.search(search="الضالين", ordering="-sora,number")["results"]
+        self.assertEqual(
+            [(56, 92), (26, 20), (26, 86), (6, 77), (2, 198), (1, 7)],
+            [(result["sora"]["number"], result["number"]) for result in results],
+        )
+
+        # BM25 ranks the ayas repeating the term first
+        results = self.search(search="الله", ordering="-score")["results"]
+        self.assertGreaterEqual(results[0]["clean_text"].split().count("الله"), 3)
+
+    def test_operators(self):
+        for query, expected_count in (
+            ('"لعنة الله"', 6),
+            ("الله -لعنة", 1566 - 6),
+            ("الصيام | الضالين", 8),
+            ("(الصيام | الضالين) +كتب", 2),
+            ("-الله", 6236 - 1566),
+        ):
+            self.assertEqual(
+                expected_count,
+                self.search(search_simple_query_string=query)["count"],
+                msg=query,
+            )
+
+        both = self.search(search="الله", search_simple_query_string="الصمد")
+        self.assertEqual(1, both["count"])
+
+    def test_retrieve(self):
+        aya = Aya.objects.get(sora__number=112, number=2)
+        url = reverse("search:aya-search-detail", kwargs={"pk": aya.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(str(aya.pk), response.data["id"])
+        self.assertEqual(112, response.data["sora"]["number"])
+
+        url = reverse("search:aya-search-detail", kwargs={"pk": "missing"})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, self.client.get(url).status_code)
+
+
+class DatabaseSearchUrls:
+    urlpatterns = search_urlpatterns(AyaDatabaseSearchView)
+
+
+@skipUnless(connection.vendor == "postgresql", "Full-text search needs PostgreSQL")
+@override_settings(ROOT_URLCONF=DatabaseSearchUrls)
+class TestDatabaseSearchList(TestLocalSearchList):
+    """
+    The PostgreSQL backend must answer the same requests as Elasticsearch does.
+    """
+
+    def test_no_queries(self):
+        with self.assertNumQueries(AyaDatabaseSearchView.query_budgets["list"]):
+            self.search(search_simple_query_string="الله")
+
+    def test_score(self):
+        scores = search_ayas(simple_query_string="الله").values_list("score", flat=True)
+        self.assertGreater(len(set(scores)), 1)
+
+        by_score = self.search(search="الله", ordering="-score")["results"]
+        by_number = self.search(search="الله", ordering="sora,number")["results"]
+        self.assertNotEqual(
+            [result["id"] for result in by_number],
+            [result["id"] for result in by_score],
+        )
+
+
+class TestCompileTsQuery(TestCase):
+    def test_compile(self):
+        self.assertEqual(
+            "(('الله' | 'رب' <-> 'العالمين') & !('لعنة') & 'رس':*)",
+            compile_tsquery(parse_query('(الله | "رب العالمين") -لعنة رس*')),
+        )
+
+    def test_quotes(self):
+        # Words never contain quotes, the tokenizer splits on them
+        self.assertEqual("'it' <-> 's'", compile_tsquery(parse_query("it's")))
+
+
+class TestParseQuery(TestCase):
+    def test_default_operator(self):
+        clause = parse_query("لعنة الله")
+        self.assertIsInstance(clause, And)
+        self.assertEqual(["لعنة", "الله"], [term.token for term in clause.clauses])
+
+    def test_operators(self):
+        clause = parse_query('(الله | "رب العالمين") -لعنة رس*')
+        self.assertIsInstance(clause, And)
+
+        group, negated, prefix = clause.clauses
+        self.assertIsInstance(group, Or)
+        self.assertIsInstance(group.clauses[1], Phrase)
+        self.assertIsInstance(negated, Not)
+        self.assertIsInstance(prefix, Term)
+        self.assertTrue(prefix.prefix)
+
+    def test_lenient(self):
+        self.assertIsNone(parse_query(""))
+        self.assertIsNone(parse_query("| + - ()"))
+        self.assertIsInstance(parse_query("الله)"), Term)
+        self.assertIsInstance(parse_query('"الله'), Term)
+
+
+class CachedSearchUrls:
+    urlpatterns = [
+        *search_urlpatterns(AyaLocalSearchView),
+        path("cache/", SearchCacheStatsView.as_view(), name="cache-stats"),
+    ]
+
+
+@override_settings(
+    SEARCH_CACHE_TTL=60, SEARCH_CACHE_MAX_ENTRIES=2, ROOT_URLCONF=CachedSearchUrls
+)
+class TestSearchCache(TestCase):
+    def setUp(self):
+        search_cache.clear()
+
+    def search(self, **query):
+        url = reverse("search:aya-search-list")
+        return self.client.get(f"{url}?{urlencode(query)}")
+
+    def test_normalized_key(self):
+        self.assertEqual(
+            normalize_params(
+                QueryDict("search=%20Al%20%20Baqarah&ordering=sora,%20-n")
+            ),
+            normalize_params(QueryDict("ordering=sora,-n&search=al%20baqarah")),
+        )
+        for page in ("1", "2"):
+            self.assertNotEqual(
+                normalize_params(QueryDict("search=الله")),
+                normalize_params(QueryDict(f"search=الله&page={page}")),
+            )
+        # The presentation form of the Allah ligature, which Elasticsearch doesn't
+        # fold into the word.
+        self.assertNotEqual(
+            normalize_params(QueryDict("search=الله")),
+            normalize_params(QueryDict("search=\ufdf2")),
+        )
+
+    def test_hits(self):
+        response = self.search(search="الضالين")
+        self.assertEqual("MISS", response["X-Cache"])
+        self.assertEqual(6, response.data["count"])
+
+        response = self.search(search=" الضالين ")
+        self.assertEqual("HIT", response["X-Cache"])
+        self.assertEqual(6, response.data["count"])
+
+        stats = self.client.get("/cache/").data
+        self.assertEqual((1, 1, 1), (stats["hits"], stats["misses"], stats["entries"]))
+
+    def test_first_page_by_number(self):
+        # The links of the first page by number don't have cursors.
+        self.assertEqual("MISS", self.search(search="الضالين")["X-Cache"])
+        self.assertEqual("MISS", self.search(search="الضالين", page=1)["X-Cache"])
+        self.assertEqual(2, search_cache.stats()["entries"])
+
+    def test_eviction(self):
+        for term in ("الصيام", "الضالين", "الصيام", "لعنة"):
+            self.search(search=term)
+
+        # The least recently used entry went first
+        self.assertEqual("HIT", self.search(search="الصيام")["X-Cache"])
+        self.assertEqual("MISS", self.search(search="الضالين")["X-Cache"])
+        self.assertEqual(2, search_cache.stats()["evictions"])
+
+    @override_settings(SEARCH_CACHE_TTL=0)
+    def test_expiration(self):
+        self.search(search="الصيام")
+        self.assertEqual("MISS", self.search(search="الصيام")["X-Cache"])
+        self.assertEqual(1, search_cache.stats()["expirations"])
+
+    @override_settings(SEARCH_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.search(search="الصيام")
+        self.assertNotIn("X-Cache", self.search(search="الصيام"))
+
+
+class TestSearchCacheCoalescing(TestCase):
+    def test_coalesced(self):
+        cache = SearchCache()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "results"
+
+        results = []
+
+        def get():
+            results.append(cache.get_or_compute("key", compute))
+
+        leader = threading.Thread(target=get)
+        leader.start()
+        started.wait()
+
+        waiters = [threading.Thread(target=get) for _ in range(3)]
+        for waiter in waiters:
+            waiter.start()
+        while cache.stats()["coalesced"] < 3:
+            pass
+        release.set()
+        for thread in (leader, *waiters):
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(
+            [("results", "MISS")] + [("results", "COALESCED")] * 3, results
+        )
+        self.assertEqual(("results", "HIT"), cache.get_or_compute("key", compute))
+
+    def test_errors(self):
+        cache = SearchCache()
+
+        def compute():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            cache.get_or_compute("key", compute)
+        self.assertEqual(
+            ("results", "MISS"), cache.get_or_compute("key", lambda: "results")
+        )
+        self.assertEqual(0, cache.stats()["in_flight"])
+
+
+class TestPrefixIndex(TestCase):
+    def test_complete(self):
+        words = get_search_index().corpus.concordance
+        index = PrefixIndex(
+            (word, words.frequency(n), {}) for n, word in enumerate(words.words)
+        )
+
+        for prefix in ("", "ا", "يا", "الر", "zz"):
+            expected = sorted(
+                (
+                    (-words.frequency(n), word)
+                    for n, word in enumerate(words.words)
+                    if word.startswith(prefix)
+                ),
+            )[:10]
+            self.assertEqual(
+                [(word, -weight) for weight, word in expected],
+                [
+                    (option["text"], option["weight"])
+                    for option in index.complete(prefix, 10)
+                ],
+                msg=prefix,
+            )
+
+    def test_ties(self):
+        index = PrefixIndex([("ab", 1, {}), ("aa", 1, {}), ("Ac", 2, {"n": 3})])
+        self.assertEqual(
+            [
+                {"text": "Ac", "weight": 2, "n": 3},
+                {"text": "aa", "weight": 1},
+                {"text": "ab", "weight": 1},
+            ],
+            index.complete("A", 5),
+        )
+
+
+class TestAutocompleteView(TestCase):
+    def complete(self, **query):
+        url = reverse("search:autocomplete")
+        return self.client.get(f"{url}?{urlencode(query)}")
+
+    def test_words(self):
+        get_autocomplete()
+
+        with self.assertNumQueries(0):
+            response = self.complete(prefix="يا", size=3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, msg=response.data)
+        self.assertEqual(
+            ["ياأيها", "ياقوم", "ياموسى"],
+            [option["text"] for option in response.data["options"]],
+        )
+
+    def test_soras(self):
+        response = self.complete(field="sora", prefix="AL-B")
+        self.assertEqual(
+            [{"text": "Al-Baqarah", "weight": 286, "sora": 2}],
+            [
+                option
+                for option in response.data["options"]
+                if option["text"].startswith("Al-Baq")
+            ],
+        )
+        self.assertEqual(2, response.data["options"][0]["sora"])
+
+    def test_invalid(self):
+        for query in (
+            {},
+            {"prefix": "يا", "field": "text"},
+            {"prefix": "a", "size": 0},
+        ):
+            self.assertEqual(
+                status.HTTP_400_BAD_REQUEST,
+                self.complete(**query).status_code,
+                msg=query,
+            )
+
+
+class FakeElasticsearch:
+    """
+    Answers searches sorted by ``sora.number``, ``number.raw`` and ``id`` from a
+    list of documents, the way Elasticsearch does.
+    """
+
+    def __init__(self, count):
+        self.documents = [
+            {"sora": {"number": 1 + n // 7}, "number": 1 + n % 7, "id": n}
+            for n in range(count)
+        ]
+        self.searches = []
+
+    def values(self, document, name):
+        return {
+            "sora.number": document["sora"]["number"],
+            "number.raw": document["number"],
+            "id": document["id"],
+        }[name]
+
+    def execute(self, search):
+        body = search.to_dict()
+        self.searches.append(body)
+
+        orders = []
+        for sort in body["sort"]:
+            if isinstance(sort, str):
+                sort = {sort: {"order": "asc"}}
+            (name, options), *_ = sort.items()
+            orders.append((name, -1 if options["order"] == "desc" else 1))
+
+        def key(values):
+            return tuple(value * sign for value, (_, sign) in zip(values, orders))
+
+        hits = [
+            (document["id"], [self.values(document, name) for name, _ in orders])
+            for document in self.documents
+        ]
+        hits.sort(key=lambda hit: key(hit[1]))
+        if "search_after" in body:
+            after = key(body["search_after"])
+            hits = [hit for hit in hits if key(hit[1]) > after]
+
+        start = body.get("from", 0)
+        stop = start + body.get("size", 10)
+        return Response(
+            search,
+            {
+                "hits": {
+                    "total": {"value": len(self.documents), "relation": "eq"},
+                    "hits": [
+                        {"_id": str(pk), "_source": {"id": pk}, "sort": values}
+                        for pk, values in hits[start:stop]
+                    ],
+                }
+            },
+        )
+
+
+class TestSearchAfterPagination(TestCase):
+    def setUp(self):
+        self.elasticsearch = FakeElasticsearch(250)
+        patcher = mock.patch.object(
+            Search, "execute", autospec=True, side_effect=self.elasticsearch.execute
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            Search, "count", autospec=True, side_effect=lambda search: 250
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def paginate(self, url, *ordering):
+        request = Request(APIRequestFactory().get(url))
+        search = Search(index="quran-aya").sort(
+            *(ordering or ("sora.number", "number.raw"))
+        )
+
+        paginator = SearchAfterPagination()
+        hits = paginator.paginate_queryset(
+            search, request, SimpleNamespace(action="list")
+        )
+        data = dict(paginator.get_paginated_response_context([hit.id for hit in hits]))
+        return data
+
+    def walk(self, url, link, *ordering):
+        pages = []
+        while url:
+            data = self.paginate(url, *ordering)
+            pages.append(data["results"])
+            url = data[link]
+        return pages
+
+    def test_forward_and_back(self):
+        pages = self.walk("/api/search/aya/", "next")
+        self.assertEqual([100, 100, 50], [len(page) for page in pages])
+        self.assertEqual(list(range(250)), sum(pages, []))
+
+        last = self.paginate("/api/search/aya/")
+        last = self.paginate(self.paginate(last["next"])["next"])
+        self.assertIsNone(last["next"])
+        self.assertEqual(250, last["count"])
+
+        back = self.walk(last["previous"], "previous")
+        self.assertEqual(pages[:2][::-1], back)
+
+    def test_constant_cost(self):
+        self.walk("/api/search/aya/", "next")
+
+        # Every page asks for a page and a hit, never for the hits before it
+        self.assertEqual(
+            {0}, {search["from"] for search in self.elasticsearch.searches}
+        )
+        self.assertEqual(
+            {101}, {search["size"] for search in self.elasticsearch.searches}
+        )
+        self.assertEqual(
+            [
+                {"sora.number": {"order": "asc"}},
+                {"number.raw": {"order": "asc"}},
+                {"id": {"order": "asc"}},
+            ],
+            self.elasticsearch.searches[-1]["sort"],
+        )
+
+    def test_ordering(self):
+        pages = self.walk("/api/search/aya/", "next", "-sora.number", "number.raw")
+        documents = sum(pages, [])
+        expected = sorted(range(250), key=lambda n: (-(n // 7), n % 7))
+        self.assertEqual(expected, documents)
+
+    def test_page_numbers(self):
+        data = self.paginate("/api/search/aya/?page=3")
+        self.assertEqual(list(range(200, 250)), data["results"])
+        self.assertIn("page=2", data["previous"])
+        self.assertEqual(200, self.elasticsearch.searches[-1]["from"])
+
+    def test_invalid_cursor(self):
+        cursor = encode_cursor([1, 2])
+        for url in (f"/api/search/aya/?cursor={cursor}", "/api/search/aya/?cursor=%%%"):
+            with self.assertRaises(NotFound):
+                self.paginate(url)
@@ -1,12 +1,31 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from search.views import AyaDocumentView
+from api.async_views import async_urlpatterns
+from search.views import (
+    AutocompleteView,
+    AyaDatabaseSearchView,
+    AyaDocumentView,
+    AyaLocalSearchView,
+    SearchCacheStatsView,
+)
+
+search_views = {
+    "elasticsearch": AyaDocumentView,
+    "local": AyaLocalSearchView,
+    "postgres": AyaDatabaseSearchView,
+}
 
 router = routers.DefaultRouter()
-router.register(r"aya", AyaDocumentView, basename="aya-search")
+router.register(r"aya", search_views[settings.SEARCH_BACKEND], basename="aya-search")
 
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("cache/", SearchCacheStatsView.as_view(), name="cache-stats"),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns(urlpatterns)
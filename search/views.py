@@ -1,3 +1,6 @@
+import uuid
+
+from django.conf import settings
 from django_elasticsearch_dsl_drf.constants import SUGGESTER_COMPLETION
 from django_elasticsearch_dsl_drf.filter_backends import (
     CompoundSearchFilterBackend,
@@ -7,14 +10,46 @@ from django_elasticsearch_dsl_drf.filter_backends import (
     SuggesterFilterBackend,
 )
 from django_elasticsearch_dsl_drf.viewsets import DocumentViewSet
+from rest_framework import pagination, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from quran.documents import AyaDocument
-from search.serializers import ArticleDocumentSerializer
+from search.autocomplete import get_autocomplete
+from search.cache import search_cache, search_cache_key
+from search.index import get_search_index
+from search.pagination import SearchAfterPagination
+from search.postgres import search_ayas
+from search.serializers import ArticleDocumentSerializer, AutocompleteSerializer
+
+
+class SearchCacheMixin:
+    """
+    Serves the search results from the search cache (see ``search.cache``) unless
+    ``SEARCH_CACHE_ENABLED`` is turned off. ``X-Cache`` tells whether they were
+    found there, searched for or waited for while another request searched.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.SEARCH_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
 
+        data, state = search_cache.get_or_compute(
+            search_cache_key(request, type(self).__name__),
+            lambda: super(SearchCacheMixin, self).list(request, *args, **kwargs).data,
+        )
+        return Response(data, headers={"X-Cache": state})
 
-class AyaDocumentView(DocumentViewSet):
+
+class AyaDocumentView(SearchCacheMixin, DocumentViewSet):
     document = AyaDocument
     serializer_class = ArticleDocumentSerializer
+    pagination_class = SearchAfterPagination
+
+    # Searches are answered by Elasticsearch alone
+    query_budgets = {"list": 0, "retrieve": 0, "suggest": 0, "functional_suggest": 0}
 
     filter_backends = [
         CompoundSearchFilterBackend,
@@ -45,6 +80,7 @@ class AyaDocumentView(DocumentViewSet):
     ordering_fields = {
         "sora": "sora.number",
         "number": "number.raw",
+        "score": "_score",
     }
 
     ordering = (
@@ -66,3 +102,268 @@ class AyaDocumentView(DocumentViewSet):
             ],
         },
     }
+
+
+class SearchOrderingMixin:
+    """
+    Reads the ``ordering`` parameter like ``OrderingFilterBackend`` does, ignoring
+    the fields missing from ``ordering_fields``.
+    """
+
+    def get_ordering(self):
+        fields = [
+            field.strip()
+            for field in self.request.query_params.get("ordering", "").split(",")
+            if field.strip().lstrip("-") in self.ordering_fields
+        ]
+        return fields or self.ordering
+
+
+class AyaLocalSearchView(
+    SearchCacheMixin, SearchOrderingMixin, viewsets.GenericViewSet
+):
+    """
+    The search endpoints of ``AyaDocumentView`` answered from the in-process index
+    of ``search.index`` instead of Elasticsearch, with the same parameters and
+    response shapes.
+    """
+
+    serializer_class = ArticleDocumentSerializer
+    pagination_class = pagination.PageNumberPagination
+
+    # Searches are answered from memory alone
+    query_budgets = {"list": 0, "retrieve": 0, "suggest": 0}
+
+    ordering_fields = ("sora", "number", "score")
+    ordering = ("sora", "number")
+
+    suggester_fields = {"sora": "sora", "clean_text": "clean_text"}
+    suggest_size = 5
+
+    def get_rows(self):
+        index = get_search_index()
+        params = self.request.query_params
+
+        scores = index.match_phrase(params.get("search", ""))
+        if "search_simple_query_string" in params:
+            matches = index.search(params["search_simple_query_string"])
+            scores = {
+                row: scores[row] + matches[row] for row in matches if row in scores
+            }
+
+        # Rows are in mushaf order, by sora and number, which is the default
+        # ordering and breaks the ties of the others.
+        rows = sorted(scores)
+        ordering = self.get_ordering()
+        if tuple(ordering) == ("sora", "number"):
+            return rows
+
+        keys = {
+            "sora": lambda row: index.corpus.aya_soras[row],
+            "number": lambda row: index.corpus.aya_numbers[row],
+            "score": scores.__getitem__,
+        }
+        for field in reversed(ordering):
+            descending = field.startswith("-")
+            rows.sort(key=keys[field.lstrip("-")], reverse=descending)
+        return rows
+
+    def list(self, request, *args, **kwargs):
+        index = get_search_index()
+        rows = self.get_rows()
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            rows = page
+        documents = [index.document(row) for row in rows]
+
+        serializer = self.get_serializer(documents, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        index = get_search_index()
+        row = index.corpus.aya_index.get(kwargs["pk"])
+        if row is None:
+            raise NotFound()
+
+        return Response(self.get_serializer(index.document(row)).data)
+
+    @action(detail=False)
+    def suggest(self, request):
+        """
+        Completion suggestions, e.g. ``?clean_text__completion=يا``.
+        """
+        index = get_search_index()
+
+        suggestions = {}
+        for param, prefix in request.query_params.items():
+            field, _, suggester = param.partition("__")
+            if field not in self.suggester_fields or suggester != "completion":
+                continue
+
+            options = [
+                {
+                    "text": text,
+                    "_index": AyaDocument._index._name,
+                    "_id": index.corpus.aya_ids[row],
+                    "_score": 1.0,
+                    "_source": index.document(row),
+                }
+                for text, row in index.complete(
+                    self.suggester_fields[field], prefix, self.suggest_size
+                )
+            ]
+            suggestions[param] = [
+                {"text": prefix, "offset": 0, "length": len(prefix), "options": options}
+            ]
+        return Response(suggestions)
+
+
+def prepare_document(document, aya):
+    """
+    The ``AyaDocument`` of ``aya`` as Elasticsearch returns it, with the ids, which
+    the document prepares as ``uuid.UUID``, as strings.
+    """
+    source = document.prepare(aya)
+    source["id"] = str(source["id"])
+    for related in ("sora", "juz"):
+        if source.get(related):
+            source[related]["id"] = str(source[related]["id"])
+    return source
+
+
+class AyaDatabaseSearchView(
+    SearchCacheMixin, SearchOrderingMixin, viewsets.GenericViewSet
+):
+    """
+    The search endpoints of ``AyaDocumentView`` answered by PostgreSQL full-text
+    search, see ``search.postgres``, with the same parameters and response shapes.
+    """
+
+    serializer_class = ArticleDocumentSerializer
+    pagination_class = pagination.PageNumberPagination
+
+    # Counting the hits, then fetching the page, on a cache miss. Suggestions take a
+    # query per field.
+    query_budgets = {"list": 2, "retrieve": 1, "suggest": 2}
+
+    ordering_fields = {
+        "sora": "sora__number",
+        "number": "number",
+        "score": "score",
+    }
+    ordering = ("sora", "number")
+
+    suggester_fields = {"sora": "sora__clean_name_ar", "clean_text": "clean_text"}
+    suggest_size = 5
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = search_ayas(
+            params.get("search"), params.get("search_simple_query_string")
+        )
+
+        ordering = []
+        for field in self.get_ordering():
+            name = self.ordering_fields[field.lstrip("-")]
+            if name == "score" and "score" not in queryset.query.annotations:
+                continue
+            ordering.append(f"-{name}" if field.startswith("-") else name)
+        return queryset.order_by(*ordering, "sora__number", "number")
+
+    def list(self, request, *args, **kwargs):
+        document = AyaDocument()
+        queryset = self.get_queryset()
+
+        page = self.paginate_queryset(queryset)
+        ayas = queryset if page is None else page
+        documents = [prepare_document(document, aya) for aya in ayas]
+
+        serializer = self.get_serializer(documents, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        document = AyaDocument()
+        try:
+            aya = document.get_queryset().filter(pk=uuid.UUID(kwargs["pk"])).first()
+        except ValueError:
+            aya = None
+        if aya is None:
+            raise NotFound()
+
+        return Response(self.get_serializer(prepare_document(document, aya)).data)
+
+    @action(detail=False)
+    def suggest(self, request):
+        """
+        Completion suggestions, e.g. ``?clean_text__completion=يا``.
+        """
+        document = AyaDocument()
+
+        suggestions = {}
+        for param, prefix in request.query_params.items():
+            field, _, suggester = param.partition("__")
+            if field not in self.suggester_fields or suggester != "completion":
+                continue
+
+            name = self.suggester_fields[field]
+            ayas = (
+                document.get_queryset()
+                .filter(**{f"{name}__startswith": prefix})
+                .order_by(name, "sora__number", "number")[: self.suggest_size]
+            )
+            options = [
+                {
+                    "text": aya.sora.clean_name_ar
+                    if field == "sora"
+                    else aya.clean_text,
+                    "_index": AyaDocument._index._name,
+                    "_id": str(aya.pk),
+                    "_score": 1.0,
+                    "_source": prepare_document(document, aya),
+                }
+                for aya in ayas
+            ]
+            suggestions[param] = [
+                {"text": prefix, "offset": 0, "length": len(prefix), "options": options}
+            ]
+        return Response(suggestions)
+
+
+class AutocompleteView(APIView):
+    """
+    Completions of a prefix from memory, e.g. ?prefix=يا or ?field=sora&prefix=al,
+    the most frequent first. See ``search.autocomplete``.
+    """
+
+    query_budgets = {"get": 0}
+
+    def get(self, request, *args, **kwargs):
+        params = AutocompleteSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        prefix, field, size = (
+            params.validated_data[name] for name in ("prefix", "field", "size")
+        )
+
+        return Response(
+            {
+                "prefix": prefix,
+                "field": field,
+                "options": get_autocomplete().complete(field, prefix, size),
+            }
+        )
+
+
+class SearchCacheStatsView(APIView):
+    """
+    View to report the usage of this worker's search cache.
+    """
+
+    query_budgets = {"get": 0}
+
+    def get(self, *args, **kwargs):
+        return Response(search_cache.stats())